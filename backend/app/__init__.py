@@ -4,6 +4,7 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import threading
 
 load_dotenv()
 
@@ -17,9 +18,14 @@ def create_app():
     app.config["MONGO_URI"] = os.getenv("MONGODB_URI", "mongodb://localhost:27017/weekly-reports")
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET", "your-secret-key")
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = False
+    # Request bodies over this are refused before being read (413)
+    from app.utils.uploads import MAX_UPLOAD_BYTES
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
     
-    # Initialize extensions
-    mongo.init_app(app)
+    # Initialize extensions; every MongoDB command is timed for /api/metrics
+    from app.utils import metrics
+    mongo.init_app(app, event_listeners=[metrics.command_listener])
+    metrics.init_app(app)
     jwt.init_app(app)
     CORS(app)
     
@@ -31,6 +37,25 @@ def create_app():
             mongo.db.users.create_index('username', unique=True, sparse=True)
             # Helpful for report queries
             mongo.db.reports.create_index([('user_id', 1), ('created_at', -1)])
+            # Keyset pagination over all reports (newest first)
+            mongo.db.reports.create_index([('created_at', -1), ('_id', -1)])
+            # Full-text search (relevance, phrases) and prefix search on tokens
+            mongo.db.reports.create_index(
+                [('achievements', 'text'), ('challenges', 'text'), ('next_week_plan', 'text')],
+                name='report_text',
+                weights={'achievements': 3, 'challenges': 2, 'next_week_plan': 1}
+            )
+            mongo.db.reports.create_index('search_tokens')
+            from app.utils.export_jobs import ensure_indexes as ensure_export_job_indexes
+            ensure_export_job_indexes()
+            from app.utils.stats import ensure_indexes as ensure_stats_indexes
+            ensure_stats_indexes()
+            from app.utils.outbox import ensure_indexes as ensure_outbox_indexes
+            ensure_outbox_indexes()
+            from app.utils.reminders import ensure_indexes as ensure_reminder_indexes
+            ensure_reminder_indexes()
+            from app.utils.audit import ensure_indexes as ensure_audit_indexes
+            ensure_audit_indexes()
             # Ensure a default admin exists (username/password can be overridden by env)
             from app.models.user import User
             default_admin_username = os.getenv('DEFAULT_ADMIN_USERNAME', 'adel zawia')
@@ -55,11 +80,25 @@ def create_app():
         # Do not crash app if index creation fails at startup
         pass
 
+    from app.commands import register_commands
+    register_commands(app)
+
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.reports import reports_bp
+    from app.routes.metrics import metrics_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(reports_bp, url_prefix='/api/reports')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+
+    # Background delivery of queued email/Slack notifications
+    from app.utils.outbox import start_worker
+    start_worker(app)
+    from app.utils.audit import start_writer
+    start_writer(app)
+    # One-time build of the /stats rollups from existing reports (see stats.backfill)
+    from app.utils.stats import backfill as backfill_stats
+    threading.Thread(target=backfill_stats, args=(app,), name='stats-backfill', daemon=True).start()
     
     return app
@@ -0,0 +1,55 @@
+import click
+from pymongo import UpdateOne
+
+from app import mongo
+from app.utils.search import TEXT_FIELDS, search_tokens
+from app.utils import attachments, revisions, stats as report_stats
+from app.models.report import PERIOD_FIELDS
+
+
+def register_commands(app):
+    """Attach maintenance commands to `flask` (e.g. `flask --app run reindex-search`)"""
+
+    @app.cli.command('reindex-search')
+    @click.option('--batch-size', default=500, show_default=True)
+    def reindex_search(batch_size):
+        """Rebuild search_tokens on every report (backfill for prefix search)."""
+        ops = []
+        updated = 0
+        cursor = mongo.db.reports.find({}, {f: 1 for f in TEXT_FIELDS}).batch_size(batch_size)
+        for doc in cursor:
+            ops.append(UpdateOne({'_id': doc['_id']}, {'$set': {'search_tokens': search_tokens(doc)}}))
+            if len(ops) >= batch_size:
+                updated += mongo.db.reports.bulk_write(ops, ordered=False).modified_count
+                ops = []
+        if ops:
+            updated += mongo.db.reports.bulk_write(ops, ordered=False).modified_count
+        # Search results may have changed for any listing
+        revisions.bump_all()
+        click.echo(f"Reindexed {updated} report(s)")
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Recompute the report_stats rollups from the reports collection."""
+        buckets = report_stats.rebuild()
+        revisions.bump([])
+        click.echo(f"Rebuilt {buckets} stats bucket(s)")
+
+    @app.cli.command('normalize-weeks')
+    def normalize_weeks():
+        """Convert week/year/month stored as strings to integers, then rebuild stats."""
+        for field in PERIOD_FIELDS:
+            result = mongo.db.reports.update_many(
+                {field: {'$type': 'string'}},
+                [{'$set': {field: {'$convert': {'input': {'$trim': {'input': f'${field}'}}, 'to': 'int', 'onError': f'${field}'}}}}]
+            )
+            click.echo(f"{field}: converted {result.modified_count} report(s)")
+        buckets = report_stats.rebuild()
+        revisions.bump_all()
+        click.echo(f"Rebuilt {buckets} stats bucket(s)")
+
+    @app.cli.command('rebuild-attachment-refs')
+    def rebuild_attachment_refs():
+        """Recount attachment blob references and delete blobs no report uses."""
+        referenced, removed = attachments.rebuild_refs()
+        click.echo(f"{referenced} blob(s) referenced, {removed} orphaned blob(s) removed")
@@ -1,13 +1,52 @@
 from bson.objectid import ObjectId
 import datetime
+from pymongo import ReturnDocument
 from app import mongo
+from app.utils.search import TEXT_FIELDS, search_tokens
+from app.utils import attachments, pdf_cache, revisions
+from app.utils import stats as report_stats
+
+# Fields that decide which report_stats bucket a report is counted in
+STATS_PROJECTION = {"user_id": 1, "year": 1, "week": 1, "status": 1}
+
+# Fields a list request may select with ?fields=; `user` is the embedded
+# owner summary (it costs one users query per page)
+REPORT_FIELDS = (
+    'user_id', 'week', 'year', 'month', 'achievements', 'challenges', 'next_week_plan', 'status',
+    'attachments', 'tags', 'approvals', 'created_at', 'submitted_at', 'updated_at', 'rev', 'user'
+)
+
+# ?view=summary: what the list screens show. The preview and attachment count
+# are computed by Mongo, so the long text never leaves the server.
+SUMMARY_PREVIEW_CHARS = 140
+SUMMARY_PROJECTION = {
+    'user_id': 1, 'week': 1, 'year': 1, 'month': 1, 'status': 1, 'tags': 1,
+    'created_at': 1, 'submitted_at': 1, 'updated_at': 1,
+    'achievements_preview': {'$substrCP': [{'$ifNull': ['$achievements', '']}, 0, SUMMARY_PREVIEW_CHARS]},
+    'attachment_count': {'$size': {'$ifNull': ['$attachments', []]}},
+}
+SUMMARY_FIELDS = frozenset(SUMMARY_PROJECTION) | {'user'}
+
+# week, year and month are stored as integers whatever type the client sends
+PERIOD_FIELDS = ('week', 'year', 'month')
+
+# Attempts at a partial text edit while other text fields keep changing under it
+MODIFY_RETRIES = 5
+
+
+def to_int(value):
+    """Coerce numeric strings (e.g. '7') to int; anything else is returned unchanged"""
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return value
+
 
 class Report:
     def __init__(self, user_id, week, year, achievements, challenges, next_week_plan, month=None, status='draft', attachments=None, tags=None):
         self.user_id = user_id
-        self.week = week
-        self.year = year
-        self.month = month
+        self.week = to_int(week)
+        self.year = to_int(year)
+        self.month = to_int(month)
         self.achievements = achievements
         self.challenges = challenges
         self.next_week_plan = next_week_plan
@@ -21,8 +60,8 @@ class Report:
         self.created_at = datetime.datetime.utcnow()
         self.submitted_at = None
     
-    def save(self):
-        """Save report to database"""
+    def to_document(self):
+        """The document stored for this report (also used for bulk inserts)"""
         report_data = {
             "user_id": ObjectId(self.user_id),
             "week": self.week,
@@ -35,13 +74,22 @@ class Report:
             "attachments": self.attachments,
             "tags": self.tags,
             "approvals": self.approvals,
-            "created_at": self.created_at
+            "created_at": self.created_at,
+            # Incremented by every update; part of the report's ETag
+            "rev": 1
         }
+        report_data["search_tokens"] = search_tokens(report_data)
         
         if self.status == 'submitted':
             report_data["submitted_at"] = datetime.datetime.utcnow()
-        
+        return report_data
+
+    def save(self):
+        """Save report to database"""
+        report_data = self.to_document()
         result = mongo.db.reports.insert_one(report_data)
+        report_stats.record_insert(report_data, report_stats.department_of(self.user_id))
+        revisions.bump([self.user_id])
         return str(result.inserted_id)
     
     @staticmethod
@@ -54,54 +102,155 @@ class Report:
     def find_by_user(user_id):
         """Find all reports by user"""
         reports = mongo.db.reports.find({"user_id": ObjectId(user_id)}).sort("created_at", -1)
-        return [Report.to_dict(report) for report in reports]
+        return Report.to_dict_many(reports)
     
     @staticmethod
     def find_all():
         """Find all reports"""
         reports = mongo.db.reports.find({}).sort("created_at", -1)
-        return [Report.to_dict(report) for report in reports]
+        return Report.to_dict_many(reports)
     
     @staticmethod
-    def update(report_id, update_data):
-        """Update report"""
+    def modify(report_id, update_data, conditions=None, push=None, users=None):
+        """Update a report in one find_one_and_update round trip.
+
+        `update_data` is $set, `push` maps array fields to items to $push and
+        `conditions` adds preconditions (owner, status) to the filter. When the
+        report does not exist or a precondition fails nothing is written and
+        (None, None) is returned. Otherwise returns (before, after): the raw
+        pre-image and the converted updated report. `users` is an optional
+        owner map (see load_users).
+        """
         if 'status' in update_data and update_data['status'] == 'submitted':
             update_data['submitted_at'] = datetime.datetime.utcnow()
-        
-        mongo.db.reports.update_one(
-            {"_id": ObjectId(report_id)},
-            {"$set": update_data}
+
+        for f in PERIOD_FIELDS:
+            if f in update_data:
+                update_data[f] = to_int(update_data[f])
+
+        fields = dict(update_data)
+        fields['updated_at'] = datetime.datetime.utcnow()
+        query = {"_id": ObjectId(report_id), **(conditions or {})}
+        changed_text = [f for f in TEXT_FIELDS if f in fields]
+        kept_text = [f for f in TEXT_FIELDS if f not in fields]
+
+        update = {"$set": fields, "$inc": {"rev": 1}}
+        if push:
+            update["$push"] = {k: {"$each": list(v)} for k, v in push.items()}
+        for _ in range(MODIFY_RETRIES):
+            guard = {}
+            if changed_text:
+                # Tokens cover all text fields. The ones not being changed are
+                # read first and must still hold those values when we write,
+                # or a concurrent edit of another field would be left out
+                current = {}
+                if kept_text:
+                    current = mongo.db.reports.find_one(query, {f: 1 for f in kept_text})
+                    if current is None:
+                        return None, None
+                    guard = {f: current.get(f) for f in kept_text}
+                fields['search_tokens'] = search_tokens({**guard, **{f: fields[f] for f in changed_text}})
+            # The pre-image plus this $set/$push gives the updated document
+            # exactly, and the old stats bucket, without reading it again
+            before = mongo.db.reports.find_one_and_update(
+                {**query, **guard}, update, return_document=ReturnDocument.BEFORE
+            )
+            if before or not guard:
+                break
+        else:
+            raise RuntimeError("Report is being edited concurrently, try again")
+        if not before:
+            return None, None
+        pdf_cache.invalidate(report_id)
+
+        after = dict(before)
+        after.update(fields)
+        after['rev'] = before.get('rev', 0) + 1
+        for k, v in (push or {}).items():
+            after[k] = list(before.get(k) or []) + list(v)
+        after = Report.to_dict(after, users)
+        report_stats.record_change(before, after, before['user_id'])
+        revisions.bump([before['user_id']])
+        return before, after
+
+    @staticmethod
+    def update(report_id, update_data, conditions=None, push=None, users=None):
+        """Update report; returns the updated report or None (see modify)"""
+        return Report.modify(report_id, update_data, conditions, push, users)[1]
+
+    @staticmethod
+    def delete(report_id, conditions=None):
+        """Delete report; `conditions` adds preconditions (e.g. owner) to the filter"""
+        deleted = mongo.db.reports.find_one_and_delete(
+            {"_id": ObjectId(report_id), **(conditions or {})},
+            projection={**STATS_PROJECTION, "attachments.sha256": 1}
         )
-        return Report.find_by_id(report_id)
+        pdf_cache.invalidate(report_id)
+        if not deleted:
+            return False
+        attachments.release(deleted.get('attachments'))
+        report_stats.record_delete(deleted, report_stats.department_of(deleted['user_id']))
+        revisions.bump([deleted['user_id']])
+        return True
     
+    # Only the fields embedded as report['user'] are read from the users collection
+    USER_PROJECTION = {"name": 1, "email": 1, "username": 1, "department": 1}
+
     @staticmethod
-    def delete(report_id):
-        """Delete report"""
-        result = mongo.db.reports.delete_one({"_id": ObjectId(report_id)})
-        return result.deleted_count > 0
-    
+    def user_summary(user):
+        """Build the user sub-document embedded in a report"""
+        return {
+            'id': str(user['_id']),
+            'name': user['name'],
+            'email': user['email'],
+            'username': user.get('username'),
+            'department': user['department']
+        }
+
+    @staticmethod
+    def load_users(user_ids):
+        """Load the user summaries for the given ids with a single $in query"""
+        ids = {ObjectId(str(uid)) for uid in user_ids if uid}
+        if not ids:
+            return {}
+        users = mongo.db.users.find({"_id": {"$in": list(ids)}}, Report.USER_PROJECTION)
+        return {str(u['_id']): Report.user_summary(u) for u in users}
+
     @staticmethod
-    def to_dict(report):
-        """Convert report object to dictionary"""
+    def to_dict(report, users=None, fields=None):
+        """Convert report object to dictionary.
+
+        `users` is an optional map of user id -> user summary (see load_users);
+        when omitted the owner is looked up individually. `fields` is the set
+        of fields that were projected; defaults are only filled in for those,
+        and the owner only when it includes 'user'.
+        """
         if report:
             report['_id'] = str(report['_id'])
             report['user_id'] = str(report['user_id'])
-            # Ensure attachments field exists
-            report['attachments'] = report.get('attachments', [])
-            # Ensure tags and approvals exist
-            report['tags'] = report.get('tags', [])
-            report['approvals'] = report.get('approvals', [])
+            # Ensure attachments, tags and approvals exist (when they were read)
+            for key in ('attachments', 'tags', 'approvals'):
+                if fields is None or key in fields:
+                    report[key] = report.get(key, [])
+            # Internal search index field, never part of the API payload
+            report.pop('search_tokens', None)
             
             # Add user information
-            user = mongo.db.users.find_one({"_id": ObjectId(report['user_id'])})
-            if user:
-                report['user'] = {
-                    'id': str(user['_id']),
-                    'name': user['name'],
-                    'email': user['email'],
-                    'username': user.get('username'),
-                    'department': user['department']
-                }
+            if fields is None or 'user' in fields:
+                if users is None:
+                    users = Report.load_users([report['user_id']])
+                user = users.get(report['user_id'])
+                if user:
+                    report['user'] = user
             
             return report
-        return None
\ No newline at end of file
+        return None
+
+    @staticmethod
+    def to_dict_many(reports, fields=None):
+        """Convert an iterable of raw reports, hydrating all owners in one query"""
+        reports = list(reports)
+        users = {}
+        if fields is None or 'user' in fields:
+            users = Report.load_users(r.get('user_id') for r in reports)
+        return [Report.to_dict(r, users, fields) for r in reports]
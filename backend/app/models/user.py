@@ -50,6 +50,11 @@ class User:
         """Find user by ID"""
         return mongo.db.users.find_one({"_id": ObjectId(user_id)})
     
+    @staticmethod
+    def find_identity(user_id):
+        """Find user by ID without the password hash (for request authentication)"""
+        return mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+    
     @staticmethod
     def verify_password(stored_password, provided_password):
         """Verify password"""
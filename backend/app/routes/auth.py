@@ -6,9 +6,12 @@ import secrets
 import os
 from datetime import datetime, timedelta
 
+from app.models.report import Report
 from app.models.user import User
 from app.utils.decorators import token_required, admin_required
-from app.utils.notifications import send_email
+from app.utils.outbox import enqueue_email
+from app.utils.identity import identity_cache, invalidate_identity
+from app.utils import attachments, revisions, stats as report_stats
 from app import mongo
 
 auth_bp = Blueprint('auth', __name__)
@@ -106,9 +109,9 @@ def forgot_password():
             f"Click the link below to set a new password (valid for 1 hour):\n{reset_link}\n\n"
             f"If you did not request this, you can ignore this email."
         )
-        # Best-effort email; even if email fails, do not reveal details
+        # Best-effort email via the outbox; even if email fails, do not reveal details
         try:
-            send_email(user['email'], subject, body)
+            enqueue_email(user['email'], subject, body)
         except Exception:
             pass
 
@@ -144,6 +147,7 @@ def reset_password():
                 {"_id": ObjectId(user_id)},
                 {"$set": {"password": generate_password_hash(new_password)}}
             )
+            invalidate_identity(user_id)
             # Invalidate the token (mark used)
             mongo.db.password_resets.update_one({"_id": record["_id"]}, {"$set": {"used": True, "used_at": datetime.utcnow()}})
         except Exception as e:
@@ -217,7 +221,17 @@ def update_current_user(current_user):
             update_data['supervisor_email'] = data['supervisor_email']
 
         if update_data:
-            mongo.db.users.update_one({"_id": ObjectId(str(current_user['_id']))}, {"$set": update_data})
+            # The cached identity may predate a department change made through
+            # another worker, so the rollups move from the stored department
+            before = mongo.db.users.find_one_and_update(
+                {"_id": ObjectId(str(current_user['_id']))}, {"$set": update_data}, projection={'department': 1}
+            )
+            invalidate_identity(current_user['_id'])
+            if before and 'department' in update_data:
+                report_stats.move_user(current_user['_id'], before.get('department'), update_data['department'])
+            if set(Report.USER_PROJECTION).intersection(update_data):
+                # Embedded as report['user'] in report responses
+                revisions.bump([current_user['_id']])
 
         # return updated user
         user = User.find_by_id(str(current_user['_id']))
@@ -255,13 +269,26 @@ def delete_user(current_user, user_id):
 
         # delete user's reports for cleanliness
         try:
+            report_stats.remove_user(user_id, report_stats.department_of(user_id))
+            owned = list(mongo.db.reports.find({"user_id": ObjectId(user_id)}, {"attachments.sha256": 1}))
             mongo.db.reports.delete_many({"user_id": ObjectId(user_id)})
+            attachments.release([a for r in owned for a in r.get('attachments') or []])
+            revisions.bump([user_id])
         except Exception:
             pass
 
         ok = User.delete_by_id(user_id)
+        invalidate_identity(user_id)
         if not ok:
             return jsonify({"msg": "User not found"}), 404
         return jsonify({"msg": "User deleted"})
     except Exception as e:
-        return jsonify({"msg": str(e)}), 500
\ No newline at end of file
+        return jsonify({"msg": str(e)}), 500
+
+
+@auth_bp.route('/identity-cache', methods=['GET'])
+@token_required
+@admin_required
+def identity_cache_stats(current_user):
+    """Hit/miss counters of this process's identity cache"""
+    return jsonify(identity_cache.stats())
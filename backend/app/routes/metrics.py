@@ -0,0 +1,40 @@
+import os
+from flask import Blueprint, Response, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+from app.utils.identity import get_identity
+from app.utils import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def _access_denied():
+    """Callers must be admins. With METRICS_ALLOW_LOCAL=true, scrapers on the
+    same host need no token; leave it off behind a reverse proxy on that host,
+    whose requests all arrive from loopback."""
+    allow_local = os.getenv('METRICS_ALLOW_LOCAL', 'false').lower() == 'true'
+    if allow_local and request.remote_addr in LOCAL_ADDRESSES:
+        return None
+    try:
+        verify_jwt_in_request()
+    except Exception:
+        return jsonify({"msg": "Token is invalid"}), 401
+    user = get_identity(get_jwt_identity())
+    if not user or user.get('role') != 'admin':
+        return jsonify({"msg": "Admin access required"}), 403
+    return None
+
+
+@metrics_bp.route('', methods=['GET'])
+def get_metrics():
+    """Request, MongoDB command and identity cache metrics in Prometheus text format."""
+    denied = _access_denied()
+    if denied:
+        return denied
+    try:
+        body = metrics.render(metrics.collect())
+    except Exception as e:
+        return jsonify({"msg": str(e)}), 500
+    return Response(body, mimetype='text/plain; version=0.0.4')
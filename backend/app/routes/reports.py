@@ -1,69 +1,63 @@
-from flask import Blueprint, request, jsonify, current_app, send_from_directory, make_response, send_file
+from flask import Blueprint, request, jsonify, current_app, send_file, Response, stream_with_context
 import os
-import uuid
-import csv
-import io
+import tempfile
 import re
 import datetime
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
 from bson.objectid import ObjectId
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 
 from app.models.report import Report
 from app.models.user import User
 
 # Use package-relative imports from within `app` to help editors and runtime
 from app.utils.decorators import token_required, admin_required
-from app.utils.notifications import send_email, send_slack
-from app.utils.audit import log_action
+from app.utils.identity import get_identity
+from app.utils.outbox import enqueue_email, enqueue_slack
+from app.utils.reminders import start_run, recover_stale_runs, run_to_dict
+from app.utils.ingest import IngestError, ingest, iter_csv as iter_csv_rows, iter_json as iter_json_rows, iter_xlsx as iter_xlsx_rows
+from app.utils.reviews import ReviewError, bulk_review, parse_items as parse_review_items
+from app.utils.audit import audit_filters, diff as audit_diff, log_action, log_to_dict
+from app.utils.filters import report_filters, date_range, list_projection, FilterError
+from app.utils.pagination import wants_page, fetch_page, parse_limit, KEYSET_SORT, CursorError
+from app.utils.search import score_projection
+from app.utils.pdf import PdfDependencyError
+from app.utils import attachments, pdf_cache, revisions, thumbnails
+from app.utils.attachments import AttachmentRejected, AttachmentTooLarge
+from app.utils.uploads import parse_report_form
+from app.utils import stats as report_stats
+from app.utils.export_jobs import JOB_FORMATS, create_job, find_job, job_to_dict, artifact_path
+from app.utils.exports import XLSX_MAX_ROWS, XLSX_SPLIT_KEYS, export_query, iter_csv, iter_reports, write_xlsx
 from app.utils import decorators, notifications
 
 from app import mongo
 
 reports_bp = Blueprint('reports', __name__)
 
+def _report_body():
+    """Read a JSON or form report body; returns (data, stored attachment metadata).
+
+    Multipart bodies are parsed from the request stream with attachments
+    written to the blob store as they arrive (see app.utils.uploads).
+    """
+    if request.is_json:
+        return request.get_json(), []
+    if request.mimetype == 'multipart/form-data':
+        return parse_report_form(request)
+    return request.form, []
+
+
 @reports_bp.route('/', methods=['POST'])
 @token_required
 def create_report(current_user):
     try:
         # Support both JSON and multipart/form-data (for attachments)
-        if request.is_json:
-            data = request.get_json()
-        else:
-            data = request.form
-
-        # Handle attachments if provided
-        attachments_meta = []
-        files = request.files.getlist('attachments') if request.files else []
-        if files:
-            upload_dir = os.path.abspath(os.path.join(current_app.root_path, '..', 'uploads'))
-            os.makedirs(upload_dir, exist_ok=True)
-            for f in files:
-                if not f or f.filename == '':
-                    continue
-                # create a safe, unique filename
-                filename = f"{uuid.uuid4().hex}_{secure_filename(f.filename)}"
-                path = os.path.join(upload_dir, filename)
-                # attempt a simple size check (max 10MB)
-                try:
-                    f.seek(0, os.SEEK_END)
-                    size = f.tell()
-                    f.seek(0)
-                except Exception:
-                    size = None
-
-                MAX_BYTES = 10 * 1024 * 1024
-                if size and size > MAX_BYTES:
-                    return jsonify({"msg": f"File {f.filename} is too large (max 10MB)"}), 400
-
-                f.save(path)
-                meta = {
-                    'filename': filename,
-                    'original_name': f.filename,
-                    'mime': f.mimetype,
-                    'size': size,
-                    'url': f"/api/reports/uploads/{filename}"
-                }
-                attachments_meta.append(meta)
+        try:
+            data, attachments_meta = _report_body()
+        except AttachmentTooLarge as e:
+            return jsonify({"msg": str(e)}), 413
+        except AttachmentRejected as e:
+            return jsonify({"msg": str(e)}), 400
 
         # parse tags if present
         tags_list = []
@@ -88,6 +82,7 @@ def create_report(current_user):
         )
 
         report_id = report.save()
+        thumbnails.schedule(current_app._get_current_object(), attachments_meta)
 
         # audit log
         try:
@@ -99,53 +94,88 @@ def create_report(current_user):
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
+def _list_response(query):
+    """Run a report listing for the current request's sort/pagination args.
+
+    Text searches add a relevance `score` to each report; `sort=relevance`
+    orders by it (top `limit` hits only, cursors are not supported).
+    `view=summary` or `fields=` narrow the projection (see list_projection).
+    """
+    projection, fields = list_projection(request.args)
+    score = score_projection(query)
+    if score:
+        projection = {**(projection or {}), **score}
+
+    if request.args.get('sort') == 'relevance':
+        if not score:
+            raise FilterError("Relevance sort requires a text search (q)")
+        if request.args.get('cursor'):
+            raise CursorError("Cursors are not supported with relevance sort")
+        cursor = mongo.db.reports.find(query, projection).sort([('score', {'$meta': 'textScore'})] + KEYSET_SORT)
+        if wants_page(request.args):
+            cursor = cursor.limit(parse_limit(request.args))
+            return jsonify({"reports": Report.to_dict_many(cursor, fields), "next_cursor": None})
+        return jsonify(Report.to_dict_many(cursor, fields))
+
+    if wants_page(request.args):
+        if projection and fields is not None:
+            # The keyset cursor is built from created_at
+            projection.setdefault('created_at', 1)
+        page, next_cursor = fetch_page(mongo.db.reports, query, request.args, projection)
+        return jsonify({"reports": Report.to_dict_many(page, fields), "next_cursor": next_cursor})
+
+    cursor = mongo.db.reports.find(query, projection).sort(KEYSET_SORT)
+    return jsonify(Report.to_dict_many(cursor, fields))
+
+
+def _not_modified(etag):
+    """A 304 when If-None-Match already has `etag` (weak comparison, as RFC 9110
+    requires; proxies that compress mark tags weak), else None"""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _tagged(response, etag):
+    """Attach `etag` to a successful read; clients must revalidate before reuse"""
+    if response.status_code == 200:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _list_etag(key):
+    """ETag of a listing: revision `key` plus the path and query string"""
+    rev, = revisions.current(key)
+    return revisions.etag(key, rev, request.full_path)
+
 @reports_bp.route('/myreports', methods=['GET'])
 @token_required
 def get_user_reports(current_user):
+    """List the current user's reports.
+
+    Filters: q (text search; `match=regex` for regex), status, tags
+    (comma-separated), start, end. Passing `limit` and/or `cursor` switches to keyset pagination and returns
+    {"reports": [...], "next_cursor": ...} instead of a bare array. `view=summary` returns only
+    the list columns (with achievements_preview/attachment_count); `fields=` picks fields.
+    Responses carry an ETag from the user's report revision; a matching
+    If-None-Match gets a 304 without querying reports.
+    """
     try:
-        # Support filters: q (text), status, tags (comma-separated), start_date, end_date, department
-        q = request.args.get('q')
-        status = request.args.get('status')
-        tags = request.args.get('tags')
-        start = request.args.get('start')
-        end = request.args.get('end')
-
-        query = {"user_id": ObjectId(str(current_user['_id']))}
-
-        if status:
-            query['status'] = status
-
-        if tags:
-            tags_list = [t.strip() for t in tags.split(',') if t.strip()]
-            if tags_list:
-                query['tags'] = {"$in": tags_list}
-
-        if start or end:
-            date_q = {}
-            if start:
-                try:
-                    date_q['$gte'] = datetime.datetime.fromisoformat(start)
-                except Exception:
-                    pass
-            if end:
-                try:
-                    date_q['$lte'] = datetime.datetime.fromisoformat(end)
-                except Exception:
-                    pass
-            if date_q:
-                query['created_at'] = date_q
-
-        if q:
-            regex = {'$regex': q, '$options': 'i'}
-            query['$or'] = [
-                {'achievements': regex},
-                {'challenges': regex},
-                {'next_week_plan': regex}
-            ]
-
-        reports = mongo.db.reports.find(query).sort('created_at', -1)
-        reports = [Report.to_dict(r) for r in reports]
-        return jsonify(reports)
+        etag = _list_etag(revisions.user_key(current_user['_id']))
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+
+        query = report_filters(request.args)
+        query['user_id'] = ObjectId(str(current_user['_id']))
+
+        return _tagged(_list_response(query), etag)
+    except (FilterError, CursorError) as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
@@ -154,111 +184,116 @@ def get_user_reports(current_user):
 @token_required
 @admin_required
 def get_all_reports(current_user):
+    """List all reports (admin).
+
+    Filters: q, status, tags, start, end, department, user_id. Supports the
+    same `limit`/`cursor` keyset pagination as /myreports, and ETags from the
+    global report revision.
+    """
     try:
-        # Admin-level filters: q, status, tags, start, end, department
-        q = request.args.get('q')
-        status = request.args.get('status')
-        tags = request.args.get('tags')
-        start = request.args.get('start')
-        end = request.args.get('end')
-        department = request.args.get('department')
-        user_id = request.args.get('user_id')
-
-        query = {}
-
-        if status:
-            query['status'] = status
-
-        if tags:
-            tags_list = [t.strip() for t in tags.split(',') if t.strip()]
-            if tags_list:
-                query['tags'] = {'$in': tags_list}
-
-        if start or end:
-            date_q = {}
-            if start:
-                try:
-                    date_q['$gte'] = datetime.datetime.fromisoformat(start)
-                except Exception:
-                    pass
-            if end:
-                try:
-                    date_q['$lte'] = datetime.datetime.fromisoformat(end)
-                except Exception:
-                    pass
-            if date_q:
-                query['created_at'] = date_q
-
-        if department:
-            # find users in department
-            user_ids = [u['_id'] for u in mongo.db.users.find({'department': department}, {'_id': 1})]
-            if user_ids:
-                query['user_id'] = {'$in': user_ids}
-
-        # filter by specific user id if provided
-        if user_id:
-            try:
-                query['user_id'] = ObjectId(user_id)
-            except Exception:
-                return jsonify({"msg": "Invalid user_id"}), 400
-
-        if q:
-            regex = {'$regex': q, '$options': 'i'}
-            query['$or'] = [
-                {'achievements': regex},
-                {'challenges': regex},
-                {'next_week_plan': regex}
-            ]
-
-        cursor = mongo.db.reports.find(query).sort('created_at', -1)
-        reports = [Report.to_dict(r) for r in cursor]
-        return jsonify(reports)
+        etag = _list_etag(revisions.GLOBAL_KEY)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+
+        query = report_filters(request.args, admin=True)
+
+        return _tagged(_list_response(query), etag)
+    except (FilterError, CursorError) as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
 @reports_bp.route('/<report_id>', methods=['GET'])
 @token_required
 def get_report(current_user, report_id):
+    """Return one report. The ETag combines the report's rev with its owner's
+    revision (profile changes show up in report['user']); both are read before
+    the report itself, so a matching If-None-Match gets a 304 straight away."""
     try:
-        report = Report.find_by_id(report_id)
-        if not report:
+        head = mongo.db.reports.find_one({"_id": ObjectId(report_id)}, {"user_id": 1, "rev": 1})
+        if not head:
             return jsonify({"msg": "Report not found"}), 404
         
         # Check if user owns the report or is admin
-        if report['user_id'] != str(current_user['_id']) and current_user.get('role') != 'admin':
+        if str(head['user_id']) != str(current_user['_id']) and current_user.get('role') != 'admin':
             return jsonify({"msg": "Not authorized"}), 401
-        
-        return jsonify(report)
+
+        owner_rev, = revisions.current(revisions.user_key(head['user_id']))
+        etag = revisions.etag(report_id, head.get('rev', 0), owner_rev)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+
+        report = Report.find_by_id(report_id)
+        if not report:
+            return jsonify({"msg": "Report not found"}), 404
+        return _tagged(jsonify(report), etag)
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
 
+def _upload_access_denied(filename):
+    """With UPLOADS_REQUIRE_AUTH=true, only admins and owners of a report with
+    the attachment may fetch it. The token may be sent as ?jwt= because the
+    UI loads attachments through <img src>."""
+    try:
+        verify_jwt_in_request(locations=['headers', 'query_string'])
+    except Exception:
+        return jsonify({"msg": "Token is invalid"}), 401
+    user = get_identity(get_jwt_identity())
+    if not user:
+        return jsonify({"msg": "Token is valid but user not found"}), 401
+    if user.get('role') == 'admin':
+        return None
+    owns = mongo.db.reports.find_one({"user_id": ObjectId(str(user['_id'])), "attachments.filename": filename}, {"_id": 1})
+    if not owns:
+        return jsonify({"msg": "Not authorized"}), 403
+    return None
+
+
 @reports_bp.route('/uploads/<filename>', methods=['GET'])
 def serve_upload(filename):
-    """Serve uploaded files. Files are stored in backend/uploads."""
+    """Serve uploaded files: content-addressed blobs by sha256, older uploads by name."""
+    require_auth = os.getenv('UPLOADS_REQUIRE_AUTH', 'false').lower() == 'true'
+    if require_auth:
+        denied = _upload_access_denied(filename)
+        if denied:
+            return denied
     try:
-        upload_dir = os.path.abspath(os.path.join(current_app.root_path, '..', 'uploads'))
-        return send_from_directory(upload_dir, filename)
-    except Exception as e:
+        return attachments.send_upload(filename, private=require_auth)
+    except RequestedRangeNotSatisfiable as e:
+        # 416 with Content-Range: bytes */<size>
+        return e
+    except Exception:
+        return jsonify({"msg": "File not found"}), 404
+
+@reports_bp.route('/thumbnails/<name>', methods=['GET'])
+def serve_thumbnail(name):
+    """Serve attachment previews (<sha256>.webp/.png); cached for a year."""
+    require_auth = os.getenv('UPLOADS_REQUIRE_AUTH', 'false').lower() == 'true'
+    if require_auth:
+        denied = _upload_access_denied(os.path.splitext(name)[0])
+        if denied:
+            return denied
+    try:
+        return attachments.send_thumbnail(name, private=require_auth)
+    except RequestedRangeNotSatisfiable as e:
+        return e
+    except Exception:
         return jsonify({"msg": "File not found"}), 404
 
 @reports_bp.route('/<report_id>', methods=['PUT'])
 @token_required
 def update_report(current_user, report_id):
     try:
-        report = Report.find_by_id(report_id)
-        if not report:
-            return jsonify({"msg": "Report not found"}), 404
-        
-        # Check if user owns the report or is admin
-        if report['user_id'] != str(current_user['_id']) and current_user.get('role') != 'admin':
-            return jsonify({"msg": "Not authorized"}), 401
-        
         # Support JSON or multipart/form-data
-        if request.is_json:
-            body = request.get_json()
-        else:
-            body = request.form
+        try:
+            body, new_meta = _report_body()
+        except AttachmentTooLarge as e:
+            return jsonify({"msg": str(e)}), 413
+        except AttachmentRejected as e:
+            return jsonify({"msg": str(e)}), 400
 
         # Update fields
         update_data = {}
@@ -287,46 +322,31 @@ def update_report(current_user, report_id):
                 tags_list = []
             update_data['tags'] = tags_list
 
-        # Handle new attachments uploaded during update: append to existing list
-        files = request.files.getlist('attachments') if request.files else []
-        if files:
-            upload_dir = os.path.abspath(os.path.join(current_app.root_path, '..', 'uploads'))
-            os.makedirs(upload_dir, exist_ok=True)
-            new_meta = []
-            for f in files:
-                if not f or f.filename == '':
-                    continue
-                filename = f"{uuid.uuid4().hex}_{secure_filename(f.filename)}"
-                path = os.path.join(upload_dir, filename)
-                try:
-                    f.seek(0, os.SEEK_END)
-                    size = f.tell()
-                    f.seek(0)
-                except Exception:
-                    size = None
-                MAX_BYTES = 10 * 1024 * 1024
-                if size and size > MAX_BYTES:
-                    return jsonify({"msg": f"File {f.filename} is too large (max 10MB)"}), 400
-                f.save(path)
-                meta = {
-                    'filename': filename,
-                    'original_name': f.filename,
-                    'mime': f.mimetype,
-                    'size': size,
-                    'url': f"/api/reports/uploads/{filename}"
-                }
-                new_meta.append(meta)
-
-            # combine with existing attachments
-            existing_attachments = report.get('attachments', []) or []
-            update_data['attachments'] = existing_attachments + new_meta
-
-        updated_report = Report.update(report_id, update_data)
+        # Only the owner or an admin may update; checked in the update filter
+        users = None
+        conditions = None
+        if current_user.get('role') != 'admin':
+            conditions = {"user_id": ObjectId(str(current_user['_id']))}
+            users = {str(current_user['_id']): Report.user_summary(current_user)}
+        # New attachments uploaded during update are appended to the existing list
+        push = {'attachments': new_meta} if new_meta else None
+
+        before, updated_report = Report.modify(report_id, update_data, conditions, push, users)
+        if not updated_report:
+            attachments.release(new_meta)
+            if mongo.db.reports.count_documents({"_id": ObjectId(report_id)}, limit=1):
+                return jsonify({"msg": "Not authorized"}), 401
+            return jsonify({"msg": "Report not found"}), 404
+
+        thumbnails.schedule(current_app._get_current_object(), new_meta)
         try:
-            log_action(str(current_user['_id']), 'update', report_id, update_data)
+            details = audit_diff(before, update_data)
+            if new_meta:
+                details['attachments'] = {'added': [m['original_name'] for m in new_meta]}
+            log_action(str(current_user['_id']), 'update', report_id, details)
         except Exception:
             pass
-        return jsonify(Report.to_dict(updated_report))
+        return jsonify(updated_report)
 
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
@@ -335,22 +355,20 @@ def update_report(current_user, report_id):
 @token_required
 def delete_report(current_user, report_id):
     try:
-        report = Report.find_by_id(report_id)
-        if not report:
-            return jsonify({"msg": "Report not found"}), 404
-        
-        # Check if user owns the report or is admin
-        if report['user_id'] != str(current_user['_id']) and current_user.get('role') != 'admin':
-            return jsonify({"msg": "Not authorized"}), 401
-        
-        if Report.delete(report_id):
+        # Only the owner or an admin may delete; checked in the delete filter
+        conditions = None
+        if current_user.get('role') != 'admin':
+            conditions = {"user_id": ObjectId(str(current_user['_id']))}
+
+        if Report.delete(report_id, conditions):
             try:
                 log_action(str(current_user['_id']), 'delete', report_id, {})
             except Exception:
                 pass
             return jsonify({"msg": "Report removed"})
-        else:
-            return jsonify({"msg": "Failed to delete report"}), 500
+        if mongo.db.reports.count_documents({"_id": ObjectId(report_id)}, limit=1):
+            return jsonify({"msg": "Not authorized"}), 401
+        return jsonify({"msg": "Report not found"}), 404
             
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
@@ -362,6 +380,11 @@ def export_reports(current_user):
     """Export reports as CSV or XLSX. Admins can export all reports by passing ?all=true
     Query params:
       - format: csv (default) or xlsx
+      - split_by (xlsx): department or year, one sheet per group
+      - max_rows (xlsx): rows per sheet before continuing on a new one
+      - the list filters (q, status, tags, start, end; department/user_id with all=true)
+    CSV is streamed while the cursor is read and XLSX is written in write-only
+    mode to a temp file, so memory stays bounded by the batch size.
     """
     try:
         export_all = request.args.get('all', 'false').lower() == 'true'
@@ -369,79 +392,118 @@ def export_reports(current_user):
             return jsonify({"msg": "Not authorized"}), 401
 
         fmt = (request.args.get('format') or 'csv').lower()
-
-        if export_all:
-            reports = Report.find_all()
-        else:
-            reports = Report.find_by_user(str(current_user['_id']))
-
-        headers = ['id', 'user_id', 'user_name', 'user_email', 'week', 'year', 'month', 'status', 'created_at', 'submitted_at', 'achievements', 'challenges', 'next_week_plan', 'attachments']
+        query = export_query(current_user, request.args, export_all)
 
         if fmt == 'xlsx':
             try:
-                from openpyxl import Workbook  # type: ignore[import]
+                import openpyxl  # type: ignore[import]  # noqa: F401
             except Exception:
                 return jsonify({"msg": "XLSX export dependency missing (openpyxl)."}), 500
 
-            wb = Workbook()
-            ws = wb.active
-            ws.title = 'Reports'
-            ws.append(headers)
-
-            for r in reports:
-                attachments_field = ';'.join([a.get('original_name', a.get('filename')) for a in (r.get('attachments') or [])])
-                row = [
-                    r.get('_id'),
-                    r.get('user_id'),
-                    r.get('user', {}).get('name'),
-                    r.get('user', {}).get('email'),
-                    r.get('week'),
-                    r.get('year'),
-                    r.get('month'),
-                    r.get('status'),
-                    r.get('created_at'),
-                    r.get('submitted_at'),
-                    r.get('achievements'),
-                    r.get('challenges'),
-                    r.get('next_week_plan'),
-                    attachments_field
-                ]
-                ws.append(row)
-
-            bio = io.BytesIO()
-            wb.save(bio)
-            bio.seek(0)
-            return send_file(bio, as_attachment=True, download_name='reports.xlsx', mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-
-        # default CSV
-        si = io.StringIO()
-        writer = csv.writer(si)
-        writer.writerow(headers)
-
-        for r in reports:
-            attachments_field = ';'.join([a.get('original_name', a.get('filename')) for a in (r.get('attachments') or [])])
-            row = [
-                r.get('_id'),
-                r.get('user_id'),
-                r.get('user', {}).get('name'),
-                r.get('user', {}).get('email'),
-                r.get('week'),
-                r.get('year'),
-                r.get('month'),
-                r.get('status'),
-                r.get('created_at'),
-                r.get('submitted_at'),
-                r.get('achievements'),
-                r.get('challenges'),
-                r.get('next_week_plan'),
-                attachments_field
-            ]
-            writer.writerow(row)
-
-        output = make_response(si.getvalue())
+            split_by = request.args.get('split_by')
+            if split_by and split_by not in XLSX_SPLIT_KEYS:
+                return jsonify({"msg": "split_by must be one of: " + ', '.join(XLSX_SPLIT_KEYS)}), 400
+            try:
+                max_rows = min(int(request.args.get('max_rows', XLSX_MAX_ROWS)), XLSX_MAX_ROWS)
+            except ValueError:
+                return jsonify({"msg": "Invalid max_rows"}), 400
+            if max_rows < 1:
+                return jsonify({"msg": "Invalid max_rows"}), 400
+
+            # Spool to a temp file rather than RAM. The file is unlinked as soon as
+            # it is reopened; the open handle keeps it readable until the response
+            # is closed, at which point the disk space is released.
+            fd, path = tempfile.mkstemp(suffix='.xlsx')
+            os.close(fd)
+            try:
+                write_xlsx(iter_reports(query), path, split_by=split_by, max_rows=max_rows)
+                spooled = open(path, 'rb')
+            finally:
+                os.remove(path)
+            return send_file(spooled, as_attachment=True, download_name='reports.xlsx', mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+        # default CSV, streamed
+        output = Response(stream_with_context(iter_csv(iter_reports(query))), mimetype='text/csv')
         output.headers["Content-Disposition"] = "attachment; filename=reports.csv"
-        output.headers["Content-type"] = "text/csv"
         return output
+    except FilterError as e:
+        return jsonify({"msg": str(e)}), 400
+    except Exception as e:
+        return jsonify({"msg": str(e)}), 500
+
+
+@reports_bp.route('/exports', methods=['POST'])
+@token_required
+def create_export_job(current_user):
+    """Queue a background export and return its job id.
+    Body JSON: { "format": "csv" | "xlsx" | "pdf", "all": false, ...list filters }
+    `pdf` produces a zip with one PDF per report. Poll GET /exports/<id> for
+    progress and fetch the artifact from /exports/<id>/download when done.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        fmt = (data.get('format') or 'csv').lower()
+        if fmt not in JOB_FORMATS:
+            return jsonify({"msg": "format must be one of: " + ', '.join(JOB_FORMATS)}), 400
+
+        export_all = str(data.get('all', 'false')).lower() == 'true'
+        if export_all and current_user.get('role') != 'admin':
+            return jsonify({"msg": "Not authorized"}), 401
+
+        split_by = data.get('split_by')
+        if split_by and split_by not in XLSX_SPLIT_KEYS:
+            return jsonify({"msg": "split_by must be one of: " + ', '.join(XLSX_SPLIT_KEYS)}), 400
+        if data.get('max_rows') is not None:
+            try:
+                if int(data['max_rows']) < 1:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return jsonify({"msg": "Invalid max_rows"}), 400
+
+        # Validate filters now rather than failing inside the worker
+        export_query(current_user, data, export_all)
+
+        job = create_job(current_user, fmt, export_all, data)
+        return jsonify(job_to_dict(job)), 202
+    except FilterError as e:
+        return jsonify({"msg": str(e)}), 400
+    except Exception as e:
+        return jsonify({"msg": str(e)}), 500
+
+
+@reports_bp.route('/exports/<job_id>', methods=['GET'])
+@token_required
+def get_export_job(current_user, job_id):
+    """Return the status and progress (rows_done/rows_total) of an export job."""
+    try:
+        job = find_job(job_id)
+        if not job:
+            return jsonify({"msg": "Export job not found"}), 404
+        if str(job['user_id']) != str(current_user['_id']) and current_user.get('role') != 'admin':
+            return jsonify({"msg": "Not authorized"}), 401
+        return jsonify(job_to_dict(job))
+    except Exception as e:
+        return jsonify({"msg": str(e)}), 500
+
+
+@reports_bp.route('/exports/<job_id>/download', methods=['GET'])
+@token_required
+def download_export_job(current_user, job_id):
+    """Download the artifact of a finished export job."""
+    try:
+        job = find_job(job_id)
+        if not job:
+            return jsonify({"msg": "Export job not found"}), 404
+        if str(job['user_id']) != str(current_user['_id']) and current_user.get('role') != 'admin':
+            return jsonify({"msg": "Not authorized"}), 401
+        if job['status'] != 'done':
+            return jsonify({"msg": f"Export is {job['status']}"}), 409
+
+        path = artifact_path(job)
+        if not os.path.isfile(path) or (job.get('expires_at') and job['expires_at'] < datetime.datetime.utcnow()):
+            return jsonify({"msg": "Export has expired"}), 410
+        ext, mimetype = JOB_FORMATS[job['format']]
+        return send_file(path, as_attachment=True, download_name=f"reports.{ext}", mimetype=mimetype)
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
@@ -449,7 +511,7 @@ def export_reports(current_user):
 @reports_bp.route('/<report_id>/pdf', methods=['GET'])
 @token_required
 def download_report_pdf(current_user, report_id):
-    """Generate a simple PDF for a report and return it as a download."""
+    """Return the PDF rendering of a report as a download (cached per report version)."""
     try:
         report = Report.find_by_id(report_id)
         if not report:
@@ -459,94 +521,19 @@ def download_report_pdf(current_user, report_id):
         if report['user_id'] != str(current_user['_id']) and current_user.get('role') != 'admin':
             return jsonify({"msg": "Not authorized"}), 401
 
-        # Generate PDF in-memory
+        # Renders are cached on disk under a content address that doubles as
+        # the ETag, so a revalidating browser gets a 304 without any rendering.
+        etag = pdf_cache.cache_key(report)
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
         try:
-            # Pylance sometimes cannot resolve binary-only packages in the editor
-            # even when they are installed at runtime. Silence the unresolved-import
-            # diagnostic while keeping the runtime import behavior.
-            from reportlab.lib.pagesizes import letter  # type: ignore[import]
-            from reportlab.pdfgen import canvas  # type: ignore[import]
-        except Exception:
-            return jsonify({"msg": "PDF generation dependencies missing (reportlab)."}), 500
-
-        # Use Platypus for a clean layout with tables
-        from reportlab.lib import colors  # type: ignore[import]
-        from reportlab.lib.styles import getSampleStyleSheet  # type: ignore[import]
-        from reportlab.platypus import SimpleDocTemplate, Image as RLImage, Paragraph, Spacer, Table, TableStyle  # type: ignore[import]
-
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, leftMargin=50, rightMargin=50, topMargin=50, bottomMargin=50)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        BRAND_COLOR = colors.HexColor('#6366F1')
-
-        # Logo centered
-        logo_path = os.getenv('PDF_LOGO_PATH', os.path.abspath(os.path.join(current_app.root_path, 'static', 'logo.png')))
-        if os.path.isfile(logo_path):
-            img = RLImage(logo_path, width=120, height=40, kind='proportional')
-            img.hAlign = 'LEFT'
-            story.append(img)
-            story.append(Spacer(1, 8))
-
-        # Title
-        title_style = styles['Title']
-        title_style.textColor = BRAND_COLOR
-        title = Paragraph(f"<b>Weekly Report — Week {report.get('week')} {report.get('year')}</b>", title_style)
-        story.append(title)
-        
-        story.append(Spacer(1, 6))
-
-        # Info tables
-        user = report.get('user', {})
-        info_data = [
-            ['Report ID', str(report.get('_id'))],
-            ['Name', user.get('name', '')],
-            ['Username', user.get('username', '-')],
-            ['Email', user.get('email', '')],
-            ['Department', user.get('department', '-')],
-            ['Status', report.get('status')],
-            ['Created', str(report.get('created_at'))],
-            ['Submitted', str(report.get('submitted_at') or '-')],
-        ]
-        table = Table(info_data, colWidths=[110, 380])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), BRAND_COLOR),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-            ('TEXTCOLOR', (0,1), (-1,-1), colors.black),
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-            ('FONTSIZE', (0,0), (-1,-1), 9),
-            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-            ('BACKGROUND', (0,1), (0,-1), colors.HexColor('#F3F4F6')),
-        ]))
-        story.append(table)
-        story.append(Spacer(1, 10))
-
-        # Long text sections as bordered tables
-        def section_table(title: str, text: str):
-            para = Paragraph(text.replace('\n', '<br/>') if text else '-', styles['BodyText'])
-            t = Table([[Paragraph(f'<b>{title}</b>', styles['BodyText'])], [para]], colWidths=[490])
-            t.setStyle(TableStyle([
-                ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-                ('BACKGROUND', (0,0), (-1,0), BRAND_COLOR),
-                ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-                ('FONTSIZE', (0,0), (-1,-1), 9),
-            ]))
-            return t
-
-        story.append(section_table('Achievements', report.get('achievements')))
-        story.append(Spacer(1, 6))
-        story.append(section_table('Challenges', report.get('challenges')))
-        story.append(Spacer(1, 6))
-        story.append(section_table("Next Week's Plan", report.get('next_week_plan')))
-        story.append(Spacer(1, 6))
-        tags_str = ', '.join(report.get('tags') or [])
-        story.append(section_table('Tags', tags_str))
-
-        doc.build(story)
-        buffer.seek(0)
-        return send_file(buffer, as_attachment=True, download_name=f"report_{report_id}.pdf", mimetype='application/pdf')
+            pdf = pdf_cache.open_pdf(report, etag)
+        except PdfDependencyError as e:
+            return jsonify({"msg": str(e)}), 500
+        return send_file(pdf, as_attachment=True, download_name=f"report_{report_id}.pdf", mimetype='application/pdf',
+                         etag=etag, last_modified=pdf_cache.version_stamp(report))
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
@@ -555,95 +542,128 @@ def download_report_pdf(current_user, report_id):
 @token_required
 @admin_required
 def reports_stats(current_user):
-    """Return aggregated stats for admin dashboard: weekly counts, department counts, overall completion."""
+    """Return aggregated stats for admin dashboard: weekly counts, department counts, overall completion.
+    Read from the report_stats rollups maintained by the report write paths;
+    tagged with the global report revision."""
     try:
-        # Weekly aggregation: group by year and week
-        pipeline_weekly = [
-            {
-                "$group": {
-                    "_id": {"year": "$year", "week": "$week"},
-                    "total": {"$sum": 1},
-                    "submitted": {"$sum": {"$cond": [{"$eq": ["$status", "submitted"]}, 1, 0]}}
-                }
-            },
-            {"$sort": {"_id.year": 1, "_id.week": 1}}
-        ]
+        rev, = revisions.current(revisions.GLOBAL_KEY)
+        etag = revisions.etag('stats', rev)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        return _tagged(jsonify(report_stats.summary()), etag)
+    except Exception as e:
+        return jsonify({"msg": str(e)}), 500
+
 
-        weekly = list(mongo.db.reports.aggregate(pipeline_weekly))
-        weekly_formatted = [{
-            "year": w['_id']['year'],
-            "week": w['_id']['week'],
-            "total": w['total'],
-            "submitted": w['submitted']
-        } for w in weekly]
-
-        # Department aggregation: lookup user and group by department
-        pipeline_dept = [
-            {
-                "$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "_id",
-                    "as": "user"
-                }
-            },
-            {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}},
-            {"$group": {
-                "_id": "$user.department",
-                "total": {"$sum": 1},
-                "submitted": {"$sum": {"$cond": [{"$eq": ["$status", "submitted"]}, 1, 0]}}
+TEAM_SORT_FIELDS = ('name', 'total_reports', 'submitted_reports', 'approved_reports', 'on_time_rate', 'last_submission')
+
+
+@reports_bp.route('/team', methods=['GET'])
+@token_required
+@admin_required
+def team_aggregates(current_user):
+    """Return per-user aggregates in one aggregation.
+    Query params: department, start, end (report created_at range),
+    sort (one of TEAM_SORT_FIELDS, default total_reports), order (asc|desc),
+    page (1-based) and limit.
+    A report is on time when submitted_at falls on or before the end
+    (Sunday 23:59:59 UTC) of the ISO week it reports on.
+    """
+    try:
+        department = request.args.get('department')
+        sort_field = request.args.get('sort', 'total_reports')
+        if sort_field not in TEAM_SORT_FIELDS:
+            return jsonify({"msg": "sort must be one of: " + ', '.join(TEAM_SORT_FIELDS)}), 400
+        direction = 1 if request.args.get('order', 'desc').lower() == 'asc' else -1
+        limit = parse_limit(request.args)
+        try:
+            page = max(1, int(request.args.get('page', 1)))
+        except ValueError:
+            return jsonify({"msg": "Invalid page"}), 400
+
+        report_match = {'$expr': {'$eq': ['$user_id', '$$uid']}}
+        created = date_range(request.args)
+        if created:
+            report_match['created_at'] = created
+
+        def count_status(status):
+            return {'$sum': {'$cond': [{'$eq': ['$status', status]}, 1, 0]}}
+
+        def as_int(field):
+            return {'$convert': {'input': field, 'to': 'int', 'onError': None, 'onNull': None}}
+
+        has_submission = {'$gt': ['$submitted_at', None]}
+        pipeline = [
+            {'$match': {'department': department} if department else {}},
+            {'$project': {'name': 1, 'email': 1, 'username': 1, 'department': 1}},
+            {'$lookup': {
+                'from': 'reports',
+                'let': {'uid': '$_id'},
+                'pipeline': [
+                    {'$match': report_match},
+                    {'$project': {
+                        'status': 1,
+                        'submitted_at': 1,
+                        'deadline': {'$dateFromParts': {
+                            'isoWeekYear': as_int('$year'), 'isoWeek': as_int('$week'),
+                            'isoDayOfWeek': 7, 'hour': 23, 'minute': 59, 'second': 59
+                        }}
+                    }},
+                    {'$group': {
+                        '_id': None,
+                        'total': {'$sum': 1},
+                        'draft': count_status('draft'),
+                        'submitted': count_status('submitted'),
+                        'approved': count_status('approved'),
+                        'rejected': count_status('rejected'),
+                        'with_submission': {'$sum': {'$cond': [has_submission, 1, 0]}},
+                        'on_time': {'$sum': {'$cond': [
+                            {'$and': [has_submission, {'$gt': ['$deadline', None]}, {'$lte': ['$submitted_at', '$deadline']}]}, 1, 0
+                        ]}},
+                        'last_submission': {'$max': '$submitted_at'}
+                    }}
+                ],
+                'as': 'agg'
             }},
-            {"$sort": {"total": -1}}
+            {'$unwind': {'path': '$agg', 'preserveNullAndEmptyArrays': True}},
+            {'$project': {
+                '_id': 0,
+                'user_id': {'$toString': '$_id'},
+                'name': 1, 'email': 1, 'username': 1, 'department': 1,
+                'total_reports': {'$ifNull': ['$agg.total', 0]},
+                'draft_reports': {'$ifNull': ['$agg.draft', 0]},
+                'submitted_reports': {'$ifNull': ['$agg.submitted', 0]},
+                'approved_reports': {'$ifNull': ['$agg.approved', 0]},
+                'rejected_reports': {'$ifNull': ['$agg.rejected', 0]},
+                'last_submission': {'$ifNull': ['$agg.last_submission', None]},
+                'on_time_rate': {'$cond': [
+                    {'$gt': [{'$ifNull': ['$agg.with_submission', 0]}, 0]},
+                    {'$multiply': [{'$divide': ['$agg.on_time', '$agg.with_submission']}, 100]},
+                    None
+                ]}
+            }},
+            {'$sort': {sort_field: direction, 'user_id': 1}},
+            {'$facet': {
+                'users': [{'$skip': (page - 1) * limit}, {'$limit': limit}],
+                'total': [{'$count': 'n'}]
+            }}
         ]
 
-        dept = list(mongo.db.reports.aggregate(pipeline_dept))
-        dept_formatted = [{
-            "department": d['_id'] or 'Unknown',
-            "total": d['total'],
-            "submitted": d['submitted']
-        } for d in dept]
-
-        # Overall
-        total = mongo.db.reports.count_documents({})
-        submitted = mongo.db.reports.count_documents({"status": "submitted"})
-        overall = {
-            "total": total,
-            "submitted": submitted,
-            "completion_rate": (submitted / total * 100) if total > 0 else 0
-        }
-
-        return jsonify({"weekly": weekly_formatted, "departments": dept_formatted, "overall": overall})
+        result = next(mongo.db.users.aggregate(pipeline), {'users': [], 'total': []})
+        total = result['total'][0]['n'] if result['total'] else 0
+        return jsonify({'users': result['users'], 'total': total, 'page': page, 'limit': limit})
+    except CursorError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
 
-    @reports_bp.route('/team', methods=['GET'])
-    @token_required
-    @admin_required
-    def team_aggregates(current_user):
-        """Return per-user aggregates optionally filtered by department."""
-        try:
-            department = request.args.get('department')
-            users_cursor = mongo.db.users.find({}) if not department else mongo.db.users.find({'department': department})
-            users = list(users_cursor)
-            results = []
-            for u in users:
-                uid = u['_id']
-                total = mongo.db.reports.count_documents({'user_id': uid})
-                submitted = mongo.db.reports.count_documents({'user_id': uid, 'status': 'submitted'})
-                results.append({
-                    'user_id': str(uid),
-                    'name': u.get('name'),
-                    'email': u.get('email'),
-                    'department': u.get('department'),
-                    'total_reports': total,
-                    'submitted_reports': submitted
-                })
-            # sort by total_reports desc
-            results.sort(key=lambda r: r['total_reports'], reverse=True)
-            return jsonify(results)
-        except Exception as e:
-            return jsonify({"msg": str(e)}), 500
+def _review_conflict(report_id, msg):
+    """Response when a review's status precondition did not match"""
+    if not mongo.db.reports.count_documents({"_id": ObjectId(report_id)}, limit=1):
+        return jsonify({"msg": "Report not found"}), 404
+    return jsonify({"msg": msg}), 400
 
 
 @reports_bp.route('/<report_id>/approve', methods=['POST'])
@@ -652,13 +672,6 @@ def reports_stats(current_user):
 def approve_report(current_user, report_id):
     """Approve a submitted report with an optional comment."""
     try:
-        report = Report.find_by_id(report_id)
-        if not report:
-            return jsonify({"msg": "Report not found"}), 404
-
-        if report.get('status') != 'submitted':
-            return jsonify({"msg": "Only submitted reports can be approved"}), 400
-
         data = request.get_json(silent=True) or {}
         comment = data.get('comment')
 
@@ -669,12 +682,11 @@ def approve_report(current_user, report_id):
             'at': datetime.datetime.utcnow()
         }
 
-        # Append to approvals and set status
-        update = {
-            'status': 'approved',
-            'approvals': (report.get('approvals') or []) + [approval]
-        }
-        updated = Report.update(report_id, update)
+        # Status precondition and $push in one atomic write: of two concurrent
+        # reviewers only the first succeeds, and no approval entry is lost
+        report = Report.update(report_id, {'status': 'approved'}, {'status': 'submitted'}, {'approvals': [approval]})
+        if not report:
+            return _review_conflict(report_id, "Only submitted reports can be approved")
 
         try:
             log_action(str(current_user['_id']), 'approve', report_id, {'comment': comment})
@@ -688,13 +700,13 @@ def approve_report(current_user, report_id):
             if owner_email:
                 subject = f"Your report for week {report.get('week')} has been approved"
                 body = f"Hi {owner_name or ''},\n\nYour report (week {report.get('week')}, {report.get('year')}) was approved by {current_user.get('name')}" + (f"\n\nComment: {comment}" if comment else "")
-                send_email(owner_email, subject, body)
+                enqueue_email(owner_email, subject, body)
             # slack
-            send_slack(f"Report {report.get('_id')} approved by {current_user.get('name')}")
+            enqueue_slack(f"Report {report.get('_id')} approved by {current_user.get('name')}")
         except Exception:
             pass
 
-        return jsonify(updated)
+        return jsonify(report)
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
@@ -705,13 +717,6 @@ def approve_report(current_user, report_id):
 def reject_report(current_user, report_id):
     """Reject a submitted report with a required comment."""
     try:
-        report = Report.find_by_id(report_id)
-        if not report:
-            return jsonify({"msg": "Report not found"}), 404
-
-        if report.get('status') != 'submitted':
-            return jsonify({"msg": "Only submitted reports can be rejected"}), 400
-
         data = request.get_json() or {}
         comment = data.get('comment')
         if not comment:
@@ -724,11 +729,10 @@ def reject_report(current_user, report_id):
             'at': datetime.datetime.utcnow()
         }
 
-        update = {
-            'status': 'rejected',
-            'approvals': (report.get('approvals') or []) + [approval]
-        }
-        updated = Report.update(report_id, update)
+        report = Report.update(report_id, {'status': 'rejected'}, {'status': 'submitted'}, {'approvals': [approval]})
+        if not report:
+            return _review_conflict(report_id, "Only submitted reports can be rejected")
+
         try:
             log_action(str(current_user['_id']), 'reject', report_id, {'comment': comment})
         except Exception:
@@ -741,12 +745,77 @@ def reject_report(current_user, report_id):
             if owner_email:
                 subject = f"Your report for week {report.get('week')} has been rejected"
                 body = f"Hi {owner_name or ''},\n\nYour report (week {report.get('week')}, {report.get('year')}) was rejected by {current_user.get('name')}" + (f"\n\nComment: {comment}" if comment else "")
-                send_email(owner_email, subject, body)
-            send_slack(f"Report {report.get('_id')} rejected by {current_user.get('name')}: {comment}")
+                enqueue_email(owner_email, subject, body)
+            enqueue_slack(f"Report {report.get('_id')} rejected by {current_user.get('name')}: {comment}")
         except Exception:
             pass
 
-        return jsonify(updated)
+        return jsonify(report)
+    except Exception as e:
+        return jsonify({"msg": str(e)}), 500
+
+
+@reports_bp.route('/bulk', methods=['POST'])
+@token_required
+def bulk_create_reports(current_user):
+    """Create many reports from a JSON array or an uploaded CSV/XLSX file (field `file`).
+
+    Rows are validated one by one and inserted in batches; the response lists
+    the rows that failed. Admins may set user_id or user_email per row.
+    """
+    try:
+        if request.is_json:
+            rows, source = iter_json_rows(request.get_json(silent=True)), 'json'
+        else:
+            upload = request.files.get('file')
+            if not upload or not upload.filename:
+                return jsonify({"msg": "Send a JSON array or a CSV/XLSX file in the 'file' field"}), 400
+            name = upload.filename.lower()
+            if name.endswith('.csv'):
+                rows, source = iter_csv_rows(upload.stream), 'csv'
+            elif name.endswith('.xlsx'):
+                rows, source = iter_xlsx_rows(upload.stream), 'xlsx'
+            else:
+                return jsonify({"msg": "Unsupported file type (use .csv or .xlsx)"}), 400
+
+        try:
+            summary = ingest(current_user, rows)
+        except IngestError as e:
+            return jsonify({"msg": str(e)}), 400
+
+        try:
+            log_action(str(current_user['_id']), 'bulk_create', None,
+                       {'source': source, 'created': summary['created'], 'failed': summary['failed']})
+        except Exception:
+            pass
+        return jsonify(summary), 201 if summary['created'] else 400
+    except Exception as e:
+        return jsonify({"msg": str(e)}), 500
+
+
+@reports_bp.route('/review/bulk', methods=['POST'])
+@token_required
+@admin_required
+def bulk_review_reports(current_user):
+    """Approve/reject many submitted reports in one write.
+
+    Body: {"items": [{"id", "action": "approve"|"reject", "comment"}], "comment"}
+    where the top-level comment is the default for items without one.
+    """
+    try:
+        try:
+            items = parse_review_items(request.get_json(silent=True) or {})
+        except ReviewError as e:
+            return jsonify({"msg": str(e)}), 400
+        batch_id, results = bulk_review(current_user, items)
+        ok = [r for r in results if r['ok']]
+        return jsonify({
+            "batch_id": batch_id,
+            "results": results,
+            "approved": sum(1 for r in ok if r['status'] == 'approved'),
+            "rejected": sum(1 for r in ok if r['status'] == 'rejected'),
+            "failed": len(results) - len(ok)
+        })
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
@@ -755,18 +824,21 @@ def reject_report(current_user, report_id):
 @token_required
 @admin_required
 def get_audit_logs(current_user):
+    """Newest audit entries, filtered by user_id, action and report_id.
+
+    Passing cursor or paginate=1 returns {logs, next_cursor} for keyset
+    paging; otherwise the latest `limit` (default 50) entries are returned
+    as a list, as before paging existed.
+    """
     try:
-        # simple pagination
-        limit = int(request.args.get('limit', 50))
-        cursor = mongo.db.audit_logs.find({}).sort('created_at', -1).limit(limit)
-        logs = []
-        for l in cursor:
-            l['_id'] = str(l['_id'])
-            l['user_id'] = str(l.get('user_id'))
-            l['report_id'] = str(l.get('report_id')) if l.get('report_id') else None
-            l['created_at'] = l.get('created_at')
-            logs.append(l)
-        return jsonify(logs)
+        query = audit_filters(request.args)
+        if wants_page(request.args, limit_pages=False):
+            page, next_cursor = fetch_page(mongo.db.audit_logs, query, request.args)
+            return jsonify({"logs": [log_to_dict(l) for l in page], "next_cursor": next_cursor})
+        cursor = mongo.db.audit_logs.find(query).sort(KEYSET_SORT).limit(parse_limit(request.args, cap=None))
+        return jsonify([log_to_dict(l) for l in cursor])
+    except CursorError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
@@ -827,20 +899,19 @@ def email_report(current_user, report_id):
             f"— Weekly Report System"
         )
 
-        sent = 0
+        if not notifications.email_configured() and not notifications.email_dev_mode():
+            return jsonify({"msg": "Email sending is not configured"}), 500
+
+        # Delivered by the notification outbox worker
         for r in recipients:
-            ok = send_email(r, subject, body)
-            if ok:
-                sent += 1
-        if sent == 0:
-            return jsonify({"msg": "Email sending is not configured or failed"}), 500
+            enqueue_email(r, subject, body)
 
         try:
             log_action(str(current_user['_id']), 'email', report_id, {'to': recipient})
         except Exception:
             pass
 
-        return jsonify({ 'msg': 'Email sent', 'to': recipients })
+        return jsonify({ 'msg': 'Email queued', 'to': recipients }), 202
     except Exception as e:
         return jsonify({"msg": str(e)}), 500
 
@@ -849,55 +920,49 @@ def email_report(current_user, report_id):
 @token_required
 @admin_required
 def send_missing_report_reminders(current_user):
-    """Send reminders (email/Slack) to users who have not submitted a report for current ISO week/year.
-    Requires SMTP/Slack env vars to be configured to actually deliver.
+    """Send reminders to users who have not submitted a report for the current ISO week/year.
+    Recipients are found with one anti-join and the emails are queued in the
+    notification outbox, which delivers and retries them in the background.
+    Returns 202 with a run_id; GET /reminders/runs/<run_id> gives the
+    per-recipient delivery summary.
     """
     try:
         now = datetime.datetime.utcnow()
         # ISO week number
         iso_year, iso_week, _ = now.isocalendar()
 
-        # Find users who have NOT submitted a report for this week (status submitted/approved/rejected counts as submitted)
-        submitted_user_ids = mongo.db.reports.distinct(
-            'user_id',
-            {
-                'year': iso_year,
-                'week': str(iso_week),
-                'status': { '$in': ['submitted', 'approved', 'rejected'] }
-            }
-        )
+        run = start_run(current_user['_id'], iso_year, iso_week)
+
+        # lightweight response
+        return jsonify({
+            'run_id': str(run['_id']),
+            'week': iso_week,
+            'year': iso_year,
+            'notified_count': run['total'],
+            'status_url': f"/api/reports/reminders/runs/{run['_id']}"
+        }), 202
+    except Exception as e:
+        return jsonify({"msg": str(e)}), 500
+
 
-        # Get all users
-        users_cursor = mongo.db.users.find({}, { 'name': 1, 'email': 1, 'department': 1 })
-        users = list(users_cursor)
-
-        to_notify = [u for u in users if u['_id'] not in submitted_user_ids]
-
-        notified = []
-        for u in to_notify:
-            email = u.get('email')
-            name = u.get('name', '')
-            if email:
-                subject = f"Reminder: Weekly report for ISO week {iso_week} ({iso_year})"
-                body = (
-                    f"Hi {name},\n\n"
-                    f"This is a friendly reminder to submit your weekly report for ISO week {iso_week} ({iso_year}).\n"
-                    f"Please visit the dashboard to create or submit your report.\n\n"
-                    f"Thanks!"
-                )
-                send_email(email, subject, body)
-            notified.append({'user_id': str(u['_id']), 'email': email})
-
-        # Slack summary (if configured)
+@reports_bp.route('/reminders/runs/<run_id>', methods=['GET'])
+@token_required
+@admin_required
+def get_reminder_run(current_user, run_id):
+    """Delivery summary of a reminder run. Optional ?status=sent|failed|skipped|pending filters recipients."""
+    try:
         try:
-            if to_notify:
-                send_slack(f"Sent weekly report reminders to {len(to_notify)} user(s) for week {iso_week} {iso_year}.")
-            else:
-                send_slack(f"No reminders needed: all users submitted for week {iso_week} {iso_year}.")
+            run = mongo.db.reminder_runs.find_one({'_id': ObjectId(run_id)})
         except Exception:
-            pass
-
-        # lightweight response
-        return jsonify({ 'week': iso_week, 'year': iso_year, 'notified_count': len(to_notify), 'notified': notified })
+            run = None
+        if not run:
+            return jsonify({"msg": "Reminder run not found"}), 404
+        recover_stale_runs(run)
+        run = mongo.db.reminder_runs.find_one({'_id': run['_id']})
+        query = {'run_id': run['_id']}
+        if request.args.get('status'):
+            query['status'] = request.args.get('status')
+        deliveries = mongo.db.reminder_deliveries.find(query)
+        return jsonify(run_to_dict(run, deliveries))
     except Exception as e:
-        return jsonify({"msg": str(e)}), 500
\ No newline at end of file
+        return jsonify({"msg": str(e)}), 500
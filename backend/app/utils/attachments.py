@@ -0,0 +1,313 @@
+import datetime
+import glob
+import hashlib
+import mimetypes
+import os
+import re
+import time
+import uuid
+from urllib.parse import quote
+from flask import Response, current_app, send_file
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+from app import mongo
+
+# Uploads are stored once per unique content under uploads/blobs/<aa>/<sha256>.
+# attachment_blobs holds one document per blob (_id = sha256) whose `refs`
+# counts the report attachments pointing at it; the file is removed when the
+# last reference goes away.
+#
+# Removing a blob and re-uploading the same content can interleave, so the
+# collector first marks the document (`collecting_until`) while it still has
+# no references, then deletes the files, then the document. _retain waits out
+# a marked document instead of reviving it, and BlobWriter.finish always
+# moves its file into place after taking the reference.
+MAX_ATTACHMENT_BYTES = 10 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+# A collector that dies mid-way stops blocking new references after this long
+COLLECT_LEASE_SECONDS = 30
+
+
+# Optional allowlist of declared Content-Types (comma separated; entries
+# ending in '/' or '.' match a prefix, e.g. "image/,video/,application/pdf").
+# Unset, every type is accepted apart from the markup below.
+ALLOWED_MIME_TYPES = [t.strip() for t in os.getenv('ATTACHMENT_MIME_TYPES', '').split(',') if t.strip()]
+# Uploads are served inline from the API origin, so markup is never accepted
+BLOCKED_MIME_TYPES = ('text/html', 'image/svg+xml', 'application/xhtml+xml')
+MARKUP_PREFIXES = (b'<!doctype html', b'<html', b'<script', b'<svg', b'<?xml')
+
+
+# When set (e.g. "/_uploads/"), files are handed to nginx through
+# X-Accel-Redirect instead of being streamed by a Python worker. The prefix
+# must be an `internal` nginx location aliased to the uploads directory.
+UPLOADS_ACCEL_REDIRECT = os.getenv('UPLOADS_ACCEL_REDIRECT', '')
+# Uploaded files never change under their name (hash or uuid prefix)
+UPLOAD_MAX_AGE = 365 * 24 * 3600
+THUMBNAIL_TYPES = {'.webp': 'image/webp', '.png': 'image/png'}
+
+
+class AttachmentRejected(ValueError):
+    """Raised when an upload is refused (type, content or size)"""
+
+
+class AttachmentTooLarge(AttachmentRejected):
+    """Raised while streaming an upload that exceeds MAX_ATTACHMENT_BYTES"""
+
+
+def check_mime(filename, mime):
+    mime = (mime or 'application/octet-stream').lower()
+    allowed = not ALLOWED_MIME_TYPES or any(
+        mime.startswith(t) if t.endswith('/') or t.endswith('.') else mime == t for t in ALLOWED_MIME_TYPES
+    )
+    if mime in BLOCKED_MIME_TYPES or not allowed:
+        raise AttachmentRejected(f"File {filename} has an unsupported type ({mime})")
+
+
+def check_content(filename, first_chunk):
+    """Sniff the first bytes of an upload; reject HTML/SVG whatever type was declared"""
+    head = first_chunk[:256].lstrip().lower()
+    if head.startswith(MARKUP_PREFIXES):
+        raise AttachmentRejected(f"File {filename} looks like markup and is not accepted")
+
+
+def upload_dir():
+    path = os.path.abspath(os.path.join(current_app.root_path, '..', 'uploads'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def blob_dir():
+    path = os.path.join(upload_dir(), 'blobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def blob_path(digest):
+    return os.path.join(blob_dir(), digest[:2], digest)
+
+
+def thumb_base(digest):
+    """Thumbnail path without extension (see app.utils.thumbnails)"""
+    return os.path.join(upload_dir(), 'thumbs', digest[:2], digest)
+
+
+def is_blob(name):
+    return bool(SHA256_RE.match(name or ''))
+
+
+def _retain(digest, size, mime):
+    """Add one reference to a blob, creating its document on first use.
+
+    While the blob is being collected the filter misses, the upsert collides
+    with the existing _id and we retry until the collector has deleted it.
+    """
+    while True:
+        now = datetime.datetime.utcnow()
+        try:
+            return mongo.db.attachment_blobs.find_one_and_update(
+                {'_id': digest, '$or': [{'collecting_until': None}, {'collecting_until': {'$lt': now}}]},
+                {'$inc': {'refs': 1}, '$set': {'last_used_at': now}, '$unset': {'collecting_until': ''},
+                 '$setOnInsert': {'size': size, 'mime': mime, 'created_at': now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            time.sleep(0.05)
+
+
+class BlobWriter:
+    """Writes one upload into the blob store chunk by chunk.
+
+    Size and content checks run on every chunk, so an oversized or disallowed
+    file is rejected as soon as it shows up. finish() needs no request
+    context and may run on another thread.
+    """
+
+    def __init__(self, filename, mime, max_bytes=MAX_ATTACHMENT_BYTES):
+        self.filename = filename
+        self.mime = mime
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.directory = blob_dir()
+        self._hash = hashlib.sha256()
+        self._tmp = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        self._out = open(self._tmp, 'wb')
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        if self.size == 0:
+            check_content(self.filename, chunk)
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise AttachmentTooLarge(f"File {self.filename} is too large (max {self.max_bytes // (1024 * 1024)}MB)")
+        self._hash.update(chunk)
+        self._out.write(chunk)
+
+    def finish(self):
+        """Place the file under its hash, take a reference and return the attachment metadata"""
+        try:
+            self._out.flush()
+            os.fsync(self._out.fileno())
+            self._out.close()
+            digest = self._hash.hexdigest()
+            _retain(digest, self.size, self.mime)
+            # Replace even an existing file: a collector may be about to
+            # delete it, and the content is identical either way
+            path = os.path.join(self.directory, digest[:2], digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp, path)
+        finally:
+            self.abort()
+        return {
+            'filename': digest,
+            'sha256': digest,
+            'original_name': self.filename,
+            'mime': self.mime,
+            'size': self.size,
+            'url': f"/api/reports/uploads/{digest}"
+        }
+
+    def abort(self):
+        """Discard the partial file (no-op once it has been placed)"""
+        self._out.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+def store(file_storage, max_bytes=MAX_ATTACHMENT_BYTES):
+    """Stream an already parsed FileStorage into the blob store.
+
+    Identical content is kept once; every call adds one reference to the blob.
+    """
+    check_mime(file_storage.filename, file_storage.mimetype)
+    writer = BlobWriter(file_storage.filename, file_storage.mimetype, max_bytes)
+    try:
+        while True:
+            chunk = file_storage.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.write(chunk)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+def release(attachments):
+    """Drop one reference per attachment and delete blobs nobody uses any more.
+
+    Attachments saved before the blob store (no sha256) are left alone.
+    """
+    for meta in attachments or []:
+        digest = meta.get('sha256')
+        if not digest:
+            continue
+        blob = mongo.db.attachment_blobs.find_one_and_update(
+            {'_id': digest},
+            {'$inc': {'refs': -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob and blob['refs'] <= 0:
+            _collect(digest)
+
+
+def _collect(digest):
+    # Only the caller that marks the unreferenced document deletes the file;
+    # new references wait until the document is gone
+    now = datetime.datetime.utcnow()
+    marked = mongo.db.attachment_blobs.update_one(
+        {'_id': digest, 'refs': {'$lte': 0},
+         '$or': [{'collecting_until': None}, {'collecting_until': {'$lt': now}}]},
+        {'$set': {'collecting_until': now + datetime.timedelta(seconds=COLLECT_LEASE_SECONDS)}}
+    )
+    if not marked.modified_count:
+        return
+    for path in [blob_path(digest)] + glob.glob(thumb_base(digest) + '.*'):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    mongo.db.attachment_blobs.delete_one({'_id': digest, 'refs': {'$lte': 0}})
+
+
+def find_blob(digest):
+    return mongo.db.attachment_blobs.find_one({'_id': digest})
+
+
+def _send(relpath, mime, etag, private):
+    """Serve a file under the uploads directory.
+
+    In-process responses carry a strong ETag and honour If-None-Match,
+    If-Modified-Since, Range and If-Range. With UPLOADS_ACCEL_REDIRECT set,
+    nginx does the transfer (and ranges) instead.
+    """
+    path = safe_join(upload_dir(), relpath)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    if UPLOADS_ACCEL_REDIRECT:
+        resp = Response(mimetype=mime)
+        resp.headers['X-Accel-Redirect'] = UPLOADS_ACCEL_REDIRECT.rstrip('/') + '/' + quote(relpath)
+    else:
+        resp = send_file(path, mimetype=mime, etag=etag, conditional=True, max_age=UPLOAD_MAX_AGE)
+    resp.cache_control.max_age = UPLOAD_MAX_AGE
+    resp.cache_control.immutable = True
+    # send_file marks responses public; access-checked files must not land in shared caches
+    resp.cache_control.public = not private
+    resp.cache_control.private = private
+    return resp
+
+
+def send_upload(name, private=False):
+    """Response for an uploaded file: a blob by sha256 (the hash is its ETag)
+    or an older upload by name."""
+    if is_blob(name):
+        blob = find_blob(name)
+        if not blob:
+            raise NotFound()
+        return _send(f"blobs/{name[:2]}/{name}", blob.get('mime') or 'application/octet-stream', name, private)
+    return _send(name, mimetypes.guess_type(name)[0] or 'application/octet-stream', True, private)
+
+
+def send_thumbnail(name, private=False):
+    """Response for a thumbnail named <sha256>.webp or <sha256>.png"""
+    digest, ext = os.path.splitext(name)
+    mime = THUMBNAIL_TYPES.get(ext)
+    if not is_blob(digest) or not mime:
+        raise NotFound()
+    return _send(f"thumbs/{digest[:2]}/{name}", mime, f"{digest}-thumb", private)
+
+
+def rebuild_refs():
+    """Recount references from the reports collection and drop orphaned blobs.
+
+    Repairs counts left behind by interrupted requests. Returns
+    (blobs referenced, blobs removed).
+    """
+    pipeline = [
+        {'$unwind': '$attachments'},
+        {'$match': {'attachments.sha256': {'$exists': True}}},
+        {'$group': {'_id': '$attachments.sha256', 'refs': {'$sum': 1}}}
+    ]
+    counts = {row['_id']: row['refs'] for row in mongo.db.reports.aggregate(pipeline)}
+    for digest, refs in counts.items():
+        mongo.db.attachment_blobs.update_one({'_id': digest}, {'$set': {'refs': refs}}, upsert=True)
+
+    removed = 0
+    for blob in mongo.db.attachment_blobs.find({'_id': {'$nin': list(counts)}}, {'_id': 1}):
+        mongo.db.attachment_blobs.update_one({'_id': blob['_id']}, {'$set': {'refs': 0}})
+        _collect(blob['_id'])
+        removed += 1
+    # Files whose document is gone (e.g. a crash between write and retain)
+    for root, _, names in os.walk(blob_dir()):
+        for name in names:
+            if is_blob(name) and name not in counts and not find_blob(name):
+                os.remove(os.path.join(root, name))
+                removed += 1
+    return len(counts), removed
@@ -1,15 +1,170 @@
+import atexit
 import datetime
+import os
+import threading
+from pymongo.errors import BulkWriteError, OperationFailure
+
 from app import mongo
 
+# log_action appends to an in-process buffer; a writer thread flushes it with
+# one insert_many when AUDIT_BATCH_SIZE entries are waiting or every
+# AUDIT_FLUSH_SECONDS, and once more at shutdown. Without a running writer
+# (CLI commands, AUDIT_BUFFERED=false) entries are inserted directly.
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '100'))
+AUDIT_FLUSH_SECONDS = float(os.getenv('AUDIT_FLUSH_SECONDS', '2'))
+# Entries kept in memory while the database is unreachable; the oldest are dropped beyond this
+AUDIT_MAX_BUFFER = int(os.getenv('AUDIT_MAX_BUFFER', '10000'))
+# 0 keeps audit entries forever
+AUDIT_RETENTION_DAYS = float(os.getenv('AUDIT_RETENTION_DAYS', '365'))
+# Longer strings in details are cut to this many characters
+AUDIT_DETAIL_MAX_CHARS = 200
+AUDIT_DETAIL_MAX_ITEMS = 20
+
+_writer = None
+
+
+def ensure_indexes():
+    mongo.db.audit_logs.create_index([('created_at', -1), ('_id', -1)])
+    mongo.db.audit_logs.create_index([('report_id', 1), ('created_at', -1), ('_id', -1)])
+    mongo.db.audit_logs.create_index([('user_id', 1), ('created_at', -1), ('_id', -1)])
+    if AUDIT_RETENTION_DAYS > 0:
+        seconds = int(AUDIT_RETENTION_DAYS * 86400)
+        try:
+            mongo.db.audit_logs.create_index('created_at', expireAfterSeconds=seconds)
+        except OperationFailure:
+            # Retention changed since the index was created
+            mongo.db.command('collMod', 'audit_logs', index={'keyPattern': {'created_at': 1}, 'expireAfterSeconds': seconds})
+
+
+def compact(value):
+    """Shrink a details value: long strings are truncated, long lists cut"""
+    if isinstance(value, str):
+        if len(value) > AUDIT_DETAIL_MAX_CHARS:
+            return value[:AUDIT_DETAIL_MAX_CHARS] + '…'
+        return value
+    if isinstance(value, (list, tuple)):
+        items = [compact(v) for v in value[:AUDIT_DETAIL_MAX_ITEMS]]
+        if len(value) > AUDIT_DETAIL_MAX_ITEMS:
+            items.append(f"… {len(value) - AUDIT_DETAIL_MAX_ITEMS} more")
+        return items
+    if isinstance(value, dict):
+        return {k: compact(v) for k, v in value.items()}
+    return value
+
+
+def diff(before, changes):
+    """Details for an update: {field: {'from': old, 'to': new}} for the fields
+    that actually changed"""
+    before = before or {}
+    return {
+        field: {'from': compact(before.get(field)), 'to': compact(new)}
+        for field, new in changes.items() if before.get(field) != new
+    }
+
+
+def _insert(entries):
+    mongo.db.audit_logs.insert_many(entries, ordered=False)
+
+
+class AuditWriter(threading.Thread):
+    def __init__(self, app):
+        super().__init__(name='audit-writer', daemon=True)
+        self.app = app
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+
+    def add(self, entry):
+        with self._lock:
+            self._buffer.append(entry)
+            if len(self._buffer) > AUDIT_MAX_BUFFER:
+                del self._buffer[:len(self._buffer) - AUDIT_MAX_BUFFER]
+            full = len(self._buffer) >= AUDIT_BATCH_SIZE
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+        try:
+            with self.app.app_context():
+                _insert(batch)
+        except BulkWriteError as e:
+            # Duplicate _ids come from a retried batch that was partly written;
+            # anything else was rejected by the server and would fail again
+            rejected = [w for w in e.details.get('writeErrors', []) if w.get('code') != 11000]
+            if rejected:
+                self.app.logger.warning('%d audit entries rejected: %s', len(rejected), rejected[0].get('errmsg'))
+            return len(batch) - len(rejected)
+        except Exception as e:
+            self.app.logger.warning('Audit flush of %d entries failed: %s', len(batch), e)
+            # Keep them for the next attempt
+            with self._lock:
+                self._buffer = (batch + self._buffer)[-AUDIT_MAX_BUFFER:]
+            return 0
+        return len(batch)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait(AUDIT_FLUSH_SECONDS)
+            self._wakeup.clear()
+            self.flush()
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        self._wakeup.set()
+        self.join(timeout)
+        self.flush()
+
+
+def start_writer(app):
+    """Start this process's audit writer (once); disabled with AUDIT_BUFFERED=false"""
+    global _writer
+    if _writer is not None or os.getenv('AUDIT_BUFFERED', 'true').lower() != 'true':
+        return _writer
+    _writer = AuditWriter(app)
+    _writer.start()
+    atexit.register(_writer.stop)
+    return _writer
+
+
 def log_action(user_id, action, report_id=None, details=None):
     entry = {
         'user_id': user_id,
         'action': action,
         'report_id': report_id,
-        'details': details or {},
+        'details': compact(details or {}),
         'created_at': datetime.datetime.utcnow()
     }
     try:
-        mongo.db.audit_logs.insert_one(entry)
+        if _writer is not None and _writer.is_alive():
+            _writer.add(entry)
+        else:
+            mongo.db.audit_logs.insert_one(entry)
     except Exception:
         pass
+
+
+def audit_filters(args):
+    """Query for /audit from the user_id, action (comma separated) and report_id args"""
+    query = {}
+    if args.get('user_id'):
+        query['user_id'] = args['user_id']
+    if args.get('report_id'):
+        query['report_id'] = args['report_id']
+    actions = [a.strip() for a in (args.get('action') or '').split(',') if a.strip()]
+    if len(actions) == 1:
+        query['action'] = actions[0]
+    elif actions:
+        query['action'] = {'$in': actions}
+    return query
+
+
+def log_to_dict(entry):
+    entry['_id'] = str(entry['_id'])
+    entry['user_id'] = str(entry.get('user_id'))
+    entry['report_id'] = str(entry.get('report_id')) if entry.get('report_id') else None
+    return entry
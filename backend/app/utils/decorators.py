@@ -1,7 +1,7 @@
 from functools import wraps
 from flask import jsonify, current_app
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from app.models.user import User
+from app.utils.identity import get_identity
 
 def token_required(f):
     @wraps(f)
@@ -10,12 +10,12 @@ def token_required(f):
         try:
             verify_jwt_in_request()
         except Exception as e:
-            print(f"Token validation error: {e}", flush=True)
+            current_app.logger.info("Token validation error: %s", e)
             return jsonify({"msg": "Token is invalid"}), 401
 
-        # Resolve current user from token identity
+        # Resolve current user from token identity (cached, no password hash)
         current_user_id = get_jwt_identity()
-        current_user = User.find_by_id(current_user_id)
+        current_user = get_identity(current_user_id)
         if not current_user:
             return jsonify({"msg": "Token is valid but user not found"}), 401
 
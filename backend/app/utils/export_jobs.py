@@ -0,0 +1,271 @@
+import datetime
+import io
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from bson.objectid import ObjectId
+from flask import current_app
+from pymongo import ReturnDocument
+
+from app import mongo
+from app.models.user import User
+from app.utils.exports import EXPORT_BATCH_SIZE, XLSX_MAX_ROWS, export_query, iter_csv, iter_reports, write_xlsx
+from app.utils.pdf import render_report_pdf
+
+JOB_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'pdf': ('zip', 'application/zip'),
+}
+
+# Request fields copied into the job and replayed as export filters
+JOB_PARAMS = ('q', 'match', 'status', 'tags', 'start', 'end', 'department', 'user_id', 'split_by', 'max_rows')
+
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))
+EXPORT_TTL_HOURS = float(os.getenv('EXPORT_TTL_HOURS', '24'))
+# Jobs run on a per-process thread pool, so a recycled or killed worker takes
+# its jobs with it. A claimed job holds a lease that the worker renews while
+# it makes progress; queued jobs and running jobs whose lease lapsed are
+# picked up again by whichever process next creates or polls a job.
+EXPORT_LEASE_SECONDS = int(os.getenv('EXPORT_LEASE_SECONDS', '120'))
+EXPORT_MAX_ATTEMPTS = int(os.getenv('EXPORT_MAX_ATTEMPTS', '3'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def export_dir():
+    path = os.getenv('EXPORT_DIR', os.path.abspath(os.path.join(current_app.root_path, '..', 'exports')))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix='export')
+        return _executor
+
+
+def ensure_indexes():
+    # Jobs disappear once expires_at passes: the retention window after they
+    # finish, or after they were created for jobs that never did
+    mongo.db.export_jobs.create_index('expires_at', expireAfterSeconds=0)
+    mongo.db.export_jobs.create_index([('user_id', 1), ('created_at', -1)])
+    mongo.db.export_jobs.create_index([('status', 1), ('locked_until', 1)])
+
+
+class JobLost(Exception):
+    """Another worker took over the job after this one's lease lapsed"""
+
+
+def create_job(current_user, fmt, export_all, params):
+    """Record a queued export job and hand it to the worker pool"""
+    now = datetime.datetime.utcnow()
+    job = {
+        'user_id': ObjectId(str(current_user['_id'])),
+        'format': fmt,
+        'all': export_all,
+        'params': {k: str(params[k]) for k in JOB_PARAMS if params.get(k) not in (None, '')},
+        'status': 'queued',
+        'rows_done': 0,
+        'rows_total': None,
+        'attempts': 0,
+        'created_at': now,
+        # Picked up by another process if this one dies before starting it
+        'locked_until': now + datetime.timedelta(seconds=EXPORT_LEASE_SECONDS),
+        'expires_at': now + datetime.timedelta(hours=EXPORT_TTL_HOURS)
+    }
+    job['_id'] = mongo.db.export_jobs.insert_one(job).inserted_id
+    app = current_app._get_current_object()
+    _pool().submit(_run_job, app, job['_id'])
+    recover_stale()
+    return job
+
+
+def find_job(job_id):
+    try:
+        job_id = ObjectId(job_id)
+    except Exception:
+        return None
+    job = mongo.db.export_jobs.find_one({'_id': job_id})
+    if job and job['status'] in ('queued', 'running') and _lapsed(job, datetime.datetime.utcnow()):
+        recover_stale()
+        job = mongo.db.export_jobs.find_one({'_id': job_id})
+    return job
+
+
+def _lapsed(job, now):
+    # Jobs queued before leases existed have none and count as abandoned
+    return not job.get('locked_until') or job['locked_until'] < now
+
+
+def _lease_lapsed(now):
+    return {'$or': [{'locked_until': {'$lt': now}}, {'locked_until': None}]}
+
+
+def recover_stale():
+    """Resubmit jobs whose lease lapsed (their worker died) to this process's
+    pool, failing those that already used up their attempts"""
+    now = datetime.datetime.utcnow()
+    stale = dict(_lease_lapsed(now), status={'$in': ['queued', 'running']})
+    mongo.db.export_jobs.update_many(
+        dict(stale, attempts={'$gte': EXPORT_MAX_ATTEMPTS}),
+        {'$set': {
+            'status': 'failed',
+            'error': 'Export worker stopped before finishing',
+            'finished_at': now,
+            'expires_at': now + datetime.timedelta(hours=EXPORT_TTL_HOURS)
+        }, '$unset': {'locked_until': ''}}
+    )
+    app = current_app._get_current_object()
+    for job in mongo.db.export_jobs.find(stale, {'_id': 1}):
+        _pool().submit(_run_job, app, job['_id'])
+
+
+def job_to_dict(job):
+    return {
+        'id': str(job['_id']),
+        'format': job['format'],
+        'status': job['status'],
+        'rows_done': job.get('rows_done', 0),
+        'rows_total': job.get('rows_total'),
+        'error': job.get('error'),
+        'created_at': job.get('created_at'),
+        'finished_at': job.get('finished_at'),
+        'expires_at': job.get('expires_at'),
+        'download_url': f"/api/reports/exports/{job['_id']}/download" if job['status'] == 'done' else None
+    }
+
+
+def artifact_path(job):
+    ext, _ = JOB_FORMATS[job['format']]
+    return os.path.join(export_dir(), f"{job['_id']}.{ext}")
+
+
+def _claim(job_id, token):
+    now = datetime.datetime.utcnow()
+    return mongo.db.export_jobs.find_one_and_update(
+        {'_id': job_id, '$or': [
+            {'status': 'queued'},
+            dict(_lease_lapsed(now), status='running')
+        ]},
+        {
+            '$set': {
+                'status': 'running', 'claim': token, 'started_at': now, 'rows_done': 0,
+                'locked_until': now + datetime.timedelta(seconds=EXPORT_LEASE_SECONDS)
+            },
+            '$inc': {'attempts': 1}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _update_claimed(job_id, token, fields, unset_lease=False):
+    """Update the job only while this worker still holds it"""
+    update = {'$set': fields}
+    if unset_lease:
+        update['$unset'] = {'locked_until': ''}
+    result = mongo.db.export_jobs.update_one({'_id': job_id, 'claim': token}, update)
+    if not result.matched_count:
+        raise JobLost()
+
+
+def _progress(job_id, token, reports, every=EXPORT_BATCH_SIZE):
+    """Report progress and renew the lease every `every` rows or a quarter of
+    the lease, whichever comes first"""
+    done = 0
+    last = time.monotonic()
+    for r in reports:
+        yield r
+        done += 1
+        if done % every == 0 or time.monotonic() - last > EXPORT_LEASE_SECONDS / 4:
+            last = time.monotonic()
+            _update_claimed(job_id, token, {
+                'rows_done': done,
+                'locked_until': datetime.datetime.utcnow() + datetime.timedelta(seconds=EXPORT_LEASE_SECONDS)
+            })
+
+
+def _write_pdf_bundle(reports, path):
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for r in reports:
+            buf = io.BytesIO()
+            render_report_pdf(r, buf)
+            zf.writestr(f"report_{r['_id']}.pdf", buf.getvalue())
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        token = uuid.uuid4().hex
+        job = _claim(job_id, token)
+        if not job:
+            return
+        # Written under a per-claim name so a worker that lost its lease
+        # cannot clobber or delete the artifact of the one that took over
+        path = f'{artifact_path(job)}.{token}.part'
+        try:
+            sweep_expired()
+            owner = User.find_by_id(str(job['user_id']))
+            if not owner:
+                raise RuntimeError("Job owner no longer exists")
+            query = export_query(owner, job['params'], job['all'])
+            total = mongo.db.reports.count_documents(query)
+            _update_claimed(job_id, token, {'rows_total': total})
+
+            reports = _progress(job_id, token, iter_reports(query))
+            if job['format'] == 'csv':
+                with open(path, 'w', newline='', encoding='utf-8') as f:
+                    for chunk in iter_csv(reports):
+                        f.write(chunk)
+            elif job['format'] == 'xlsx':
+                max_rows = min(int(job['params'].get('max_rows', XLSX_MAX_ROWS)), XLSX_MAX_ROWS)
+                write_xlsx(reports, path, split_by=job['params'].get('split_by'), max_rows=max_rows)
+            else:
+                _write_pdf_bundle(reports, path)
+
+            size = os.path.getsize(path)
+            # Renew once more so the lease cannot lapse between the rename and the final update
+            _update_claimed(job_id, token, {
+                'locked_until': datetime.datetime.utcnow() + datetime.timedelta(seconds=EXPORT_LEASE_SECONDS)
+            })
+            os.replace(path, artifact_path(job))
+            now = datetime.datetime.utcnow()
+            _update_claimed(job_id, token, {
+                'status': 'done',
+                'rows_done': total,
+                'size': size,
+                'finished_at': now,
+                'expires_at': now + datetime.timedelta(hours=EXPORT_TTL_HOURS)
+            }, unset_lease=True)
+        except JobLost:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            if os.path.exists(path):
+                os.remove(path)
+            now = datetime.datetime.utcnow()
+            mongo.db.export_jobs.update_one({'_id': job_id, 'claim': token}, {'$set': {
+                'status': 'failed',
+                'error': str(e),
+                'finished_at': now,
+                'expires_at': now + datetime.timedelta(hours=EXPORT_TTL_HOURS)
+            }, '$unset': {'locked_until': ''}})
+
+
+def sweep_expired():
+    """Delete artifacts older than the retention window (their job documents
+    are removed by the TTL index)"""
+    cutoff = time.time() - EXPORT_TTL_HOURS * 3600
+    directory = export_dir()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
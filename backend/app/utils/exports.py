@@ -0,0 +1,127 @@
+import csv
+import io
+from bson.objectid import ObjectId
+
+from app import mongo
+from app.models.report import Report
+from app.utils.filters import report_filters
+from app.utils.pagination import KEYSET_SORT
+
+EXPORT_HEADERS = ['id', 'user_id', 'user_name', 'user_email', 'week', 'year', 'month', 'status', 'created_at', 'submitted_at', 'achievements', 'challenges', 'next_week_plan', 'attachments']
+
+# Rows are read, hydrated and written this many at a time
+EXPORT_BATCH_SIZE = 500
+
+# Fields never written to an export; skipping them keeps batches small
+EXPORT_PROJECTION = {'search_tokens': 0, 'approvals': 0}
+
+
+def export_query(current_user, args, export_all=False):
+    """Reports query for an export: the same filters as the list endpoints,
+    scoped to the current user unless an admin exports everything."""
+    is_admin = current_user.get('role') == 'admin'
+    query = report_filters(args, admin=export_all and is_admin)
+    if not export_all:
+        query['user_id'] = ObjectId(str(current_user['_id']))
+    return query
+
+
+def iter_reports(query, batch_size=EXPORT_BATCH_SIZE):
+    """Yield hydrated reports from a batched cursor, one users query per batch"""
+    cursor = mongo.db.reports.find(query, EXPORT_PROJECTION).sort(KEYSET_SORT).batch_size(batch_size)
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield from Report.to_dict_many(batch)
+            batch = []
+    if batch:
+        yield from Report.to_dict_many(batch)
+
+
+def export_row(r):
+    attachments_field = ';'.join([a.get('original_name', a.get('filename')) for a in (r.get('attachments') or [])])
+    user = r.get('user', {})
+    return [
+        r.get('_id'),
+        r.get('user_id'),
+        user.get('name'),
+        user.get('email'),
+        r.get('week'),
+        r.get('year'),
+        r.get('month'),
+        r.get('status'),
+        r.get('created_at'),
+        r.get('submitted_at'),
+        r.get('achievements'),
+        r.get('challenges'),
+        r.get('next_week_plan'),
+        attachments_field
+    ]
+
+
+def iter_csv(reports, flush_every=EXPORT_BATCH_SIZE):
+    """Yield CSV text in chunks of `flush_every` rows"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_HEADERS)
+    pending = 0
+    for r in reports:
+        writer.writerow(export_row(r))
+        pending += 1
+        if pending >= flush_every:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            pending = 0
+    yield buf.getvalue()
+
+
+# Excel's hard limit is 1,048,576 rows per sheet (one is used by the header)
+XLSX_MAX_ROWS = 1048575
+XLSX_SPLIT_KEYS = ('department', 'year')
+_SHEET_NAME_INVALID = str.maketrans({c: '_' for c in '[]:*?/\\'})
+
+
+def _sheet_key(r, split_by):
+    if split_by == 'department':
+        return (r.get('user') or {}).get('department') or 'Unknown'
+    if split_by == 'year':
+        return str(r.get('year') or 'Unknown')
+    return 'Reports'
+
+
+def _sheet_title(key, part):
+    title = str(key).translate(_SHEET_NAME_INVALID).strip() or 'Unknown'
+    suffix = f" ({part})" if part > 1 else ''
+    return title[:31 - len(suffix)] + suffix
+
+
+def write_xlsx(reports, path, split_by=None, max_rows=XLSX_MAX_ROWS):
+    """Write reports to an XLSX file at `path` using write-only worksheets.
+
+    Rows are streamed to disk as they arrive, so memory does not depend on the
+    number of reports. `split_by` ('department' or 'year') puts each group on
+    its own sheet; a sheet that reaches `max_rows` continues on "<name> (2)".
+    Returns the number of rows written.
+    """
+    from openpyxl import Workbook  # type: ignore[import]
+
+    wb = Workbook(write_only=True)
+    sheets = {}  # key -> [worksheet, rows in sheet, part number]
+    written = 0
+    for r in reports:
+        key = _sheet_key(r, split_by)
+        entry = sheets.get(key)
+        if entry is None or entry[1] >= max_rows:
+            part = entry[2] + 1 if entry else 1
+            ws = wb.create_sheet(title=_sheet_title(key, part))
+            ws.append(EXPORT_HEADERS)
+            entry = sheets[key] = [ws, 0, part]
+        entry[0].append(export_row(r))
+        entry[1] += 1
+        written += 1
+    if not sheets:
+        wb.create_sheet(title='Reports').append(EXPORT_HEADERS)
+    wb.save(path)
+    return written
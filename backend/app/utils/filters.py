@@ -0,0 +1,99 @@
+import datetime
+from bson.objectid import ObjectId
+from app import mongo
+from app.utils.search import search_query
+from app.models.report import REPORT_FIELDS, SUMMARY_FIELDS, SUMMARY_PROJECTION
+
+
+class FilterError(ValueError):
+    """Raised when a query-string filter cannot be parsed"""
+
+
+def date_range(args):
+    """created_at bounds from the `start`/`end` ISO date args (unparseable values are ignored)"""
+    start = args.get('start')
+    end = args.get('end')
+    date_q = {}
+    if start:
+        try:
+            date_q['$gte'] = datetime.datetime.fromisoformat(start)
+        except Exception:
+            pass
+    if end:
+        try:
+            date_q['$lte'] = datetime.datetime.fromisoformat(end)
+        except Exception:
+            pass
+    return date_q
+
+
+def report_filters(args, admin=False):
+    """Build a reports query from request args.
+
+    Supported for everyone: q (text search, see search_query; `match=regex`
+    opts into regex matching), status, tags (comma-separated), start, end.
+    Admins may also filter by department and user_id.
+    """
+    q = args.get('q')
+    status = args.get('status')
+    tags = args.get('tags')
+
+    query = {}
+
+    if status:
+        query['status'] = status
+
+    if tags:
+        tags_list = [t.strip() for t in tags.split(',') if t.strip()]
+        if tags_list:
+            query['tags'] = {'$in': tags_list}
+
+    date_q = date_range(args)
+    if date_q:
+        query['created_at'] = date_q
+
+    if admin:
+        department = args.get('department')
+        user_id = args.get('user_id')
+
+        if department:
+            # find users in department
+            user_ids = [u['_id'] for u in mongo.db.users.find({'department': department}, {'_id': 1})]
+            query['user_id'] = {'$in': user_ids}
+
+        # filter by specific user id if provided
+        if user_id:
+            try:
+                query['user_id'] = ObjectId(user_id)
+            except Exception:
+                raise FilterError("Invalid user_id")
+
+    if q:
+        try:
+            query.update(search_query(q, args.get('match')))
+        except ValueError as e:
+            raise FilterError(str(e))
+
+    return query
+
+
+def list_projection(args):
+    """Projection for report listings from `view=summary` or `fields=a,b`.
+
+    Returns (projection, fields), or (None, None) for full documents. _id and
+    user_id are always included.
+    """
+    view = args.get('view')
+    if view and view not in ('summary', 'full'):
+        raise FilterError("view must be 'summary' or 'full'")
+    if view == 'summary':
+        return dict(SUMMARY_PROJECTION), set(SUMMARY_FIELDS)
+    if not args.get('fields'):
+        return None, None
+    fields = {f.strip() for f in args['fields'].split(',') if f.strip()}
+    unknown = sorted(fields - set(REPORT_FIELDS))
+    if unknown:
+        raise FilterError(f"Unknown field(s): {', '.join(unknown)}")
+    fields.add('user_id')
+    projection = {f: 1 for f in fields if f != 'user'}
+    return projection, fields
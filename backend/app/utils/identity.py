@@ -0,0 +1,29 @@
+import os
+
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+# Per-process cache of the authenticated user record (password excluded).
+# Writes that change a user invalidate it locally; other worker processes
+# see the change once the TTL runs out.
+identity_cache = TTLCache(
+    maxsize=int(os.getenv('IDENTITY_CACHE_SIZE', '4096')),
+    ttl=float(os.getenv('IDENTITY_CACHE_TTL', '30'))
+)
+
+
+def get_identity(user_id):
+    """Return the user for a JWT identity (without password), or None"""
+    key = str(user_id)
+    user = identity_cache.get(key)
+    if user is None:
+        user = User.find_identity(key)
+        if not user:
+            return None
+        identity_cache.set(key, user)
+    # Callers mutate the dict (e.g. User.to_dict), so never hand out the cached one
+    return dict(user)
+
+
+def invalidate_identity(user_id):
+    identity_cache.invalidate(str(user_id))
@@ -0,0 +1,222 @@
+import codecs
+import csv
+import os
+import shutil
+import tempfile
+from collections import Counter
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app import mongo
+from app.models.report import Report
+from app.utils import revisions, stats as report_stats
+
+# POST /api/reports/bulk: rows are read one at a time from JSON, CSV or XLSX,
+# validated, and inserted INGEST_BATCH_SIZE at a time with insert_many.
+INGEST_BATCH_SIZE = 500
+INGEST_MAX_ROWS = int(os.getenv('INGEST_MAX_ROWS', '5000'))
+# Only the first errors are returned; the count covers all of them
+INGEST_MAX_ERRORS = 1000
+INGEST_STATUSES = ('draft', 'submitted')
+
+# Column names accepted for each field (lower case; spaces become underscores).
+# The export headers (see exports.EXPORT_HEADERS) are accepted as well.
+COLUMN_ALIASES = {
+    'week': 'week', 'year': 'year', 'month': 'month', 'status': 'status', 'tags': 'tags',
+    'achievements': 'achievements', 'challenges': 'challenges',
+    'next_week_plan': 'next_week_plan', 'nextweekplan': 'next_week_plan',
+    'user_id': 'user_id', 'email': 'user_email', 'user_email': 'user_email',
+}
+
+
+class IngestError(ValueError):
+    """Raised when the upload as a whole cannot be read"""
+
+
+def _normalize(row):
+    out = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        field = COLUMN_ALIASES.get(str(key).strip().lower().replace(' ', '_'))
+        if field:
+            out[field] = value
+    return out
+
+
+def iter_json(data):
+    rows = data.get('reports') if isinstance(data, dict) else data
+    if not isinstance(rows, list):
+        raise IngestError("Expected a JSON array of reports (or {\"reports\": [...]})")
+    for number, row in enumerate(rows, start=1):
+        yield number, _normalize(row) if isinstance(row, dict) else None
+
+
+def iter_csv(stream):
+    # Decoded line by line rather than with io.TextIOWrapper: uploads are
+    # SpooledTemporaryFiles, which have no readable() before Python 3.11
+    text = codecs.iterdecode(stream, 'utf-8-sig')
+    try:
+        for number, row in enumerate(csv.DictReader(text), start=2):
+            yield number, _normalize(row)
+    except UnicodeDecodeError:
+        raise IngestError("CSV files must be UTF-8 encoded")
+    except csv.Error as e:
+        raise IngestError(f"Could not read the CSV file: {e}")
+
+
+def iter_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except Exception:
+        raise IngestError("XLSX import dependencies missing (openpyxl).")
+    # zipfile needs seekable(), which the SpooledTemporaryFile uploads lack
+    # before Python 3.11, so the upload is copied to a plain temporary file
+    with tempfile.TemporaryFile() as f:
+        shutil.copyfileobj(stream, f)
+        f.seek(0)
+        try:
+            wb = load_workbook(f, read_only=True, data_only=True)
+        except Exception:
+            raise IngestError("Could not read the XLSX file")
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                return
+            for number, values in enumerate(rows, start=2):
+                if not any(v not in (None, '') for v in values):
+                    continue
+                yield number, _normalize(dict(zip(header, values)))
+        finally:
+            wb.close()
+
+
+def _int(value, field, low, high, required=True):
+    if value in (None, ''):
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    try:
+        n = int(float(value)) if isinstance(value, (int, float)) else int(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+    if not low <= n <= high:
+        raise ValueError(f"{field} must be between {low} and {high}")
+    return n
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def parse_row(row):
+    """Validate one normalized row; returns the field values or raises ValueError"""
+    if row is None:
+        raise ValueError("Row must be an object")
+    status = _text(row.get('status')).strip().lower() or 'draft'
+    if status not in INGEST_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(INGEST_STATUSES)}")
+    tags = row.get('tags')
+    if isinstance(tags, list):
+        tags = [str(t).strip() for t in tags if str(t).strip()]
+    else:
+        tags = [t.strip() for t in _text(tags).split(',') if t.strip()]
+    return {
+        'week': _int(row.get('week'), 'week', 1, 53),
+        'year': _int(row.get('year'), 'year', 1970, 9999),
+        'month': _int(row.get('month'), 'month', 1, 12, required=False),
+        'achievements': _text(row.get('achievements')),
+        'challenges': _text(row.get('challenges')),
+        'next_week_plan': _text(row.get('next_week_plan')),
+        'status': status,
+        'tags': tags,
+    }
+
+
+class _Owners:
+    """Resolves the owner of each row. Non-admins always import as themselves;
+    admins may name another user by user_id or user_email (looked up once)."""
+
+    def __init__(self, current_user):
+        self.current_user = current_user
+        self.is_admin = current_user.get('role') == 'admin'
+        self._by_key = {}
+
+    def resolve(self, row):
+        uid, email = _text(row.get('user_id')).strip(), _text(row.get('user_email')).strip().lower()
+        if not self.is_admin or not (uid or email):
+            return self.current_user
+        key = ('id', uid) if uid else ('email', email)
+        if key not in self._by_key:
+            if uid:
+                query = {'_id': ObjectId(uid)} if ObjectId.is_valid(uid) else None
+            else:
+                query = {'email': email}
+            self._by_key[key] = mongo.db.users.find_one(query, {'department': 1}) if query else None
+        user = self._by_key[key]
+        if not user:
+            raise ValueError(f"Unknown user {uid or email}")
+        return user
+
+
+def ingest(current_user, rows):
+    """Validate and insert rows from one of the iter_* readers.
+
+    Returns a summary dict: created/failed counts, inserted ids and per-row
+    errors ({row, error}).
+    """
+    owners = _Owners(current_user)
+    deltas = Counter()
+    owner_ids = set()
+    summary = {'created': 0, 'failed': 0, 'ids': [], 'errors': []}
+    batch = []
+
+    def fail(number, message):
+        summary['failed'] += 1
+        if len(summary['errors']) < INGEST_MAX_ERRORS:
+            summary['errors'].append({'row': number, 'error': message})
+
+    def flush():
+        docs = [doc for _, doc, _ in batch]
+        try:
+            mongo.db.reports.insert_many(docs, ordered=False)
+            failed = {}
+        except BulkWriteError as e:
+            failed = {w['index']: w.get('errmsg', 'Insert failed') for w in e.details.get('writeErrors', [])}
+        for index, (number, doc, department) in enumerate(batch):
+            if index in failed:
+                fail(number, failed[index])
+                continue
+            summary['created'] += 1
+            summary['ids'].append(str(doc['_id']))
+            deltas[report_stats.bucket(doc, department)] += 1
+            owner_ids.add(doc['user_id'])
+        batch.clear()
+
+    seen = 0
+    try:
+        for number, row in rows:
+            seen += 1
+            if seen > INGEST_MAX_ROWS:
+                fail(number, f"Too many rows (max {INGEST_MAX_ROWS})")
+                break
+            try:
+                fields = parse_row(row)
+                owner = owners.resolve(row)
+            except ValueError as e:
+                fail(number, str(e))
+                continue
+            doc = Report(user_id=str(owner['_id']), **fields).to_document()
+            batch.append((number, doc, owner.get('department')))
+            if len(batch) >= INGEST_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+    finally:
+        # One bulk $inc for every stats bucket touched by this import, also
+        # for the batches already inserted when the file turns out unreadable
+        report_stats.apply(deltas)
+        if owner_ids:
+            revisions.bump(owner_ids)
+    return summary
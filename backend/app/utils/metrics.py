@@ -0,0 +1,319 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from flask import g, request
+from pymongo import monitoring
+
+from app.utils.identity import identity_cache
+
+# Request and MongoDB command metrics in Prometheus text format (/api/metrics).
+# A pymongo CommandListener times every command per collection; request hooks
+# time every endpoint and count the commands it issued, so N+1 query patterns
+# show up in mongo_queries_per_request.
+#
+# Each process keeps its own registry. Under gunicorn, set METRICS_DIR to a
+# directory shared by the workers: every worker writes a snapshot there every
+# METRICS_FLUSH_SECONDS and /api/metrics adds them all up. Snapshots of
+# workers that have exited are folded into one file so their counts remain.
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+ARCHIVE_FILE = 'archive.json'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by endpoint, method and status', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency by endpoint', LATENCY_BUCKETS),
+    'mongo_queries_per_request': ('histogram', 'MongoDB commands issued while handling a request', QUERY_BUCKETS),
+    'mongo_command_duration_seconds': ('histogram', 'MongoDB command latency by collection', LATENCY_BUCKETS),
+    'mongo_command_errors_total': ('counter', 'Failed MongoDB commands by collection', None),
+    'mongo_documents_returned_total': ('counter', 'Documents returned by MongoDB commands by collection', None),
+    'identity_cache_hits_total': ('counter', 'Identity cache hits', None),
+    'identity_cache_misses_total': ('counter', 'Identity cache misses', None),
+    'identity_cache_evictions_total': ('counter', 'Identity cache evictions', None),
+    'identity_cache_entries': ('gauge', 'Users held in the identity cache', None),
+}
+
+
+class Registry:
+    """Counters, gauges and histograms keyed by (name, sorted label pairs)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {}      # counters and gauges: key -> value
+        self.histograms = {}  # key -> [per-bucket counts..., +Inf count, sum]
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def inc(self, name, labels=None, value=1):
+        key = self._key(name, labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = self._key(name, labels)
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [0] * (len(buckets) + 2)
+            i = 0
+            while i < len(buckets) and value > buckets[i]:
+                i += 1
+            h[i] += 1
+            h[-1] += value
+
+    def snapshot(self):
+        """JSON-serializable copy (see merge)"""
+        with self._lock:
+            return {
+                'values': [[name, list(labels), v] for (name, labels), v in self.values.items()],
+                'histograms': [[name, list(labels), list(h)] for (name, labels), h in self.histograms.items()],
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for name, labels, v in snapshot.get('values', []):
+                key = (name, tuple(tuple(p) for p in labels))
+                self.values[key] = self.values.get(key, 0) + v
+            for name, labels, h in snapshot.get('histograms', []):
+                key = (name, tuple(tuple(p) for p in labels))
+                mine = self.histograms.get(key)
+                self.histograms[key] = list(h) if mine is None else [a + b for a, b in zip(mine, h)]
+
+
+registry = Registry()
+_local = threading.local()
+
+
+def _collection(event):
+    """Collection a command ran against ('' for database/admin commands)"""
+    target = event.command.get(event.command_name)
+    if event.command_name == 'getMore':
+        target = event.command.get('collection')
+    return target if isinstance(target, str) else ''
+
+
+def _returned(reply):
+    cursor = reply.get('cursor')
+    if isinstance(cursor, dict):
+        return len(cursor.get('firstBatch') or cursor.get('nextBatch') or [])
+    if 'value' in reply:  # findAndModify
+        return 1 if reply['value'] else 0
+    return 0
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times MongoDB commands; pass to the client via event_listeners"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections = {}
+
+    def started(self, event):
+        # Commands run on the calling thread, so this is the request that issued it
+        if getattr(_local, 'queries', None) is not None:
+            _local.queries += 1
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = _collection(event)
+
+    def _finish(self, event):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), '')
+        labels = {'collection': collection, 'command': event.command_name}
+        registry.observe('mongo_command_duration_seconds', labels, event.duration_micros / 1e6)
+        return labels
+
+    def succeeded(self, event):
+        labels = self._finish(event)
+        returned = _returned(event.reply)
+        if returned:
+            registry.inc('mongo_documents_returned_total', {'collection': labels['collection']}, returned)
+
+    def failed(self, event):
+        registry.inc('mongo_command_errors_total', self._finish(event))
+
+
+command_listener = CommandMetrics()
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    _local.queries = 0
+
+
+def _after_request(response):
+    started = g.pop('metrics_started', None)
+    queries, _local.queries = getattr(_local, 'queries', None), None
+    if started is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    registry.inc('http_requests_total', {'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)})
+    registry.observe('http_request_duration_seconds', {'endpoint': endpoint}, time.perf_counter() - started)
+    if queries is not None:
+        registry.observe('mongo_queries_per_request', {'endpoint': endpoint}, queries)
+    return response
+
+
+def _snapshot():
+    """This process's metrics, including the identity cache counters"""
+    snap = registry.snapshot()
+    stats = identity_cache.stats()
+    snap['values'] += [
+        ['identity_cache_hits_total', [], stats['hits']],
+        ['identity_cache_misses_total', [], stats['misses']],
+        ['identity_cache_evictions_total', [], stats['evictions']],
+        ['identity_cache_entries', [], stats['size']],
+    ]
+    return snap
+
+
+def _write_snapshot():
+    path = os.path.join(METRICS_DIR, f'{os.getpid()}.json')
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(_snapshot(), f)
+    os.replace(tmp, path)
+
+
+class MetricsFlusher(threading.Thread):
+    def __init__(self):
+        super().__init__(name='metrics-flusher', daemon=True)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(METRICS_FLUSH_SECONDS):
+            try:
+                _write_snapshot()
+            except OSError:
+                pass
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        self.join(timeout)
+        try:
+            _write_snapshot()
+        except OSError:
+            pass
+
+
+_flusher = None
+
+
+def init_app(app):
+    """Register the request hooks and, with METRICS_DIR, start the snapshot writer"""
+    global _flusher
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    if METRICS_DIR and _flusher is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _flusher = MetricsFlusher()
+        _flusher.start()
+        atexit.register(_flusher.stop)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _fold_dead_workers():
+    """Merge snapshots of exited workers into the archive and remove them"""
+    import fcntl
+
+    with open(os.path.join(METRICS_DIR, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = Registry()
+        archive.merge(_load(os.path.join(METRICS_DIR, ARCHIVE_FILE)) or {})
+        dead = []
+        for path in glob.glob(os.path.join(METRICS_DIR, '[0-9]*.json')):
+            pid = int(os.path.basename(path).split('.')[0])
+            if not _alive(pid):
+                archive.merge(_load(path) or {})
+                dead.append(path)
+        if not dead:
+            return
+        snap = archive.snapshot()
+        # Gauges of exited workers are not carried over
+        snap['values'] = [v for v in snap['values'] if METRICS.get(v[0], ('counter',))[0] != 'gauge']
+        tmp = os.path.join(METRICS_DIR, ARCHIVE_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(snap, f)
+        os.replace(tmp, os.path.join(METRICS_DIR, ARCHIVE_FILE))
+        for path in dead:
+            os.remove(path)
+
+
+def collect():
+    """Registry with this process's metrics plus, with METRICS_DIR, every other worker's"""
+    merged = Registry()
+    merged.merge(_snapshot())
+    if METRICS_DIR and os.path.isdir(METRICS_DIR):
+        _fold_dead_workers()
+        own = f'{os.getpid()}.json'
+        for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+            if os.path.basename(path) != own:
+                merged.merge(_load(path) or {})
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(reg):
+    """Prometheus text exposition (version 0.0.4) of a registry"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        if kind == 'histogram':
+            series = sorted((labels, h) for (n, labels), h in reg.histograms.items() if n == name)
+        else:
+            series = sorted((labels, v) for (n, labels), v in reg.values.items() if n == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + (float('inf'),), value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
@@ -4,15 +4,88 @@ from email.message import EmailMessage
 import json
 import urllib.request
 
+
+def smtp_settings():
+    return {
+        'host': os.getenv('SMTP_HOST'),
+        'port': int(os.getenv('SMTP_PORT', '587')),
+        'user': os.getenv('SMTP_USER'),
+        'password': os.getenv('SMTP_PASS'),
+        'from': os.getenv('SMTP_FROM', os.getenv('SMTP_USER')),
+        # Local relays and test servers (e.g. aiosmtpd) speak plain SMTP without auth
+        'starttls': os.getenv('SMTP_STARTTLS', 'true').lower() == 'true',
+        'timeout': float(os.getenv('SMTP_TIMEOUT', '30')),
+    }
+
+
+def email_dev_mode():
+    return os.getenv('EMAIL_DEV_MODE', 'false').lower() == 'true'
+
+
+def email_configured():
+    """True when an SMTP host is set (credentials are optional)"""
+    return bool(smtp_settings()['host'])
+
+
+def build_message(from_email, to_email, subject, body):
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg.set_content(body)
+    return msg
+
+
+class SMTPSession:
+    """One SMTP connection (STARTTLS + login done once) reused for many messages.
+
+    Connects lazily on the first send and reconnects once if the server has
+    dropped the connection in between. Use as a context manager.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or smtp_settings()
+        self._conn = None
+
+    def _connect(self):
+        s = self.settings
+        conn = smtplib.SMTP(s['host'], s['port'], timeout=s['timeout'])
+        if s['starttls']:
+            conn.starttls()
+        if s['user'] and s['password']:
+            conn.login(s['user'], s['password'])
+        self._conn = conn
+
+    def send(self, to_email, subject, body):
+        msg = build_message(self.settings['from'], to_email, subject, body)
+        if self._conn is None:
+            self._connect()
+        try:
+            self._conn.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._conn = None
+            self._connect()
+            self._conn.send_message(msg)
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except Exception:
+                pass
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 def send_email(to_email, subject, body):
-    smtp_host = os.getenv('SMTP_HOST')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER')
-    smtp_pass = os.getenv('SMTP_PASS')
-    from_email = os.getenv('SMTP_FROM', smtp_user)
-    dev_mode = (os.getenv('EMAIL_DEV_MODE', 'false').lower() == 'true')
-
-    if not smtp_host or not smtp_user or not smtp_pass:
+    dev_mode = email_dev_mode()
+
+    if not email_configured():
         # SMTP not configured. In dev mode, log and return success.
         if dev_mode:
             try:
@@ -22,17 +95,9 @@ def send_email(to_email, subject, body):
             return True
         return False
 
-    msg = EmailMessage()
-    msg['Subject'] = subject
-    msg['From'] = from_email
-    msg['To'] = to_email
-    msg.set_content(body)
-
     try:
-        with smtplib.SMTP(smtp_host, smtp_port) as s:
-            s.starttls()
-            s.login(smtp_user, smtp_pass)
-            s.send_message(msg)
+        with SMTPSession() as session:
+            session.send(to_email, subject, body)
         return True
     except Exception:
         if dev_mode:
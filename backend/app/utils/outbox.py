@@ -0,0 +1,248 @@
+import atexit
+import datetime
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from app import mongo
+from app.utils.notifications import SMTPSession, email_configured, email_dev_mode, send_slack
+
+# Routes enqueue notifications into notification_outbox and return; a worker
+# thread per process drains it, sending a batch of emails over one SMTP
+# session and retrying failures with exponential backoff. Emails queued with
+# a group (reminders use the department) get one session per group, and
+# groups are sent in parallel.
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_POLL_SECONDS = float(os.getenv('OUTBOX_POLL_SECONDS', '2'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '6'))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv('OUTBOX_BACKOFF_SECONDS', '30'))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv('OUTBOX_MAX_BACKOFF_SECONDS', '3600'))
+OUTBOX_RETENTION_HOURS = float(os.getenv('OUTBOX_RETENTION_HOURS', '72'))
+# A claimed message not finished within the lease is picked up again
+OUTBOX_LEASE_SECONDS = 300
+OUTBOX_SMTP_SESSIONS = int(os.getenv('OUTBOX_SMTP_SESSIONS', os.getenv('REMINDER_DEPARTMENT_CONCURRENCY', '4')))
+
+_wakeup = threading.Event()
+_worker = None
+# kind -> hook(msg, status, error), called once a message of that kind is
+# sent or has failed for good (see on_settled)
+_settle_hooks = {}
+
+
+def ensure_indexes():
+    mongo.db.notification_outbox.create_index([('status', 1), ('next_attempt_at', 1)])
+    # Delivered and permanently failed messages are kept for a while, then dropped
+    mongo.db.notification_outbox.create_index('done_at', expireAfterSeconds=int(OUTBOX_RETENTION_HOURS * 3600))
+
+
+def _document(channel, payload, kind=None, message_id=None, group=None):
+    now = datetime.datetime.utcnow()
+    doc = {
+        'channel': channel,
+        'payload': payload,
+        'status': 'pending',
+        'attempts': 0,
+        'next_attempt_at': now,
+        'created_at': now
+    }
+    if kind:
+        doc['kind'] = kind
+    if message_id is not None:
+        doc['_id'] = message_id
+    if group is not None:
+        doc['group'] = group
+    return doc
+
+
+def _enqueue(channel, payload):
+    result = mongo.db.notification_outbox.insert_one(_document(channel, payload))
+    _wakeup.set()
+    return result.inserted_id
+
+
+def enqueue_email(to_email, subject, body):
+    return _enqueue('email', {'to': to_email, 'subject': subject, 'body': body})
+
+
+def enqueue_emails(messages, kind):
+    """Queue many emails with one insert. `messages` are (message_id,
+    to_email, subject, body, group) tuples; ids already in the outbox are
+    skipped, so a caller can safely queue the same batch again."""
+    docs = [
+        _document('email', {'to': to, 'subject': subject, 'body': body}, kind, message_id, group)
+        for message_id, to, subject, body, group in messages
+    ]
+    if not docs:
+        return
+    try:
+        mongo.db.notification_outbox.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+            raise
+    _wakeup.set()
+
+
+def enqueue_slack(message):
+    """Queue a Slack message; a no-op (returns None) without SLACK_WEBHOOK"""
+    if not os.getenv('SLACK_WEBHOOK'):
+        return None
+    return _enqueue('slack', {'text': message})
+
+
+def on_settled(kind, hook):
+    """Register hook(msg, status, error) for messages queued with `kind`;
+    status is 'sent' or 'failed' (retries exhausted or not retryable)"""
+    _settle_hooks[kind] = hook
+
+
+def _settled(msg, status, error):
+    hook = _settle_hooks.get(msg.get('kind'))
+    if hook is None:
+        return
+    try:
+        hook(msg, status, error)
+    except Exception as e:
+        # The message itself is settled; owners reconcile from the outbox
+        current_app.logger.warning('Outbox hook for %s failed: %s', msg['_id'], e)
+
+
+def _claim(now):
+    return mongo.db.notification_outbox.find_one_and_update(
+        {'$or': [
+            {'status': 'pending', 'next_attempt_at': {'$lte': now}},
+            {'status': 'sending', 'locked_until': {'$lt': now}}
+        ]},
+        {
+            '$set': {'status': 'sending', 'locked_until': now + datetime.timedelta(seconds=OUTBOX_LEASE_SECONDS)},
+            '$inc': {'attempts': 1}
+        },
+        sort=[('next_attempt_at', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _mark_sent(msg):
+    now = datetime.datetime.utcnow()
+    mongo.db.notification_outbox.update_one(
+        {'_id': msg['_id']},
+        {'$set': {'status': 'sent', 'sent_at': now, 'done_at': now}, '$unset': {'locked_until': ''}}
+    )
+    _settled(msg, 'sent', None)
+
+
+def _mark_failed(msg, error, retry=True):
+    now = datetime.datetime.utcnow()
+    if retry and msg['attempts'] < OUTBOX_MAX_ATTEMPTS:
+        delay = min(OUTBOX_BACKOFF_SECONDS * (2 ** (msg['attempts'] - 1)), OUTBOX_MAX_BACKOFF_SECONDS)
+        update = {'status': 'pending', 'next_attempt_at': now + datetime.timedelta(seconds=delay), 'last_error': error}
+    else:
+        update = {'status': 'failed', 'last_error': error, 'done_at': now}
+    mongo.db.notification_outbox.update_one({'_id': msg['_id']}, {'$set': update, '$unset': {'locked_until': ''}})
+    if update['status'] == 'failed':
+        _settled(msg, 'failed', error)
+
+
+def _deliver_emails(messages):
+    if not email_configured():
+        for msg in messages:
+            if email_dev_mode():
+                current_app.logger.info('[DEV EMAIL] %s', msg['payload'])
+                _mark_sent(msg)
+            else:
+                _mark_failed(msg, 'SMTP is not configured', retry=False)
+        return
+
+    groups = defaultdict(list)
+    for msg in messages:
+        groups[msg.get('group')].append(msg)
+    app = current_app._get_current_object()
+    if len(groups) == 1:
+        _send_group(app, messages)
+        return
+    workers = max(1, min(OUTBOX_SMTP_SESSIONS, len(groups)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='outbox-smtp') as pool:
+        futures = [pool.submit(_send_group, app, group) for group in groups.values()]
+        for f in futures:
+            f.result()
+
+
+def _send_group(app, messages):
+    with app.app_context(), SMTPSession() as session:
+        for msg in messages:
+            p = msg['payload']
+            try:
+                session.send(p['to'], p['subject'], p['body'])
+                _mark_sent(msg)
+            except Exception as e:
+                # Start the next message on a fresh connection
+                session.close()
+                if email_dev_mode():
+                    # As send_email does: in dev mode a failed send is logged, not retried
+                    current_app.logger.info('[DEV EMAIL - SMTP ERROR, LOGGING INSTEAD] %s (%s)', p, e)
+                    _mark_sent(msg)
+                else:
+                    _mark_failed(msg, str(e))
+
+
+def _deliver_slack(messages):
+    for msg in messages:
+        if not os.getenv('SLACK_WEBHOOK'):
+            _mark_failed(msg, 'SLACK_WEBHOOK is not configured', retry=False)
+        elif send_slack(msg['payload']['text']):
+            _mark_sent(msg)
+        else:
+            _mark_failed(msg, 'Slack webhook request failed')
+
+
+def drain(limit=OUTBOX_BATCH_SIZE):
+    """Deliver up to `limit` due messages; returns how many were processed.
+    Must run inside an app context."""
+    now = datetime.datetime.utcnow()
+    claimed = []
+    while len(claimed) < limit:
+        msg = _claim(now)
+        if not msg:
+            break
+        claimed.append(msg)
+    _deliver_emails([m for m in claimed if m['channel'] == 'email'])
+    _deliver_slack([m for m in claimed if m['channel'] == 'slack'])
+    return len(claimed)
+
+
+class OutboxWorker(threading.Thread):
+    def __init__(self, app):
+        super().__init__(name='notification-outbox', daemon=True)
+        self.app = app
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                with self.app.app_context():
+                    processed = drain()
+            except Exception as e:
+                self.app.logger.warning('Notification outbox drain failed: %s', e)
+                processed = 0
+            if processed < OUTBOX_BATCH_SIZE:
+                _wakeup.wait(OUTBOX_POLL_SECONDS)
+                _wakeup.clear()
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        _wakeup.set()
+        self.join(timeout)
+
+
+def start_worker(app):
+    """Start this process's outbox worker (once); disabled with OUTBOX_WORKER=false"""
+    global _worker
+    if _worker is not None or os.getenv('OUTBOX_WORKER', 'true').lower() != 'true':
+        return _worker
+    _worker = OutboxWorker(app)
+    _worker.start()
+    atexit.register(_worker.stop)
+    return _worker
@@ -0,0 +1,79 @@
+import base64
+import datetime
+import json
+from bson.objectid import ObjectId
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Newest first; _id breaks ties between documents created in the same millisecond
+KEYSET_SORT = [('created_at', -1), ('_id', -1)]
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor or limit is malformed"""
+
+
+def wants_page(args, limit_pages=True):
+    """List routes return a page envelope only when the client asks for one.
+
+    Routes whose `limit` predates paging (and so already meant "a list of N")
+    pass limit_pages=False; they page on `cursor` or `paginate=1` only.
+    """
+    if 'cursor' in args or args.get('paginate', '').lower() in ('1', 'true'):
+        return True
+    return limit_pages and 'limit' in args
+
+
+def parse_limit(args, default=DEFAULT_PAGE_SIZE, cap=MAX_PAGE_SIZE):
+    try:
+        limit = int(args.get('limit', default))
+    except (TypeError, ValueError):
+        raise CursorError("Invalid limit")
+    return max(1, limit if cap is None else min(limit, cap))
+
+
+def encode_cursor(doc):
+    """Opaque token for the (created_at, _id) position of `doc`"""
+    created_at = doc['created_at']
+    if isinstance(created_at, datetime.datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps({'c': created_at, 'i': str(doc['_id'])}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.datetime.fromisoformat(data['c']), ObjectId(data['i'])
+    except Exception:
+        raise CursorError("Invalid cursor")
+
+
+def after_cursor(query, token):
+    """Restrict `query` to documents that sort strictly after the cursor position"""
+    if not token:
+        return query
+    created_at, oid = decode_cursor(token)
+    # The $lte bound lets the created_at index do the range scan; the $or only
+    # has to disambiguate documents sharing the boundary timestamp.
+    keyset = {
+        'created_at': {'$lte': created_at},
+        '$or': [{'created_at': {'$lt': created_at}}, {'_id': {'$lt': oid}}]
+    }
+    if not query:
+        return keyset
+    return {'$and': [query, keyset]}
+
+
+def fetch_page(collection, query, args, projection=None):
+    """Run a keyset-paginated find and return (documents, next_cursor)"""
+    limit = parse_limit(args)
+    query = after_cursor(query, args.get('cursor'))
+    docs = list(collection.find(query, projection).sort(KEYSET_SORT).limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1])
+    return docs, next_cursor
@@ -0,0 +1,100 @@
+import os
+from flask import current_app
+
+# Bump whenever the layout below changes so cached renders are not reused
+TEMPLATE_VERSION = '1'
+
+
+class PdfDependencyError(RuntimeError):
+    """Raised when reportlab is not installed"""
+
+
+def logo_path():
+    return os.getenv('PDF_LOGO_PATH', os.path.abspath(os.path.join(current_app.root_path, 'static', 'logo.png')))
+
+
+def render_report_pdf(report, out):
+    """Render a hydrated report (see Report.to_dict) as PDF into the file-like `out`."""
+    try:
+        # Pylance sometimes cannot resolve binary-only packages in the editor
+        # even when they are installed at runtime. Silence the unresolved-import
+        # diagnostic while keeping the runtime import behavior.
+        from reportlab.lib.pagesizes import letter  # type: ignore[import]
+    except Exception:
+        raise PdfDependencyError("PDF generation dependencies missing (reportlab).")
+
+    # Use Platypus for a clean layout with tables
+    from reportlab.lib import colors  # type: ignore[import]
+    from reportlab.lib.styles import getSampleStyleSheet  # type: ignore[import]
+    from reportlab.platypus import SimpleDocTemplate, Image as RLImage, Paragraph, Spacer, Table, TableStyle  # type: ignore[import]
+
+    doc = SimpleDocTemplate(out, pagesize=letter, leftMargin=50, rightMargin=50, topMargin=50, bottomMargin=50)
+    styles = getSampleStyleSheet()
+    story = []
+
+    BRAND_COLOR = colors.HexColor('#6366F1')
+
+    # Logo centered
+    path = logo_path()
+    if os.path.isfile(path):
+        img = RLImage(path, width=120, height=40, kind='proportional')
+        img.hAlign = 'LEFT'
+        story.append(img)
+        story.append(Spacer(1, 8))
+
+    # Title
+    title_style = styles['Title']
+    title_style.textColor = BRAND_COLOR
+    title = Paragraph(f"<b>Weekly Report — Week {report.get('week')} {report.get('year')}</b>", title_style)
+    story.append(title)
+
+    story.append(Spacer(1, 6))
+
+    # Info tables
+    user = report.get('user', {})
+    info_data = [
+        ['Report ID', str(report.get('_id'))],
+        ['Name', user.get('name', '')],
+        ['Username', user.get('username', '-')],
+        ['Email', user.get('email', '')],
+        ['Department', user.get('department', '-')],
+        ['Status', report.get('status')],
+        ['Created', str(report.get('created_at'))],
+        ['Submitted', str(report.get('submitted_at') or '-')],
+    ]
+    table = Table(info_data, colWidths=[110, 380])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), BRAND_COLOR),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('TEXTCOLOR', (0,1), (-1,-1), colors.black),
+        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+        ('FONTSIZE', (0,0), (-1,-1), 9),
+        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+        ('BACKGROUND', (0,1), (0,-1), colors.HexColor('#F3F4F6')),
+    ]))
+    story.append(table)
+    story.append(Spacer(1, 10))
+
+    # Long text sections as bordered tables
+    def section_table(title: str, text: str):
+        para = Paragraph(text.replace('\n', '<br/>') if text else '-', styles['BodyText'])
+        t = Table([[Paragraph(f'<b>{title}</b>', styles['BodyText'])], [para]], colWidths=[490])
+        t.setStyle(TableStyle([
+            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+            ('BACKGROUND', (0,0), (-1,0), BRAND_COLOR),
+            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+            ('FONTSIZE', (0,0), (-1,-1), 9),
+        ]))
+        return t
+
+    story.append(section_table('Achievements', report.get('achievements')))
+    story.append(Spacer(1, 6))
+    story.append(section_table('Challenges', report.get('challenges')))
+    story.append(Spacer(1, 6))
+    story.append(section_table("Next Week's Plan", report.get('next_week_plan')))
+    story.append(Spacer(1, 6))
+    tags_str = ', '.join(report.get('tags') or [])
+    story.append(section_table('Tags', tags_str))
+
+    doc.build(story)
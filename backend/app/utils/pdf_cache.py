@@ -0,0 +1,117 @@
+import glob
+import hashlib
+import os
+import threading
+import uuid
+from flask import current_app
+
+from app.utils.pdf import TEMPLATE_VERSION, logo_path, render_report_pdf
+
+PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+_template_lock = threading.Lock()
+_template_cache = {}  # (logo path, mtime, size) -> hash
+
+
+def cache_dir():
+    path = os.getenv('PDF_CACHE_DIR', os.path.abspath(os.path.join(current_app.root_path, '..', 'pdf_cache')))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def template_hash():
+    """Hash of everything outside the report that changes the rendered PDF"""
+    path = logo_path()
+    try:
+        st = os.stat(path)
+        stamp = (path, st.st_mtime, st.st_size)
+    except OSError:
+        stamp = (path, None, None)
+    with _template_lock:
+        cached = _template_cache.get(stamp)
+        if cached:
+            return cached
+        h = hashlib.sha256(TEMPLATE_VERSION.encode('utf-8'))
+        if stamp[1] is not None:
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        _template_cache.clear()
+        _template_cache[stamp] = h.hexdigest()
+        return _template_cache[stamp]
+
+
+def version_stamp(report):
+    """Last time the report content changed"""
+    return report.get('updated_at') or report.get('submitted_at') or report.get('created_at')
+
+
+def cache_key(report):
+    """Content address of the rendered PDF: report version, owner details and template"""
+    user = report.get('user') or {}
+    parts = [
+        str(report['_id']),
+        str(version_stamp(report)),
+        template_hash(),
+        user.get('name') or '', user.get('username') or '', user.get('email') or '', user.get('department') or ''
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def open_pdf(report, key=None):
+    """Return an open binary file with the rendered PDF, rendering on a miss"""
+    key = key or cache_key(report)
+    directory = cache_dir()
+    path = os.path.join(directory, f"{report['_id']}-{key}.pdf")
+    try:
+        f = open(path, 'rb')
+        # Hits refresh the mtime, which is what LRU eviction orders by
+        os.utime(path)
+        return f
+    except FileNotFoundError:
+        pass
+
+    tmp = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp, 'wb') as out:
+            render_report_pdf(report, out)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    f = open(path, 'rb')
+    evict()
+    return f
+
+
+def invalidate(report_id):
+    """Drop every cached render of a report"""
+    for path in glob.glob(os.path.join(cache_dir(), f"{report_id}-*.pdf")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def evict(max_bytes=None):
+    """Delete least recently used renders until the cache fits in max_bytes"""
+    max_bytes = PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    for path in glob.glob(os.path.join(cache_dir(), '*.pdf')):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
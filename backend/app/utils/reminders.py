@@ -0,0 +1,228 @@
+import datetime
+import os
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from app import mongo
+from app.utils.outbox import OUTBOX_RETENTION_HOURS, enqueue_emails, enqueue_slack, on_settled
+
+# Reports in these states count as "submitted" for the week
+DONE_STATUSES = ['submitted', 'approved', 'rejected']
+
+# Reminder emails go through the notification outbox, one message per
+# delivery row (sharing its _id) grouped by department: departments are sent
+# in parallel, each over its own SMTP session (OUTBOX_SMTP_SESSIONS, which
+# defaults to REMINDER_DEPARTMENT_CONCURRENCY), with the outbox's retries,
+# backoff and lease recovery. The outbox reports each settled message back
+# here; a run is done once no delivery is pending.
+REMINDER_KIND = 'reminder'
+REMINDER_CHUNK_SIZE = int(os.getenv('REMINDER_CHUNK_SIZE', '50'))
+# Runs still going after this long are reconciled against the outbox in case
+# the process that started them, or a settle hook, died part way
+REMINDER_RECONCILE_SECONDS = int(os.getenv('REMINDER_RECONCILE_SECONDS', '300'))
+
+
+def ensure_indexes():
+    mongo.db.reminder_deliveries.create_index([('run_id', 1), ('status', 1)])
+    mongo.db.reminder_runs.create_index([('status', 1), ('created_at', 1)])
+
+
+def missing_reporters(iso_year, iso_week):
+    """Users without a submitted report for the ISO week, as one anti-join"""
+    pipeline = [
+        {'$project': {'name': 1, 'email': 1, 'department': 1}},
+        {'$lookup': {
+            'from': 'reports',
+            'let': {'uid': '$_id'},
+            'pipeline': [
+                {'$match': {
+                    '$expr': {'$eq': ['$user_id', '$$uid']},
+                    # Older reports may still hold week/year as strings
+                    'year': {'$in': [iso_year, str(iso_year)]},
+                    'week': {'$in': [iso_week, str(iso_week)]},
+                    'status': {'$in': DONE_STATUSES}
+                }},
+                {'$limit': 1},
+                {'$project': {'_id': 1}}
+            ],
+            'as': 'done'
+        }},
+        {'$match': {'done': {'$size': 0}}},
+        {'$project': {'done': 0}}
+    ]
+    return list(mongo.db.users.aggregate(pipeline))
+
+
+def start_run(created_by, iso_year, iso_week):
+    """Record a reminder run with one delivery row per recipient and queue
+    the emails in the outbox. Returns the run document."""
+    recover_stale_runs()
+    users = missing_reporters(iso_year, iso_week)
+    now = datetime.datetime.utcnow()
+    run = {
+        'year': iso_year,
+        'week': iso_week,
+        'created_by': ObjectId(str(created_by)),
+        'created_at': now,
+        'status': 'running',
+        'total': len(users),
+        'sent': 0,
+        'failed': 0,
+        'skipped': 0
+    }
+    run['_id'] = mongo.db.reminder_runs.insert_one(run).inserted_id
+
+    deliveries = [{
+        '_id': ObjectId(),
+        'run_id': run['_id'],
+        'user_id': u['_id'],
+        'name': u.get('name', ''),
+        'email': u.get('email'),
+        'department': u.get('department'),
+        'status': 'pending' if u.get('email') else 'skipped'
+    } for u in users]
+    if deliveries:
+        mongo.db.reminder_deliveries.insert_many(deliveries)
+    _enqueue(run, [d for d in deliveries if d['status'] == 'pending'])
+    _finish_if_complete(run['_id'])
+    return run
+
+
+def _message(delivery, iso_year, iso_week):
+    subject = f"Reminder: Weekly report for ISO week {iso_week} ({iso_year})"
+    body = (
+        f"Hi {delivery.get('name', '')},\n\n"
+        f"This is a friendly reminder to submit your weekly report for ISO week {iso_week} ({iso_year}).\n"
+        f"Please visit the dashboard to create or submit your report.\n\n"
+        f"Thanks!"
+    )
+    return subject, body
+
+
+def _enqueue(run, deliveries):
+    messages = [
+        (d['_id'], d['email']) + _message(d, run['year'], run['week']) + (d.get('department'),)
+        for d in deliveries
+    ]
+    for i in range(0, len(messages), REMINDER_CHUNK_SIZE):
+        enqueue_emails(messages[i:i + REMINDER_CHUNK_SIZE], REMINDER_KIND)
+
+
+def delivery_counts(run_id):
+    counts = {'sent': 0, 'failed': 0, 'skipped': 0, 'pending': 0}
+    pipeline = [
+        {'$match': {'run_id': run_id}},
+        {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+    ]
+    for g in mongo.db.reminder_deliveries.aggregate(pipeline):
+        counts[g['_id']] = g['count']
+    return counts
+
+
+def _finish_if_complete(run_id):
+    if mongo.db.reminder_deliveries.find_one({'run_id': run_id, 'status': 'pending'}, {'_id': 1}):
+        return
+    counts = delivery_counts(run_id)
+    run = mongo.db.reminder_runs.find_one_and_update(
+        {'_id': run_id, 'status': 'running'},
+        {'$set': {
+            'status': 'done',
+            'finished_at': datetime.datetime.utcnow(),
+            'sent': counts['sent'],
+            'failed': counts['failed'],
+            'skipped': counts['skipped']
+        }}
+    )
+    # Only the caller that closed the run announces it
+    if not run:
+        return
+    if run['total']:
+        enqueue_slack(f"Sent weekly report reminders to {run['total']} user(s) for week {run['week']} {run['year']}.")
+    else:
+        enqueue_slack(f"No reminders needed: all users submitted for week {run['week']} {run['year']}.")
+
+
+def _delivery_settled(msg, status, error):
+    """Outbox hook: record the outcome of one reminder email"""
+    delivery = mongo.db.reminder_deliveries.find_one_and_update(
+        {'_id': msg['_id'], 'status': 'pending'},
+        {'$set': {'status': status, 'error': error, 'finished_at': datetime.datetime.utcnow()}}
+    )
+    if delivery:
+        _finish_if_complete(delivery['run_id'])
+
+
+on_settled(REMINDER_KIND, _delivery_settled)
+
+
+def reconcile(run):
+    """Bring a running run up to date with the outbox: settle deliveries whose
+    message finished without the hook running, and queue those whose message
+    never made it into the outbox"""
+    pending = list(mongo.db.reminder_deliveries.find({'run_id': run['_id'], 'status': 'pending'}))
+    messages = {
+        m['_id']: m for m in mongo.db.notification_outbox.find(
+            {'_id': {'$in': [d['_id'] for d in pending]}}, {'status': 1, 'last_error': 1}
+        )
+    }
+    now = datetime.datetime.utcnow()
+    # Settled messages are dropped after the retention window, so a missing
+    # message for an older run may already have been sent
+    lost_after = run['created_at'] + datetime.timedelta(hours=OUTBOX_RETENTION_HOURS)
+    ops, missing = [], []
+    for d in pending:
+        m = messages.get(d['_id'])
+        if m is None and now > lost_after:
+            ops.append(UpdateOne({'_id': d['_id'], 'status': 'pending'}, {'$set': {
+                'status': 'failed', 'error': 'Delivery state was lost', 'finished_at': now
+            }}))
+        elif m is None:
+            missing.append(d)
+        elif m['status'] in ('sent', 'failed'):
+            ops.append(UpdateOne({'_id': d['_id'], 'status': 'pending'}, {'$set': {
+                'status': m['status'], 'error': m.get('last_error') if m['status'] == 'failed' else None,
+                'finished_at': now
+            }}))
+    if ops:
+        mongo.db.reminder_deliveries.bulk_write(ops, ordered=False)
+    _enqueue(run, missing)
+    _finish_if_complete(run['_id'])
+
+
+def recover_stale_runs(run=None):
+    """Reconcile runs (or just `run`) that have been running for a while"""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=REMINDER_RECONCILE_SECONDS)
+    if run is not None:
+        runs = [run] if run['status'] == 'running' and run['created_at'] < cutoff else []
+    else:
+        runs = mongo.db.reminder_runs.find({'status': 'running', 'created_at': {'$lt': cutoff}})
+    for r in runs:
+        reconcile(r)
+
+
+def run_to_dict(run, deliveries):
+    # Counts are stored when the run finishes and derived until then
+    counts = delivery_counts(run['_id']) if run['status'] == 'running' else {
+        'sent': run['sent'], 'failed': run['failed'], 'skipped': run['skipped'],
+        'pending': run['total'] - run['sent'] - run['failed'] - run['skipped']
+    }
+    return {
+        'run_id': str(run['_id']),
+        'week': run['week'],
+        'year': run['year'],
+        'status': run['status'],
+        'created_at': run['created_at'],
+        'finished_at': run.get('finished_at'),
+        'total': run['total'],
+        'sent': counts['sent'],
+        'failed': counts['failed'],
+        'skipped': counts['skipped'],
+        'pending': counts['pending'],
+        'recipients': [{
+            'user_id': str(d['user_id']),
+            'email': d.get('email'),
+            'department': d.get('department'),
+            'status': d['status'],
+            'error': d.get('error')
+        } for d in deliveries]
+    }
@@ -0,0 +1,155 @@
+import datetime
+from collections import Counter, defaultdict
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from app import mongo
+from app.models.report import Report
+from app.utils import pdf_cache, revisions
+from app.utils import stats as report_stats
+from app.utils.audit import log_action
+from app.utils.outbox import enqueue_email, enqueue_slack
+
+MAX_BULK_REVIEW = 500
+
+# action in the request -> resulting report status
+REVIEW_ACTIONS = {'approve': 'approved', 'reject': 'rejected'}
+
+
+class ReviewError(ValueError):
+    """Raised when a bulk review request is malformed as a whole"""
+
+
+def parse_items(data):
+    """Validate {items: [{id, action, comment}], comment?} into a list of item
+    dicts. Items that cannot be applied carry an 'error' instead of failing
+    the whole request."""
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ReviewError("items must be a non-empty list")
+    if len(items) > MAX_BULK_REVIEW:
+        raise ReviewError(f"At most {MAX_BULK_REVIEW} items per request")
+
+    default_comment = data.get('comment')
+    parsed = []
+    seen = set()
+    for raw in items:
+        raw = raw if isinstance(raw, dict) else {}
+        item = {
+            'id': str(raw.get('id') or ''),
+            'action': raw.get('action'),
+            'comment': raw.get('comment') or default_comment
+        }
+        if not ObjectId.is_valid(item['id']):
+            item['error'] = "Invalid report id"
+        elif item['action'] not in REVIEW_ACTIONS:
+            item['error'] = "action must be 'approve' or 'reject'"
+        elif item['action'] == 'reject' and not item['comment']:
+            item['error'] = "Rejection requires a comment"
+        elif item['id'] in seen:
+            item['error'] = "Duplicate report id"
+        seen.add(item['id'])
+        parsed.append(item)
+    return parsed
+
+
+def bulk_review(reviewer, items):
+    """Apply approve/reject items with one bulk_write.
+
+    Each update only matches a report that is still submitted and pushes an
+    approval entry tagged with this batch's id; one read afterwards tells
+    which items took effect. Returns (batch_id, results).
+    """
+    batch_id = str(ObjectId())
+    now = datetime.datetime.utcnow()
+    valid = [i for i in items if 'error' not in i]
+    ops = [
+        UpdateOne(
+            {'_id': ObjectId(i['id']), 'status': 'submitted'},
+            {
+                '$set': {'status': REVIEW_ACTIONS[i['action']], 'updated_at': now},
+                '$inc': {'rev': 1},
+                '$push': {'approvals': {
+                    'by': str(reviewer['_id']),
+                    'action': REVIEW_ACTIONS[i['action']],
+                    'comment': i['comment'],
+                    'at': now,
+                    'batch': batch_id
+                }}
+            }
+        )
+        for i in valid
+    ]
+    if ops:
+        mongo.db.reports.bulk_write(ops, ordered=False)
+
+    ids = [ObjectId(i['id']) for i in valid]
+    docs = {
+        str(d['_id']): d
+        for d in mongo.db.reports.find(
+            {'_id': {'$in': ids}},
+            {'user_id': 1, 'week': 1, 'year': 1, 'status': 1, 'approvals': {'$elemMatch': {'batch': batch_id}}}
+        )
+    } if ids else {}
+
+    results = []
+    applied = []
+    for i in items:
+        result = {'id': i['id'], 'action': i['action']}
+        doc = docs.get(i['id'])
+        if 'error' in i:
+            result.update(ok=False, error=i['error'])
+        elif not doc:
+            result.update(ok=False, error="Report not found")
+        elif not doc.get('approvals'):
+            result.update(ok=False, status=doc.get('status'), error=f"Report is {doc.get('status')}, not submitted")
+        else:
+            result.update(ok=True, status=doc['status'])
+            applied.append((i, doc))
+        results.append(result)
+
+    if applied:
+        _after_review(reviewer, batch_id, applied)
+    return batch_id, results
+
+
+def _after_review(reviewer, batch_id, applied):
+    """Stats, cache, audit and one notification per owner for the applied items"""
+    owners = Report.load_users(doc['user_id'] for _, doc in applied)
+
+    deltas = Counter()
+    by_owner = defaultdict(list)
+    for item, doc in applied:
+        department = (owners.get(str(doc['user_id'])) or {}).get('department')
+        deltas[report_stats.bucket({**doc, 'status': 'submitted'}, department)] -= 1
+        deltas[report_stats.bucket(doc, department)] += 1
+        pdf_cache.invalidate(item['id'])
+        by_owner[str(doc['user_id'])].append((item, doc))
+        log_action(str(reviewer['_id']), item['action'], item['id'], {'comment': item['comment'], 'batch': batch_id})
+    report_stats.apply(deltas)
+    revisions.bump(by_owner)
+
+    for owner_id, reviewed in by_owner.items():
+        owner = owners.get(owner_id)
+        if not owner or not owner.get('email'):
+            continue
+        lines = [
+            f"- Week {doc.get('week')} ({doc.get('year')}): {doc['status']}" + (f" — {item['comment']}" if item['comment'] else "")
+            for item, doc in reviewed
+        ]
+        subject = f"{len(reviewed)} of your reports were reviewed" if len(reviewed) > 1 else \
+            f"Your report for week {reviewed[0][1].get('week')} has been {reviewed[0][1]['status']}"
+        body = f"Hi {owner.get('name') or ''},\n\n{reviewer.get('name')} reviewed your reports:\n\n" + "\n".join(lines)
+        try:
+            enqueue_email(owner['email'], subject, body)
+        except Exception:
+            pass
+
+    counts = Counter(doc['status'] for _, doc in applied)
+    try:
+        enqueue_slack(
+            f"{reviewer.get('name')} reviewed {len(applied)} report(s): "
+            f"{counts.get('approved', 0)} approved, {counts.get('rejected', 0)} rejected"
+        )
+    except Exception:
+        pass
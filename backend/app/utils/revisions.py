@@ -0,0 +1,42 @@
+import hashlib
+from pymongo import UpdateOne
+
+from app import mongo
+
+# Revision counters behind the ETags of the report read endpoints. Each report
+# carries a `rev` that its write paths $inc; the `revisions` collection holds
+# one counter per owner ('user:<id>') and a global one ('reports'). Every
+# report write calls bump() for the owners it touched after writing, and reads
+# take the counters *before* querying, so a tag can only be older than the
+# data it is sent with (costing one extra 200), never newer.
+GLOBAL_KEY = 'reports'
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def bump(user_ids):
+    """Advance the global revision and those of the given report owners"""
+    keys = [GLOBAL_KEY] + sorted({user_key(uid) for uid in user_ids if uid})
+    mongo.db.revisions.bulk_write(
+        [UpdateOne({'_id': key}, {'$inc': {'rev': 1}}, upsert=True) for key in keys],
+        ordered=False
+    )
+
+
+def bump_all():
+    """Advance every counter (maintenance commands that rewrite many reports)"""
+    mongo.db.revisions.update_many({}, {'$inc': {'rev': 1}})
+    bump([])
+
+
+def current(*keys):
+    """The revisions of `keys` in the same order (0 for never bumped)"""
+    revs = {d['_id']: d.get('rev', 0) for d in mongo.db.revisions.find({'_id': {'$in': list(keys)}})}
+    return [revs.get(key, 0) for key in keys]
+
+
+def etag(*parts):
+    """Strong entity tag for a representation identified by `parts`"""
+    return hashlib.sha256('\x1f'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:32]
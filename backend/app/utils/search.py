@@ -0,0 +1,73 @@
+import re
+
+# Report fields covered by the text index and the search_tokens index
+TEXT_FIELDS = ('achievements', 'challenges', 'next_week_plan')
+
+# Upper bound on distinct tokens kept per report (keeps the multikey index small)
+MAX_TOKENS = 2000
+MAX_REGEX_LENGTH = 200
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def tokenize(*texts):
+    """Distinct lowercase word tokens of the given texts, in first-seen order"""
+    seen = {}
+    for text in texts:
+        if not text or not isinstance(text, str):
+            continue
+        for token in _TOKEN_RE.findall(text.lower()):
+            if len(token) > 1 and token not in seen:
+                seen[token] = True
+                if len(seen) >= MAX_TOKENS:
+                    return list(seen)
+    return list(seen)
+
+
+def search_tokens(doc):
+    """Token list stored on a report document for prefix search"""
+    return tokenize(*(doc.get(f) for f in TEXT_FIELDS))
+
+
+def search_query(q, mode=None):
+    """Translate the `q` search string into a reports query fragment.
+
+    Default mode uses the text index: plain terms match any word (ranked by
+    relevance), "quoted phrases" must all appear, and terms ending in `*` are
+    prefix matches served by the search_tokens index. `mode='regex'` keeps the
+    old unanchored regex scan as an explicit opt-in.
+    """
+    if mode == 'regex':
+        if len(q) > MAX_REGEX_LENGTH:
+            raise ValueError("Search pattern is too long")
+        regex = {'$regex': q, '$options': 'i'}
+        return {'$or': [{f: regex} for f in TEXT_FIELDS]}
+
+    text_parts = []
+    prefixes = []
+    for phrase, word in _QUERY_RE.findall(q):
+        if phrase:
+            text_parts.append('"%s"' % phrase.replace('"', ''))
+        elif word.endswith('*') and word.rstrip('*'):
+            prefixes.extend(tokenize(word.rstrip('*')))
+        elif word.strip('*'):
+            text_parts.append(word.strip('*'))
+
+    query = {}
+    if text_parts:
+        query['$text'] = {'$search': ' '.join(text_parts)}
+    # Anchored regexes on the multikey search_tokens index are index range scans
+    prefix_clauses = [{'search_tokens': re.compile('^' + re.escape(p))} for p in prefixes]
+    if len(prefix_clauses) == 1:
+        query.update(prefix_clauses[0])
+    elif prefix_clauses:
+        query['$and'] = prefix_clauses
+    return query
+
+
+def score_projection(query):
+    """Projection adding the relevance score when `query` uses the text index"""
+    if '$text' in query:
+        return {'score': {'$meta': 'textScore'}}
+    return None
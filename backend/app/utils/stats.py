@@ -0,0 +1,226 @@
+import datetime
+from collections import Counter
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app import mongo
+
+# report_stats holds one counter per (year, week, department, status). Every
+# write path that creates, deletes or moves a report between buckets applies
+# a $inc, so /stats only reads these small documents. The department always
+# comes from the users collection: the cached identity of another worker can
+# be stale after a department change, and a wrong $inc never heals.
+BUCKET_FIELDS = ('year', 'week', 'department', 'status')
+
+# The rollups are complete only after a full rebuild has run against the
+# existing reports. A marker in `migrations` records that (per STATS_VERSION;
+# bump it when the bucket layout changes): the first process to start after
+# a deploy claims it with a lease and backfills in the background, and until
+# it is done /stats aggregates the reports directly.
+STATS_VERSION = 1
+STATS_MARKER = 'report_stats'
+BACKFILL_LEASE_SECONDS = 600
+
+_ready = False
+
+
+def ensure_indexes():
+    mongo.db.report_stats.create_index([(f, 1) for f in BUCKET_FIELDS], unique=True)
+
+
+def bucket(report, department):
+    return (report.get('year'), report.get('week'), department, report.get('status'))
+
+
+def department_of(user_id):
+    user = mongo.db.users.find_one({'_id': ObjectId(str(user_id))}, {'department': 1})
+    return user.get('department') if user else None
+
+
+def apply(deltas):
+    """Apply a {bucket: delta} mapping with a single bulk write"""
+    ops = [
+        UpdateOne(dict(zip(BUCKET_FIELDS, key)), {'$inc': {'count': n}}, upsert=True)
+        for key, n in deltas.items() if n
+    ]
+    if ops:
+        mongo.db.report_stats.bulk_write(ops, ordered=False)
+
+
+def record_insert(report, department):
+    apply({bucket(report, department): 1})
+
+
+def record_delete(report, department):
+    apply({bucket(report, department): -1})
+
+
+def record_change(before, after, user_id):
+    """Move a report between buckets if its year, week or status changed"""
+    if bucket(before, None) == bucket(after, None):
+        return
+    department = department_of(user_id)
+    apply({bucket(before, department): -1, bucket(after, department): 1})
+
+
+def _user_buckets(user_id):
+    pipeline = [
+        {'$match': {'user_id': ObjectId(str(user_id))}},
+        {'$group': {'_id': {'year': '$year', 'week': '$week', 'status': '$status'}, 'count': {'$sum': 1}}}
+    ]
+    return list(mongo.db.reports.aggregate(pipeline))
+
+
+def move_user(user_id, old_department, new_department):
+    """Re-bucket a user's reports after their department changed"""
+    if old_department == new_department:
+        return
+    deltas = Counter()
+    for g in _user_buckets(user_id):
+        key = g['_id']
+        deltas[(key.get('year'), key.get('week'), old_department, key.get('status'))] -= g['count']
+        deltas[(key.get('year'), key.get('week'), new_department, key.get('status'))] += g['count']
+    apply(deltas)
+
+
+def remove_user(user_id, department):
+    """Drop a user's reports from the rollups (call before deleting them)"""
+    deltas = Counter()
+    for g in _user_buckets(user_id):
+        key = g['_id']
+        deltas[(key.get('year'), key.get('week'), department, key.get('status'))] -= g['count']
+    apply(deltas)
+
+
+def _aggregate():
+    """Bucket counts straight from the reports collection"""
+    pipeline = [
+        {'$lookup': {'from': 'users', 'localField': 'user_id', 'foreignField': '_id', 'as': 'user'}},
+        {'$unwind': {'path': '$user', 'preserveNullAndEmptyArrays': True}},
+        {'$group': {
+            '_id': {'year': '$year', 'week': '$week', 'department': '$user.department', 'status': '$status'},
+            'count': {'$sum': 1}
+        }},
+        {'$project': {
+            '_id': 0, 'year': '$_id.year', 'week': '$_id.week',
+            'department': '$_id.department', 'status': '$_id.status', 'count': 1
+        }}
+    ]
+    return list(mongo.db.reports.aggregate(pipeline))
+
+
+def rebuild():
+    """Recompute every rollup from the reports collection (backfill/repair)
+    and mark the rollups complete. Counts are overwritten in place with
+    upserts, so concurrent rebuilds and report writes never hit the unique
+    bucket index."""
+    rows = _aggregate()
+    ops = [
+        UpdateOne({f: row.get(f) for f in BUCKET_FIELDS}, {'$set': {'count': row['count']}}, upsert=True)
+        for row in rows
+    ]
+    if ops:
+        mongo.db.report_stats.bulk_write(ops, ordered=False)
+    # Buckets no report falls in any more
+    current = {tuple(row.get(f) for f in BUCKET_FIELDS) for row in rows}
+    stale = [
+        doc['_id'] for doc in mongo.db.report_stats.find({}, dict.fromkeys(BUCKET_FIELDS, 1))
+        if tuple(doc.get(f) for f in BUCKET_FIELDS) not in current
+    ]
+    if stale:
+        mongo.db.report_stats.delete_many({'_id': {'$in': stale}})
+    mongo.db.migrations.update_one(
+        {'_id': STATS_MARKER},
+        {'$set': {'status': 'done', 'version': STATS_VERSION, 'done_at': datetime.datetime.utcnow()},
+         '$unset': {'lease_until': ''}},
+        upsert=True
+    )
+    return len(rows)
+
+
+def rollups_ready():
+    """True once a rebuild for STATS_VERSION has completed (cached when seen)"""
+    global _ready
+    if not _ready:
+        marker = mongo.db.migrations.find_one({'_id': STATS_MARKER}, {'status': 1, 'version': 1})
+        _ready = bool(marker and marker.get('status') == 'done' and marker.get('version') == STATS_VERSION)
+    return _ready
+
+
+def _claim_backfill():
+    """Take the backfill lease; None when it is done or another process holds it"""
+    now = datetime.datetime.utcnow()
+    try:
+        return mongo.db.migrations.find_one_and_update(
+            {'_id': STATS_MARKER, '$or': [
+                {'version': {'$ne': STATS_VERSION}},
+                {'status': 'running', 'lease_until': {'$lt': now}},
+            ]},
+            {'$set': {
+                'status': 'running', 'version': STATS_VERSION, 'started_at': now,
+                'lease_until': now + datetime.timedelta(seconds=BACKFILL_LEASE_SECONDS)
+            }},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The marker exists and did not match: done, or being built elsewhere
+        return None
+
+
+def backfill(app):
+    """Build the rollups from existing reports once per STATS_VERSION (run at startup)"""
+    try:
+        with app.app_context():
+            if not rollups_ready() and _claim_backfill():
+                buckets = rebuild()
+                app.logger.info('Backfilled %d report stats bucket(s)', buckets)
+    except Exception as e:
+        app.logger.warning('Report stats backfill failed: %s', e)
+
+
+def _week_key(value):
+    try:
+        return (0, int(value), '')
+    except (TypeError, ValueError):
+        return (1, 0, str(value))
+
+
+def summary():
+    """Weekly, department and overall counts in the /stats response shape"""
+    if rollups_ready():
+        rows = list(mongo.db.report_stats.find({'count': {'$gt': 0}}, {'_id': 0}))
+    else:
+        # Backfill still pending: count the reports themselves
+        rows = _aggregate()
+
+    weekly = {}
+    departments = {}
+    total = submitted = 0
+    for row in rows:
+        n = row['count']
+        is_submitted = n if row.get('status') == 'submitted' else 0
+        w = weekly.setdefault((row.get('year'), row.get('week')), {'total': 0, 'submitted': 0})
+        w['total'] += n
+        w['submitted'] += is_submitted
+        d = departments.setdefault(row.get('department') or 'Unknown', {'total': 0, 'submitted': 0})
+        d['total'] += n
+        d['submitted'] += is_submitted
+        total += n
+        submitted += is_submitted
+
+    weekly_formatted = [
+        {'year': year, 'week': week, 'total': c['total'], 'submitted': c['submitted']}
+        for (year, week), c in sorted(weekly.items(), key=lambda kv: (_week_key(kv[0][0]), _week_key(kv[0][1])))
+    ]
+    dept_formatted = sorted(
+        [{'department': name, 'total': c['total'], 'submitted': c['submitted']} for name, c in departments.items()],
+        key=lambda d: d['total'], reverse=True
+    )
+    overall = {
+        'total': total,
+        'submitted': submitted,
+        'completion_rate': (submitted / total * 100) if total > 0 else 0
+    }
+    return {'weekly': weekly_formatted, 'departments': dept_formatted, 'overall': overall}
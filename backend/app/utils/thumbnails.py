@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from app import mongo
+from app.utils import attachments, revisions
+
+# Previews are generated per blob, so one thumbnail serves every report that
+# attached the same file. Rendering runs in a process pool (Pillow/PyMuPDF are
+# CPU bound); when it finishes, thumbnail_url is set on every matching
+# attachment. Thumbnails are named after the blob hash and never change.
+THUMBNAIL_SIZE = int(os.getenv('THUMBNAIL_SIZE', '320'))
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', '2'))
+PDF_MIME = 'application/pdf'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def previewable(meta):
+    mime = (meta.get('mime') or '').lower()
+    return bool(meta.get('sha256')) and (
+        (mime.startswith('image/') and mime != 'image/svg+xml') or mime == PDF_MIME
+    )
+
+
+def render_thumbnail(src, mime, dest_base, size):
+    """Write a thumbnail of `src` next to dest_base (.webp, or .png without
+    WebP support). Runs in a worker process; returns the file name or None
+    when the file cannot be previewed."""
+    from PIL import Image, ImageOps, features
+
+    ext = '.webp' if features.check('webp') else '.png'
+    dest = dest_base + ext
+    if os.path.exists(dest):
+        return os.path.basename(dest)
+
+    if mime == PDF_MIME:
+        import fitz  # PyMuPDF
+        with fitz.open(src) as doc:
+            if not doc.page_count:
+                return None
+            page = doc.load_page(0)
+            zoom = size / max(page.rect.width, page.rect.height, 1)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom * 2, zoom * 2), alpha=False)
+            img = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+    else:
+        img = Image.open(src)
+        # Decode a reduced version of large JPEGs instead of the full image
+        img.draft('RGB', (size * 2, size * 2))
+        img = ImageOps.exif_transpose(img)
+
+    img.thumbnail((size, size))
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    if ext == '.webp':
+        img.save(tmp, 'WEBP', quality=80, method=4)
+    else:
+        img.save(tmp, 'PNG', optimize=True)
+    os.replace(tmp, dest)
+    return os.path.basename(dest)
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs Mongo and worker threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def thumbnail_url(name):
+    return f"/api/reports/thumbnails/{name}"
+
+
+def _record(digest, name):
+    query = {'attachments': {'$elemMatch': {'sha256': digest, 'thumbnail_url': {'$exists': False}}}}
+    owners = mongo.db.reports.distinct('user_id', query)
+    if not owners:
+        return
+    mongo.db.reports.update_many(
+        query,
+        {'$set': {'attachments.$[a].thumbnail_url': thumbnail_url(name)}, '$inc': {'rev': 1}},
+        array_filters=[{'a.sha256': digest, 'a.thumbnail_url': {'$exists': False}}]
+    )
+    revisions.bump(owners)
+
+
+def _done(app, digest, future):
+    try:
+        name = future.result()
+        if name:
+            with app.app_context():
+                _record(digest, name)
+    except Exception as e:
+        app.logger.warning('Thumbnail for %s failed: %s', digest, e)
+
+
+def schedule(app, metas):
+    """Queue previews for freshly stored attachments (call after the report is saved)"""
+    seen = set()
+    for meta in metas or []:
+        digest = meta.get('sha256')
+        if not previewable(meta) or digest in seen:
+            continue
+        seen.add(digest)
+        try:
+            future = _executor().submit(
+                render_thumbnail, attachments.blob_path(digest), meta['mime'].lower(),
+                attachments.thumb_base(digest), THUMBNAIL_SIZE
+            )
+        except Exception as e:
+            app.logger.warning('Could not queue thumbnail for %s: %s', digest, e)
+            continue
+        future.add_done_callback(lambda f, d=digest: _done(app, d, f))
@@ -0,0 +1,115 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from app.utils import attachments
+from app.utils.attachments import AttachmentRejected, AttachmentTooLarge, BlobWriter
+
+# Multipart report forms are parsed straight off the request stream: each
+# attachment goes into a BlobWriter as its bytes arrive instead of being
+# spooled by Werkzeug first, so size and type limits trip on the first bad
+# chunk. Finishing a file (fsync, rename, reference) runs on a small pool
+# while the parser moves on to the next part.
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_MB', '50')) * 1024 * 1024
+MAX_UPLOAD_FILES = int(os.getenv('MAX_UPLOAD_FILES', '20'))
+MAX_FORM_FIELD_BYTES = 500 * 1024
+READ_SIZE = 64 * 1024
+UPLOAD_FIELD = 'attachments'
+
+_finalizers = ThreadPoolExecutor(max_workers=int(os.getenv('UPLOAD_WORKERS', '4')), thread_name_prefix='uploads')
+
+
+def _finish(app, writer):
+    with app.app_context():
+        return writer.finish()
+
+
+def _charset(headers):
+    return parse_options_header(headers.get('content-type', ''))[1].get('charset', 'utf-8')
+
+
+def parse_report_form(request):
+    """Parse a multipart report form, storing attachments as they stream in.
+
+    Returns (form, attachment metadata). Raises AttachmentRejected when a
+    file or the request breaks a limit; references already taken for this
+    request are released first.
+    """
+    boundary = request.mimetype_params.get('boundary', '').encode('latin-1')
+    if not boundary:
+        raise AttachmentRejected('Missing multipart boundary')
+    app = current_app._get_current_object()
+    decoder = MultipartDecoder(boundary, max_form_memory_size=MAX_FORM_FIELD_BYTES, max_parts=MAX_UPLOAD_FILES + 50)
+
+    fields = []
+    pending = []
+    writer = None
+    part = None
+    buffer = []
+    files = 0
+    try:
+        complete = False
+        while not complete:
+            chunk = request.stream.read(READ_SIZE)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, File) and event.name == UPLOAD_FIELD and event.filename:
+                    files += 1
+                    if files > MAX_UPLOAD_FILES:
+                        raise AttachmentRejected(f"Too many files (max {MAX_UPLOAD_FILES})")
+                    mime = event.headers.get('content-type', 'application/octet-stream')
+                    attachments.check_mime(event.filename, mime.split(';')[0].strip())
+                    part, buffer = event, None
+                    writer = BlobWriter(event.filename, mime.split(';')[0].strip())
+                elif isinstance(event, (Field, File)):
+                    # Plain fields (and stray file inputs, which are ignored)
+                    part, buffer = event, [] if isinstance(event, Field) else None
+                elif isinstance(event, Data):
+                    if writer is not None:
+                        writer.write(event.data)
+                        if not event.more_data:
+                            pending.append(_finalizers.submit(_finish, app, writer))
+                            writer = None
+                    elif buffer is not None:
+                        buffer.append(event.data)
+                        if not event.more_data:
+                            fields.append((part.name, b''.join(buffer).decode(_charset(part.headers), 'replace')))
+                            buffer = None
+                event = decoder.next_event()
+            complete = isinstance(event, Epilogue)
+            if not chunk and not complete:
+                raise AttachmentRejected('Incomplete multipart body')
+    except Exception as e:
+        if writer is not None:
+            writer.abort()
+        stored = []
+        for f in pending:
+            try:
+                stored.append(f.result())
+            except Exception:
+                pass
+        attachments.release(stored)
+        if isinstance(e, RequestEntityTooLarge):
+            limit = app.config.get('MAX_CONTENT_LENGTH') or MAX_UPLOAD_BYTES
+            raise AttachmentTooLarge(f"Upload is too large (max {limit // (1024 * 1024)}MB)")
+        if isinstance(e, ValueError) and not isinstance(e, AttachmentRejected):
+            # Malformed multipart data from the decoder
+            raise AttachmentRejected(f"Malformed upload: {e}")
+        raise
+
+    stored = []
+    errors = []
+    for f in pending:
+        try:
+            stored.append(f.result())
+        except Exception as e:
+            errors.append(e)
+    if errors:
+        attachments.release(stored)
+        raise errors[0]
+    return MultiDict(fields), stored
@@ -0,0 +1,15 @@
+"""Benchmarks for the reports API.
+
+Seeds a database with synthetic users and reports, drives the Flask test
+client through the main read/write flows at several data sizes and writes
+latency percentiles, peak RSS and MongoDB command counts to JSON:
+
+    python -m benchmarks run --sizes 500,5000 --out bench.json
+    python -m benchmarks run --mongo-uri mongodb://localhost:27017/reports_bench
+    python -m benchmarks compare before.json after.json
+
+Run from the backend directory. Without --mongo-uri the data lives in
+mongomock (pip install mongomock), which is fine for command counts and
+relative Python-side costs but skips scenarios that need a real server
+($text search, $lookup pipelines, $substrCP projections).
+"""
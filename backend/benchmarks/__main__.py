@@ -0,0 +1,65 @@
+import argparse
+import json
+import sys
+
+from benchmarks import runner
+
+
+def _sizes(value):
+    try:
+        sizes = [int(s) for s in value.split(',') if s.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError('sizes must be comma-separated integers')
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError('sizes must be positive')
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark the reports API')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='seed synthetic data and time the API')
+    run.add_argument('--sizes', type=_sizes, default=[200, 2000], help='report counts to seed, e.g. 200,2000,20000')
+    run.add_argument('--iterations', type=int, default=20, help='timed requests per scenario (exports/PDF run fewer)')
+    run.add_argument('--warmup', type=int, default=2, help='untimed requests before each scenario')
+    run.add_argument('--users', type=int, default=None, help='employees to create (default: size // 26, at least 10)')
+    run.add_argument('--seed', type=int, default=0, help='random seed for the generated data')
+    run.add_argument('--mongo-uri', default=None, help="real MongoDB to use; the database name must contain 'bench'")
+    run.add_argument('--only', default=None, help='comma-separated scenario names')
+    run.add_argument('--out', default=None, help='write the results JSON here (default: stdout)')
+
+    cmp = commands.add_parser('compare', help='compare two result files')
+    cmp.add_argument('base')
+    cmp.add_argument('new')
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        runner.compare(base, new)
+        return 0
+
+    only = {s.strip() for s in args.only.split(',')} if args.only else None
+    unknown = (only or set()) - {s[0] for s in runner.SCENARIOS}
+    if unknown:
+        parser.error('unknown scenario(s): ' + ', '.join(sorted(unknown)))
+
+    # Progress goes to stderr so stdout can carry the JSON
+    results = runner.run(
+        args.sizes, iterations=args.iterations, warmup=args.warmup, users=args.users, seed=args.seed,
+        mongo_uri=args.mongo_uri, only=only, log=lambda line: print(line, file=sys.stderr)
+    )
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
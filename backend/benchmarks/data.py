@@ -0,0 +1,144 @@
+import datetime
+import hashlib
+import random
+from werkzeug.security import generate_password_hash
+
+from app import mongo
+from app.models.report import Report
+from app.utils import stats as report_stats
+
+# Synthetic data for the benchmarks. Everything is drawn from one seeded
+# random.Random, so the same seed and size produce the same database.
+BENCH_PASSWORD = 'bench-password'
+ADMIN_USERNAME = 'bench-admin'
+DEPARTMENTS = ('Engineering', 'Sales', 'Marketing', 'Finance', 'Support', 'Operations', 'HR', 'Legal')
+TAGS = (
+    'backend', 'frontend', 'infra', 'customer', 'hiring', 'release', 'planning', 'incident',
+    'security', 'docs', 'research', 'budget', 'training', 'migration', 'onboarding'
+)
+WORDS = (
+    'shipped', 'reviewed', 'deployed', 'fixed', 'migrated', 'refactored', 'designed', 'tested', 'documented',
+    'planned', 'interviewed', 'onboarded', 'negotiated', 'presented', 'analyzed', 'automated', 'improved',
+    'release', 'pipeline', 'customer', 'dashboard', 'invoice', 'contract', 'campaign', 'roadmap', 'service',
+    'database', 'report', 'budget', 'forecast', 'incident', 'ticket', 'feature', 'workshop', 'vendor',
+    'quarterly', 'weekly', 'critical', 'minor', 'internal', 'external', 'new', 'legacy', 'shared', 'mobile',
+    'the', 'a', 'for', 'with', 'and', 'to', 'of', 'on', 'after', 'before', 'across', 'team', 'project',
+    'deadline', 'feedback', 'integration', 'latency', 'onboarding', 'security', 'compliance', 'audit',
+    'metrics', 'alerts', 'backlog', 'sprint', 'stakeholders', 'requirements', 'prototype', 'launch',
+)
+# Mean words per field (lognormal lengths, so a few reports are much longer)
+TEXT_WORDS = {'achievements': 60, 'challenges': 25, 'next_week_plan': 35}
+STATUS_WEIGHTS = (('draft', 10), ('submitted', 50), ('approved', 30), ('rejected', 10))
+ATTACHMENT_TYPES = (
+    ('application/pdf', '.pdf', 350_000),
+    ('image/png', '.png', 900_000),
+    ('image/jpeg', '.jpg', 1_500_000),
+    ('text/csv', '.csv', 40_000),
+    ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx', 120_000),
+)
+INSERT_BATCH = 1000
+
+
+def _text(rng, mean_words):
+    n = max(3, int(rng.lognormvariate(0, 0.6) * mean_words))
+    words = [rng.choice(WORDS) for _ in range(n)]
+    sentences = []
+    while words:
+        size = rng.randint(6, 16)
+        chunk, words = words[:size], words[size:]
+        sentences.append(' '.join(chunk).capitalize() + '.')
+    return ' '.join(sentences)
+
+
+def _attachments(rng):
+    metas = []
+    for _ in range(rng.choice((0, 0, 0, 0, 1, 1, 2, 3))):
+        mime, ext, size = rng.choice(ATTACHMENT_TYPES)
+        digest = hashlib.sha256(rng.getrandbits(128).to_bytes(16, 'big')).hexdigest()
+        metas.append({
+            'filename': digest, 'sha256': digest, 'original_name': f'file-{digest[:8]}{ext}',
+            'mime': mime, 'size': int(rng.lognormvariate(0, 0.5) * size),
+            'url': f'/api/reports/uploads/{digest}'
+        })
+    return metas
+
+
+def clear():
+    """Empty every collection but keep its indexes"""
+    for name in mongo.db.list_collection_names():
+        if not name.startswith('system.'):
+            mongo.db[name].delete_many({})
+
+
+def seed(size, users=None, seed=0):
+    """Insert `size` reports spread over `users` employees (by default one per
+    ~26 reports, i.e. about half a year of weekly reports each) plus one admin.
+
+    Returns a dict with the ids, usernames and search terms the scenarios use.
+    """
+    rng = random.Random(seed)
+    n_users = users or max(10, size // 26)
+    password = generate_password_hash(BENCH_PASSWORD)
+    now = datetime.datetime.utcnow()
+
+    admin = {
+        'name': 'Bench Admin', 'email': 'bench-admin@example.com', 'username': ADMIN_USERNAME,
+        'password': password, 'department': 'Management', 'role': 'admin', 'supervisor_email': None,
+        'created_at': now
+    }
+    mongo.db.users.insert_one(admin)
+    employees = [{
+        'name': f'Bench User {i}', 'email': f'bench-user-{i}@example.com', 'username': f'bench-user-{i}',
+        'password': password, 'department': DEPARTMENTS[i % len(DEPARTMENTS)], 'role': 'employee',
+        'supervisor_email': 'bench-admin@example.com', 'created_at': now
+    } for i in range(n_users)]
+    mongo.db.users.insert_many(employees)
+
+    statuses = [s for s, _ in STATUS_WEIGHTS]
+    weights = [w for _, w in STATUS_WEIGHTS]
+    report_ids = []
+    batch = []
+    for i in range(size):
+        owner = employees[i % n_users]
+        # Each owner's reports go back one week at a time from this week
+        day = now - datetime.timedelta(weeks=i // n_users, days=rng.randint(0, 4))
+        year, week, _ = day.isocalendar()
+        status = rng.choices(statuses, weights)[0]
+        doc = Report(
+            user_id=str(owner['_id']), week=week, year=year, month=day.month,
+            achievements=_text(rng, TEXT_WORDS['achievements']),
+            challenges=_text(rng, TEXT_WORDS['challenges']),
+            next_week_plan=_text(rng, TEXT_WORDS['next_week_plan']),
+            status='draft' if status == 'draft' else 'submitted',
+            attachments=_attachments(rng),
+            tags=rng.sample(TAGS, rng.randint(0, 3))
+        ).to_document()
+        doc['created_at'] = day
+        if status != 'draft':
+            doc['submitted_at'] = day + datetime.timedelta(hours=rng.randint(1, 72))
+        if status in ('approved', 'rejected'):
+            doc['status'] = status
+            doc['updated_at'] = doc['submitted_at'] + datetime.timedelta(hours=rng.randint(1, 48))
+            doc['approvals'] = [{
+                'by': str(admin['_id']), 'action': status,
+                'comment': None if status == 'approved' else _text(rng, 8), 'at': doc['updated_at']
+            }]
+        batch.append(doc)
+        if len(batch) >= INSERT_BATCH:
+            report_ids += mongo.db.reports.insert_many(batch).inserted_ids
+            batch = []
+    if batch:
+        report_ids += mongo.db.reports.insert_many(batch).inserted_ids
+    report_stats.rebuild()
+
+    rng.shuffle(report_ids)
+    return {
+        'users': n_users,
+        'admin_id': str(admin['_id']),
+        'employee_ids': [str(u['_id']) for u in employees],
+        'employee_username': employees[0]['username'],
+        'report_ids': [str(r) for r in report_ids],
+        'department': DEPARTMENTS[0],
+        'search_word': 'migrated',
+        'search_prefix': 'deploy*',
+    }
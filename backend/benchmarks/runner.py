@@ -0,0 +1,323 @@
+import datetime
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from benchmarks import data
+
+# Each scenario: (name, user, request builder, needs a real mongod, iteration share).
+# The builder gets (ctx, i) and returns (method, url, request kwargs); ctx is
+# what data.seed returned. Exports and PDFs are slow, so they run fewer times.
+SCENARIOS = (
+    ('auth_login', None, lambda c, i: ('POST', '/api/auth/login', {'json': {'username': c['employee_username'], 'password': data.BENCH_PASSWORD}}), False, 0.25),
+    ('auth_me', 'employee', lambda c, i: ('GET', '/api/auth/me', {}), False, 1),
+    ('get_report', 'admin', lambda c, i: ('GET', f"/api/reports/{_pick(c, i)}", {}), False, 1),
+    ('list_myreports', 'employee', lambda c, i: ('GET', '/api/reports/myreports', {}), False, 1),
+    ('list_myreports_summary', 'employee', lambda c, i: ('GET', '/api/reports/myreports?view=summary', {}), True, 1),
+    ('list_all_page', 'admin', lambda c, i: ('GET', '/api/reports?limit=50', {}), False, 1),
+    ('list_all_filtered', 'admin', lambda c, i: ('GET', f"/api/reports?limit=50&status=submitted&department={c['department']}", {}), False, 1),
+    ('search_text', 'admin', lambda c, i: ('GET', f"/api/reports?limit=50&q={c['search_word']}", {}), True, 1),
+    ('search_prefix', 'admin', lambda c, i: ('GET', f"/api/reports?limit=50&q={c['search_prefix']}", {}), False, 1),
+    ('export_csv', 'admin', lambda c, i: ('GET', '/api/reports/export?all=true', {}), False, 0.2),
+    ('export_xlsx', 'admin', lambda c, i: ('GET', '/api/reports/export?all=true&format=xlsx', {}), False, 0.2),
+    ('report_pdf', 'admin', lambda c, i: ('GET', f"/api/reports/{_pick(c, i)}/pdf", {}), False, 0.5),
+    ('stats', 'admin', lambda c, i: ('GET', '/api/reports/stats', {}), False, 1),
+    ('stats_not_modified', 'admin', lambda c, i: ('GET', '/api/reports/stats', {'headers': {'If-None-Match': c['stats_etag']}}), False, 1),
+    ('team', 'admin', lambda c, i: ('GET', '/api/reports/team', {}), True, 0.5),
+    ('reminders_send', 'admin', lambda c, i: ('POST', '/api/reports/reminders/send', {'json': {}}), True, 0.25),
+)
+PERCENTILES = (50, 90, 95, 99)
+RSS_SAMPLE_SECONDS = 0.005
+
+
+def _pick(ctx, i):
+    """A different report per iteration, so per-report caches (PDF) start cold"""
+    return ctx['report_ids'][i % len(ctx['report_ids'])]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def _rss_bytes():
+    """Current resident set size, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss_bytes():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    value = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return value if sys.platform == 'darwin' else value * 1024
+
+
+class RssSampler(threading.Thread):
+    """Peak RSS while a scenario runs (falls back to the process peak)"""
+
+    def __init__(self):
+        super().__init__(name='bench-rss', daemon=True)
+        self.peak = _rss_bytes() or 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, _rss_bytes() or 0)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak or _max_rss_bytes()
+
+
+class CommandCounter:
+    """Counts MongoDB commands issued by the benchmark thread only, so
+    background threads (audit writer, notification outbox) are left out."""
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.count = 0
+
+    def hit(self):
+        if threading.get_ident() == self.thread:
+            self.count += 1
+
+    def listener(self):
+        from pymongo import monitoring
+
+        counter = self
+
+        class Listener(monitoring.CommandListener):
+            def started(self, event):
+                counter.hit()
+
+            def succeeded(self, event):
+                pass
+
+            def failed(self, event):
+                pass
+
+        return Listener()
+
+
+# mongomock has no command monitoring; these collection methods are counted
+# as one round trip each instead
+MONGOMOCK_COMMANDS = (
+    'find', 'find_one', 'aggregate', 'count_documents', 'estimated_document_count', 'distinct',
+    'insert_one', 'insert_many', 'update_one', 'update_many', 'replace_one', 'delete_one', 'delete_many',
+    'find_one_and_update', 'find_one_and_delete', 'find_one_and_replace', 'bulk_write',
+)
+
+
+def _use_mongomock(counter):
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit('mongomock is not installed (pip install mongomock), or pass --mongo-uri')
+    import flask_pymongo
+
+    def counted(method):
+        def wrapper(*args, **kwargs):
+            counter.hit()
+            return method(*args, **kwargs)
+        return wrapper
+
+    for name in MONGOMOCK_COMMANDS:
+        setattr(mongomock.collection.Collection, name, counted(getattr(mongomock.collection.Collection, name)))
+    client = mongomock.MongoClient()
+    flask_pymongo.MongoClient = lambda *args, **kwargs: client
+
+
+def _redact(uri):
+    parts = urlsplit(uri)
+    if parts.password:
+        netloc = f"{parts.username}:***@{parts.hostname}" + (f":{parts.port}" if parts.port else '')
+        parts = parts._replace(netloc=netloc)
+    return urlunsplit(parts)
+
+
+def _git_revision():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True).stdout.strip())
+        return rev + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _configure_env(mongo_uri, workdir):
+    """Keep the app away from real mail/Slack and put caches in a scratch dir"""
+    os.environ.update({
+        'OUTBOX_WORKER': 'false',
+        'EMAIL_DEV_MODE': 'false',
+        'SMTP_HOST': '',
+        'SLACK_WEBHOOK': '',
+        'PDF_CACHE_DIR': os.path.join(workdir, 'pdf_cache'),
+        'EXPORT_DIR': os.path.join(workdir, 'exports'),
+    })
+    os.environ.pop('METRICS_DIR', None)
+    if mongo_uri:
+        os.environ['MONGODB_URI'] = mongo_uri
+
+
+def _run_scenario(client, ctx, tokens, counter, scenario, iterations, warmup):
+    name, user, build, _, _ = scenario
+    headers = {'Authorization': f'Bearer {tokens[user]}'} if user else {}
+
+    def call(i):
+        method, url, kwargs = build(ctx, i)
+        kwargs = dict(kwargs)
+        kwargs['headers'] = {**headers, **kwargs.get('headers', {})}
+        counter.count = 0
+        started = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        response.get_data()  # drain streamed bodies (CSV export)
+        elapsed = time.perf_counter() - started
+        response.close()
+        return response.status_code, elapsed, counter.count
+
+    for i in range(warmup):
+        call(iterations + i)
+
+    latencies, commands, statuses = [], [], {}
+    sampler = RssSampler()
+    sampler.start()
+    try:
+        for i in range(iterations):
+            status, elapsed, count = call(i)
+            latencies.append(elapsed * 1000)
+            commands.append(count)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+    finally:
+        peak = sampler.stop()
+
+    latencies.sort()
+    result = {
+        'iterations': iterations,
+        'status': statuses,
+        'errors': sum(n for s, n in statuses.items() if not s.startswith(('2', '3'))),
+        'latency_ms': {
+            'min': round(latencies[0], 3),
+            **{f'p{p}': round(percentile(latencies, p), 3) for p in PERCENTILES},
+            'max': round(latencies[-1], 3),
+            'mean': round(sum(latencies) / len(latencies), 3),
+        },
+        'mongo_commands': {
+            'mean': round(sum(commands) / len(commands), 2),
+            'max': max(commands),
+        },
+        'peak_rss_mb': round(peak / (1024 * 1024), 1),
+    }
+    return result
+
+
+def run(sizes, iterations=20, warmup=2, users=None, seed=0, mongo_uri=None, only=None, log=print):
+    """Seed each size in turn and run the scenarios against it; returns the results dict"""
+    if mongo_uri:
+        db_name = urlsplit(mongo_uri).path.lstrip('/')
+        if 'bench' not in db_name:
+            # Every collection is emptied before seeding
+            raise SystemExit(f"Refusing to use database '{db_name}': its name must contain 'bench'")
+
+    workdir = tempfile.mkdtemp(prefix='reports-bench-')
+    _configure_env(mongo_uri, workdir)
+    counter = CommandCounter()
+    if mongo_uri:
+        from pymongo import monitoring
+        monitoring.register(counter.listener())
+    else:
+        _use_mongomock(counter)
+
+    from app import create_app
+
+    app = create_app()
+    client = app.test_client()
+    scenarios = [s for s in SCENARIOS if not only or s[0] in only]
+
+    results = {
+        'meta': {
+            'revision': _git_revision(),
+            'started_at': datetime.datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'mongo': _redact(mongo_uri) if mongo_uri else 'mongomock',
+            'iterations': iterations,
+            'warmup': warmup,
+            'seed': seed,
+        },
+        'runs': [],
+    }
+    try:
+        for size in sizes:
+            results['runs'].append(_run_size(app, client, counter, scenarios, size, iterations, warmup, users, seed, mongo_uri, log))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _run_size(app, client, counter, scenarios, size, iterations, warmup, users, seed, mongo_uri, log):
+    """Reseed the database with `size` reports and time every scenario against it"""
+    from flask_jwt_extended import create_access_token
+    from app.utils.identity import identity_cache
+
+    with app.app_context():
+        data.clear()
+        identity_cache.clear()
+        started = time.perf_counter()
+        ctx = data.seed(size, users=users, seed=seed)
+        seed_seconds = time.perf_counter() - started
+        tokens = {
+            'admin': create_access_token(identity=ctx['admin_id']),
+            'employee': create_access_token(identity=ctx['employee_ids'][0]),
+        }
+    ctx['stats_etag'] = client.get('/api/reports/stats', headers={'Authorization': f"Bearer {tokens['admin']}"}).headers.get('ETag', '')
+    log(f"size {size}: {ctx['users']} users, seeded in {seed_seconds:.1f}s")
+
+    run_result = {'size': size, 'users': ctx['users'], 'seed_seconds': round(seed_seconds, 3), 'scenarios': {}}
+    for scenario in scenarios:
+        name, _, _, needs_mongod, share = scenario
+        if needs_mongod and not mongo_uri:
+            run_result['scenarios'][name] = {'skipped': 'needs a real mongod'}
+            continue
+        n = max(1, int(iterations * share))
+        result = _run_scenario(client, ctx, tokens, counter, scenario, n, warmup)
+        run_result['scenarios'][name] = result
+        log(f"  {name:<24} p50 {result['latency_ms']['p50']:>9.2f} ms  p95 {result['latency_ms']['p95']:>9.2f} ms  "
+            f"{result['mongo_commands']['mean']:>6.1f} cmds  {result['peak_rss_mb']:>7.1f} MB"
+            + (f"  {result['errors']} errors" if result['errors'] else ''))
+    return run_result
+
+
+def compare(base, new, log=print):
+    """Print p50/p95 latency and command count changes between two result files"""
+    log(f"base {base['meta'].get('revision')}  ->  new {new['meta'].get('revision')}")
+    base_runs = {r['size']: r for r in base['runs']}
+    for run_result in new['runs']:
+        old = base_runs.get(run_result['size'])
+        if not old:
+            continue
+        log(f"size {run_result['size']}")
+        for name, cur in run_result['scenarios'].items():
+            prev = old['scenarios'].get(name)
+            if not prev or 'skipped' in cur or 'skipped' in prev:
+                continue
+            cells = []
+            for p in ('p50', 'p95'):
+                a, b = prev['latency_ms'][p], cur['latency_ms'][p]
+                change = f"{(b - a) / a * 100:+.0f}%" if a else 'n/a'
+                cells.append(f"{p} {a:>9.2f} -> {b:>9.2f} ms ({change:>5})")
+            cmds = f"cmds {prev['mongo_commands']['mean']:.1f} -> {cur['mongo_commands']['mean']:.1f}"
+            log(f"  {name:<24} " + '  '.join(cells) + '  ' + cmds)
@@ -0,0 +1,35 @@
+"""Gunicorn settings for serving the API in production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Pre-forked worker processes, each running a pool of request threads
+workers = int(os.getenv('GUNICORN_WORKERS', os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1))))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+
+# The app (and with it the PyMongo client, its connection pool and the
+# background outbox/export threads) must be created in each worker after the
+# fork; MongoClient is not fork-safe, so never preload.
+preload_app = False
+
+# Keep connections from the nginx upstream open between requests
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Workers get this long to finish in-flight requests on SIGTERM/HUP
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import pytest
+
+# Background threads would race the assertions; tests drive delivery directly
+os.environ['OUTBOX_WORKER'] = 'false'
+os.environ['AUDIT_BUFFERED'] = 'false'
+os.environ['EMAIL_DEV_MODE'] = 'false'
+os.environ['SMTP_HOST'] = ''
+os.environ['SLACK_WEBHOOK'] = ''
+
+# A real MongoDB (the CI service) when reachable, mongomock otherwise
+TEST_MONGODB_URI = os.getenv('TEST_MONGODB_URI', 'mongodb://localhost:27017/weekly_reports_test')
+
+
+def _mongod_reachable(uri):
+    from pymongo import MongoClient
+    try:
+        MongoClient(uri, serverSelectionTimeoutMS=500).admin.command('ping')
+        return True
+    except Exception:
+        return False
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    os.environ['PDF_CACHE_DIR'] = str(tmp_path_factory.mktemp('pdf_cache'))
+    os.environ['EXPORT_DIR'] = str(tmp_path_factory.mktemp('exports'))
+    if _mongod_reachable(TEST_MONGODB_URI):
+        os.environ['MONGODB_URI'] = TEST_MONGODB_URI
+    else:
+        mongomock = pytest.importorskip('mongomock')
+        import flask_pymongo
+        client = mongomock.MongoClient()
+        flask_pymongo.MongoClient = lambda *args, **kwargs: client
+
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    # Let the startup stats backfill finish before tests reset the database
+    for thread in threading.enumerate():
+        if thread.name == 'stats-backfill':
+            thread.join(10)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def clean_db(request):
+    """Empty every collection (indexes are kept) before each test that uses the app"""
+    if 'app' not in request.fixturenames:
+        yield
+        return
+    app = request.getfixturevalue('app')
+    from app import mongo
+    from app.utils.identity import identity_cache
+    with app.app_context():
+        for name in mongo.db.list_collection_names():
+            if not name.startswith('system.'):
+                mongo.db[name].delete_many({})
+    identity_cache.clear()
+    yield
+
+
+@pytest.fixture
+def real_mongo(app):
+    """Skip tests that need server features mongomock lacks ($text, $substrCP, ...)"""
+    from app import mongo
+    if type(mongo.cx).__module__.startswith('mongomock'):
+        pytest.skip('needs a MongoDB server')
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """make_user(name, role='employee', department='Eng') -> (user id, auth headers)"""
+    from flask_jwt_extended import create_access_token
+    from app.models.user import User
+
+    def make(name, role='employee', department='Eng'):
+        with app.app_context():
+            uid = User(name=name, email=f'{name}@example.com', username=name, password='pw',
+                       department=department, role=role).save()
+            token = create_access_token(identity=uid)
+        return uid, {'Authorization': f'Bearer {token}'}
+    return make
@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+
+from app import mongo
+from app.utils import attachments
+
+
+def _write(content, name='notes.txt'):
+    writer = attachments.BlobWriter(name, 'text/plain')
+    writer.write(content)
+    return writer.finish()
+
+
+def test_blob_is_removed_with_its_last_reference(app):
+    with app.app_context():
+        first = _write(b'same content')
+        second = _write(b'same content')
+        path = attachments.blob_path(first['sha256'])
+
+        attachments.release([first])
+        assert os.path.isfile(path)
+        assert attachments.find_blob(first['sha256'])['refs'] == 1
+
+        attachments.release([second])
+        assert not os.path.exists(path)
+        assert attachments.find_blob(first['sha256']) is None
+
+
+def test_upload_during_collection_keeps_its_file(app, monkeypatch):
+    with app.app_context():
+        meta = _write(b'contended content')
+        digest = meta['sha256']
+    results = []
+    remove = os.remove
+
+    def upload_again():
+        with app.app_context():
+            results.append(_write(b'contended content'))
+
+    def slow_remove(path):
+        # The same content is uploaded while the collector deletes the file
+        if not results and path == attachments.blob_path(digest):
+            thread = threading.Thread(target=upload_again)
+            thread.start()
+            time.sleep(0.2)
+            slow_remove.thread = thread
+        remove(path)
+    monkeypatch.setattr(attachments.os, 'remove', slow_remove)
+
+    with app.app_context():
+        attachments.release([meta])
+        slow_remove.thread.join(5)
+        monkeypatch.setattr(attachments.os, 'remove', remove)
+
+        assert results and results[0]['sha256'] == digest
+        blob = mongo.db.attachment_blobs.find_one({'_id': digest})
+        assert blob['refs'] == 1 and 'collecting_until' not in blob
+        with open(attachments.blob_path(digest), 'rb') as f:
+            assert f.read() == b'contended content'
@@ -0,0 +1,45 @@
+import datetime
+
+from bson.objectid import ObjectId
+
+from app import mongo
+
+
+def _seed_logs(app, uid, n):
+    now = datetime.datetime.utcnow()
+    with app.app_context():
+        mongo.db.audit_logs.insert_many([{
+            'user_id': ObjectId(uid), 'action': 'update', 'report_id': None, 'details': {'n': i},
+            'created_at': now - datetime.timedelta(seconds=i)
+        } for i in range(n)])
+
+
+def test_limit_alone_returns_a_list(client, make_user, app):
+    uid, headers = make_user('admin', role='admin')
+    _seed_logs(app, uid, 5)
+
+    response = client.get('/api/reports/audit?limit=3', headers=headers)
+
+    assert response.status_code == 200
+    logs = response.get_json()
+    assert isinstance(logs, list)
+    assert [l['details']['n'] for l in logs] == [0, 1, 2]
+    assert len(client.get('/api/reports/audit', headers=headers).get_json()) == 5
+
+
+def test_paginate_returns_keyset_pages(client, make_user, app):
+    uid, headers = make_user('admin', role='admin')
+    _seed_logs(app, uid, 5)
+
+    first = client.get('/api/reports/audit?paginate=1&limit=3', headers=headers).get_json()
+    second = client.get(f"/api/reports/audit?limit=3&cursor={first['next_cursor']}", headers=headers).get_json()
+
+    assert [l['details']['n'] for l in first['logs']] == [0, 1, 2]
+    assert [l['details']['n'] for l in second['logs']] == [3, 4]
+    assert second['next_cursor'] is None
+
+
+def test_invalid_limit_is_rejected(client, make_user):
+    _, headers = make_user('admin', role='admin')
+
+    assert client.get('/api/reports/audit?limit=ten', headers=headers).status_code == 400
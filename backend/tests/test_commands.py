@@ -0,0 +1,10 @@
+def test_reindex_search_invalidates_listing_etags(app, client, make_user):
+    _, headers = make_user('gina')
+    client.post('/api/reports/', headers=headers, json={'week': 1, 'year': 2024, 'achievements': 'Deployed'})
+    etag = client.get('/api/reports/myreports', headers=headers).headers['ETag']
+    assert client.get('/api/reports/myreports', headers={**headers, 'If-None-Match': etag}).status_code == 304
+
+    result = app.test_cli_runner().invoke(args=['reindex-search'])
+
+    assert 'Reindexed' in result.output
+    assert client.get('/api/reports/myreports', headers={**headers, 'If-None-Match': etag}).status_code == 200
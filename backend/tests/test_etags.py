@@ -0,0 +1,68 @@
+def _create(client, headers, week=1):
+    response = client.post('/api/reports/', headers=headers, json={'week': week, 'year': 2024, 'achievements': 'Shipped'})
+    return response.get_json()['_id']
+
+
+def _revalidate(client, headers, path, etag):
+    return client.get(path, headers={**headers, 'If-None-Match': etag})
+
+
+def test_report_is_not_modified_until_it_changes(client, make_user):
+    _, headers = make_user('lee')
+    report_id = _create(client, headers)
+    path = f'/api/reports/{report_id}'
+
+    first = client.get(path, headers=headers)
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    cached = _revalidate(client, headers, path, etag)
+    assert cached.status_code == 304 and cached.data == b''
+    assert cached.headers['ETag'] == etag
+    # Compressing proxies weaken the tag; it still matches
+    assert _revalidate(client, headers, path, f'W/{etag}').status_code == 304
+
+    client.put(path, headers=headers, json={'achievements': 'Shipped twice'})
+
+    changed = _revalidate(client, headers, path, etag)
+    assert changed.status_code == 200
+    assert changed.get_json()['achievements'] == 'Shipped twice'
+    assert changed.headers['ETag'] != etag
+    assert _revalidate(client, headers, path, changed.headers['ETag']).status_code == 304
+
+
+def test_owner_profile_change_invalidates_report_etag(client, make_user):
+    _, headers = make_user('lee')
+    path = f'/api/reports/{_create(client, headers)}'
+    etag = client.get(path, headers=headers).headers['ETag']
+
+    client.patch('/api/auth/me', headers=headers, json={'name': 'Lee Renamed'})
+
+    response = _revalidate(client, headers, path, etag)
+    assert response.status_code == 200
+    assert response.get_json()['user']['name'] == 'Lee Renamed'
+
+
+def test_listing_etags_follow_the_owners_revision(client, make_user):
+    _, lee = make_user('lee')
+    _, max_ = make_user('max')
+    _, admin = make_user('admin', role='admin')
+    _create(client, lee)
+    mine = client.get('/api/reports/myreports', headers=lee).headers['ETag']
+    everyone = client.get('/api/reports/', headers=admin).headers['ETag']
+    paged = client.get('/api/reports/myreports?limit=1', headers=lee).headers['ETag']
+    assert paged != mine
+
+    # Another user's report leaves lee's listing untouched but not the admin's
+    _create(client, max_)
+
+    assert _revalidate(client, lee, '/api/reports/myreports', mine).status_code == 304
+    assert _revalidate(client, admin, '/api/reports/', everyone).status_code == 200
+
+    _create(client, lee, week=2)
+
+    response = _revalidate(client, lee, '/api/reports/myreports', mine)
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+    assert response.headers['ETag'] != mine
@@ -0,0 +1,87 @@
+import datetime
+import os
+import time
+
+from bson.objectid import ObjectId
+
+from app import mongo
+from app.utils import export_jobs
+
+
+def _wait(client, headers, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f'/api/reports/exports/{job_id}', headers=headers).get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'export job still {job["status"]}')
+
+
+def _orphan(app, uid, status, attempts):
+    """A job left behind by a worker that died while holding it"""
+    now = datetime.datetime.utcnow()
+    with app.app_context():
+        return str(mongo.db.export_jobs.insert_one({
+            'user_id': ObjectId(uid), 'format': 'csv', 'all': False, 'params': {},
+            'status': status, 'rows_done': 0, 'rows_total': None, 'attempts': attempts,
+            'created_at': now - datetime.timedelta(minutes=10),
+            'locked_until': now - datetime.timedelta(minutes=1),
+            'expires_at': now + datetime.timedelta(hours=1)
+        }).inserted_id)
+
+
+def test_export_job_runs_to_completion(client, make_user):
+    _, headers = make_user('alice')
+    client.post('/api/reports/', headers=headers, json={'week': 1, 'year': 2024, 'achievements': 'Shipped'})
+
+    created = client.post('/api/reports/exports', headers=headers, json={'format': 'csv'})
+
+    assert created.status_code == 202
+    job = _wait(client, headers, created.get_json()['id'])
+    assert job['status'] == 'done' and job['rows_done'] == 1
+    download = client.get(job['download_url'], headers=headers)
+    assert b'Shipped' in download.data
+
+
+def test_job_of_a_dead_worker_is_picked_up_again(client, make_user, app):
+    uid, headers = make_user('bob')
+    client.post('/api/reports/', headers=headers, json={'week': 2, 'year': 2024, 'achievements': 'Recovered'})
+    job_id = _orphan(app, uid, 'running', attempts=1)
+
+    job = _wait(client, headers, job_id)
+
+    assert job['status'] == 'done'
+    with app.app_context():
+        assert mongo.db.export_jobs.find_one({'_id': ObjectId(job_id)})['attempts'] == 2
+
+
+def test_job_that_keeps_losing_its_worker_fails(client, make_user, app):
+    uid, headers = make_user('carol')
+    job_id = _orphan(app, uid, 'running', attempts=export_jobs.EXPORT_MAX_ATTEMPTS)
+
+    job = client.get(f'/api/reports/exports/{job_id}', headers=headers).get_json()
+
+    assert job['status'] == 'failed'
+    assert job['expires_at'] is not None
+
+
+def test_worker_that_lost_its_lease_leaves_the_job_alone(client, make_user, app, monkeypatch):
+    uid, headers = make_user('dave')
+    client.post('/api/reports/', headers=headers, json={'week': 3, 'year': 2024, 'achievements': 'Slow'})
+    job_id = _orphan(app, uid, 'queued', attempts=0)
+
+    def steal(reports):
+        # Another worker claims the job while this one is writing
+        with app.app_context():
+            mongo.db.export_jobs.update_one({'_id': ObjectId(job_id)}, {'$set': {'claim': 'other'}})
+        yield ''
+    monkeypatch.setattr(export_jobs, 'iter_csv', steal)
+
+    export_jobs._run_job(app, ObjectId(job_id))
+
+    with app.app_context():
+        job = mongo.db.export_jobs.find_one({'_id': ObjectId(job_id)})
+        leftovers = os.listdir(export_jobs.export_dir())
+    assert job['status'] == 'running'
+    assert not [name for name in leftovers if name.startswith(job_id)]
@@ -0,0 +1,57 @@
+import io
+
+from app import mongo
+
+
+def _upload(client, headers, body, filename):
+    return client.post(
+        '/api/reports/bulk', headers=headers, content_type='multipart/form-data',
+        data={'file': (io.BytesIO(body), filename)}
+    )
+
+
+def test_csv_upload_goes_through_multipart(client, make_user, app):
+    _, headers = make_user('alice')
+    body = (
+        '\ufeffWeek,Year,Achievements,Tags\r\n'
+        '1,2024,"Shipped the release,\r\nthen fixed bugs",backend\r\n'
+        '2,2024,Planned,"infra, docs"\r\n'
+        '99,2024,Bad week,\r\n'
+    ).encode('utf-8')
+
+    response = _upload(client, headers, body, 'reports.csv')
+
+    assert response.status_code == 201, response.get_json()
+    summary = response.get_json()
+    assert summary['created'] == 2
+    assert summary['errors'] == [{'row': 4, 'error': 'week must be between 1 and 53'}]
+    with app.app_context():
+        first = mongo.db.reports.find_one({'week': 1})
+    assert first['achievements'] == 'Shipped the release,\r\nthen fixed bugs'
+    assert first['tags'] == ['backend']
+
+
+def test_csv_upload_rejects_non_utf8(client, make_user):
+    _, headers = make_user('bob')
+
+    response = _upload(client, headers, 'week,year,achievements\n1,2024,café\n'.encode('latin-1'), 'reports.csv')
+
+    assert response.status_code == 400
+    assert 'UTF-8' in response.get_json()['msg']
+
+
+def test_xlsx_upload_goes_through_multipart(client, make_user):
+    from openpyxl import Workbook
+
+    _, headers = make_user('carol')
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['week', 'year', 'achievements'])
+    ws.append([3, 2024, 'From a spreadsheet'])
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    response = _upload(client, headers, buf.getvalue(), 'reports.xlsx')
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['created'] == 1
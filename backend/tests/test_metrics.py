@@ -0,0 +1,25 @@
+LOCAL = {'REMOTE_ADDR': '127.0.0.1'}
+
+
+def test_local_scrape_needs_a_token_by_default(client, monkeypatch):
+    monkeypatch.delenv('METRICS_ALLOW_LOCAL', raising=False)
+
+    assert client.get('/api/metrics', environ_base=LOCAL).status_code == 401
+
+
+def test_local_scrape_allowed_when_opted_in(client, monkeypatch):
+    monkeypatch.setenv('METRICS_ALLOW_LOCAL', 'true')
+
+    response = client.get('/api/metrics', environ_base=LOCAL)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert client.get('/api/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 401
+
+
+def test_admin_token_is_accepted(client, make_user):
+    _, admin = make_user('admin', role='admin')
+    _, employee = make_user('emp')
+
+    assert client.get('/api/metrics', headers=admin).status_code == 200
+    assert client.get('/api/metrics', headers=employee).status_code == 403
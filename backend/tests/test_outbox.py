@@ -0,0 +1,45 @@
+import logging
+import socket
+
+from app import mongo
+from app.utils import outbox
+
+
+def _closed_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_slack_is_not_queued_without_a_webhook(app, monkeypatch):
+    monkeypatch.delenv('SLACK_WEBHOOK', raising=False)
+    with app.app_context():
+        assert outbox.enqueue_slack('Report approved') is None
+        assert mongo.db.notification_outbox.count_documents({}) == 0
+
+
+def test_dev_mode_logs_emails_without_smtp(app, monkeypatch, caplog):
+    monkeypatch.setenv('EMAIL_DEV_MODE', 'true')
+    with app.app_context(), caplog.at_level(logging.INFO):
+        message_id = outbox.enqueue_email('dev@example.com', 'Hello', 'Body')
+        outbox.drain()
+        assert mongo.db.notification_outbox.find_one({'_id': message_id})['status'] == 'sent'
+    assert '[DEV EMAIL]' in caplog.text and 'dev@example.com' in caplog.text
+
+
+def test_dev_mode_treats_smtp_errors_as_delivered(app, monkeypatch, caplog):
+    monkeypatch.setenv('EMAIL_DEV_MODE', 'true')
+    monkeypatch.setenv('SMTP_HOST', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', str(_closed_port()))
+    monkeypatch.setenv('SMTP_STARTTLS', 'false')
+    with app.app_context(), caplog.at_level(logging.INFO):
+        message_id = outbox.enqueue_email('dev@example.com', 'Hello', 'Body')
+        outbox.drain()
+        assert mongo.db.notification_outbox.find_one({'_id': message_id})['status'] == 'sent'
+    assert 'SMTP ERROR, LOGGING INSTEAD' in caplog.text
+
+    monkeypatch.setenv('EMAIL_DEV_MODE', 'false')
+    with app.app_context():
+        message_id = outbox.enqueue_email('prod@example.com', 'Hello', 'Body')
+        outbox.drain()
+        assert mongo.db.notification_outbox.find_one({'_id': message_id})['status'] == 'pending'
@@ -0,0 +1,70 @@
+import datetime
+
+from bson.objectid import ObjectId
+
+from app import mongo
+
+
+def _insert_reports(app, uid, created):
+    with app.app_context():
+        return [str(i) for i in mongo.db.reports.insert_many([{
+            'user_id': ObjectId(uid), 'week': n % 52 + 1, 'year': 2024, 'status': 'submitted',
+            'achievements': f'Report {n}', 'challenges': '', 'next_week_plan': '', 'created_at': at
+        } for n, at in enumerate(created)]).inserted_ids]
+
+
+def _all_pages(client, headers, path, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        body = client.get(path, headers=headers, query_string=params).get_json()
+        ids += [r['_id'] for r in body['reports']]
+        pages += 1
+        cursor = body['next_cursor']
+        if not cursor:
+            return ids, pages
+
+
+def test_cursor_pages_through_equal_timestamps_without_gaps(app, client, make_user):
+    uid, headers = make_user('hana')
+    now = datetime.datetime(2024, 5, 1, 12, 0, 0)
+    # Seven reports share one created_at, so the page boundaries fall inside the tie
+    created = [now] * 7 + [now + datetime.timedelta(minutes=1), now - datetime.timedelta(minutes=1)] * 2
+    ids = _insert_reports(app, uid, created)
+
+    paged, pages = _all_pages(client, headers, '/api/reports/myreports', 3)
+
+    assert pages == 4
+    assert len(paged) == len(set(paged)) == 11
+    assert set(paged) == set(ids)
+    with app.app_context():
+        expected = [str(d['_id']) for d in mongo.db.reports.find().sort([('created_at', -1), ('_id', -1)])]
+    assert paged == expected
+
+
+def test_admin_listing_pages_the_same_way(app, client, make_user):
+    uid, _ = make_user('ivan')
+    _, admin = make_user('root', role='admin')
+    ids = _insert_reports(app, uid, [datetime.datetime(2024, 5, 1)] * 5)
+
+    paged, _ = _all_pages(client, admin, '/api/reports/', 2)
+
+    assert sorted(paged) == sorted(ids)
+
+
+def test_without_limit_or_cursor_a_plain_list_is_returned(app, client, make_user):
+    uid, headers = make_user('jo')
+    _insert_reports(app, uid, [datetime.datetime(2024, 5, 1)] * 2)
+
+    body = client.get('/api/reports/myreports', headers=headers).get_json()
+
+    assert isinstance(body, list) and len(body) == 2
+
+
+def test_bad_cursor_or_limit_is_rejected(client, make_user):
+    _, headers = make_user('kim')
+
+    assert client.get('/api/reports/myreports?cursor=not-a-cursor', headers=headers).status_code == 400
+    assert client.get('/api/reports/myreports?limit=many', headers=headers).status_code == 400
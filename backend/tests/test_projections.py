@@ -0,0 +1,71 @@
+import datetime
+
+from bson.objectid import ObjectId
+
+from app import mongo
+from app.models.report import SUMMARY_FIELDS, SUMMARY_PREVIEW_CHARS
+
+
+def _insert_report(app, uid, **extra):
+    doc = {
+        'user_id': ObjectId(uid), 'week': 3, 'year': 2024, 'status': 'submitted', 'tags': ['ops'],
+        'achievements': 'x' * 500, 'challenges': 'c', 'next_week_plan': 'n',
+        'attachments': [{'filename': 'a.pdf'}, {'filename': 'b.pdf'}],
+        'created_at': datetime.datetime(2024, 5, 1), **extra
+    }
+    with app.app_context():
+        return str(mongo.db.reports.insert_one(doc).inserted_id)
+
+
+def test_fields_returns_only_the_requested_keys(app, client, make_user):
+    uid, headers = make_user('kim')
+    _insert_report(app, uid)
+
+    plain = client.get('/api/reports/myreports', headers=headers, query_string={'fields': 'week,status'})
+    with_user = client.get('/api/reports/myreports', headers=headers, query_string={'fields': 'tags,user'})
+
+    assert plain.status_code == 200
+    assert set(plain.get_json()[0]) == {'_id', 'user_id', 'week', 'status'}
+    report = with_user.get_json()[0]
+    assert set(report) == {'_id', 'user_id', 'tags', 'user'}
+    assert report['user']['name'] == 'kim'
+
+
+def test_fields_keep_created_at_for_keyset_cursors(app, client, make_user):
+    uid, headers = make_user('kim')
+    for _ in range(3):
+        _insert_report(app, uid)
+
+    first = client.get('/api/reports/myreports', headers=headers,
+                       query_string={'fields': 'week', 'limit': 2}).get_json()
+    second = client.get('/api/reports/myreports', headers=headers,
+                        query_string={'fields': 'week', 'limit': 2, 'cursor': first['next_cursor']}).get_json()
+
+    assert set(first['reports'][0]) == {'_id', 'user_id', 'week', 'created_at'}
+    assert len(first['reports']) == 2 and len(second['reports']) == 1
+    assert second['next_cursor'] is None
+
+
+def test_unknown_fields_and_views_are_rejected(client, make_user):
+    _, headers = make_user('kim')
+
+    unknown = client.get('/api/reports/myreports', headers=headers, query_string={'fields': 'week,password,search_tokens'})
+    view = client.get('/api/reports/myreports', headers=headers, query_string={'view': 'everything'})
+
+    assert unknown.status_code == 400
+    assert unknown.get_json()['msg'] == 'Unknown field(s): password, search_tokens'
+    assert view.status_code == 400
+
+
+def test_summary_view_returns_previews(app, client, make_user, real_mongo):
+    uid, headers = make_user('kim')
+    _insert_report(app, uid)
+
+    response = client.get('/api/reports/myreports', headers=headers, query_string={'view': 'summary'})
+
+    assert response.status_code == 200
+    report = response.get_json()[0]
+    assert set(report) <= SUMMARY_FIELDS | {'_id'}
+    assert 'achievements' not in report and 'challenges' not in report
+    assert report['achievements_preview'] == 'x' * SUMMARY_PREVIEW_CHARS
+    assert report['attachment_count'] == 2
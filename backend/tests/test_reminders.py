@@ -0,0 +1,223 @@
+import datetime
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from aiosmtpd.controller import Controller
+from bson.objectid import ObjectId
+
+from app import mongo
+from app.utils import outbox, reminders
+
+
+class SMTPSink:
+    """aiosmtpd handler that records messages and can refuse addresses"""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = {}  # address -> SMTP connection it arrived on
+        self.refuse = {}  # address -> times to answer 451
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if self.refuse.get(address):
+            self.refuse[address] -= 1
+            return '451 Try again later'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos[0], envelope.content.decode('utf-8', 'replace')))
+        self.sessions[envelope.rcpt_tos[0]] = id(session)
+        return '250 OK'
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    sink = SMTPSink()
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    controller = Controller(sink, hostname='127.0.0.1', port=port)
+    controller.start()
+    monkeypatch.setenv('SMTP_HOST', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', str(port))
+    monkeypatch.setenv('SMTP_STARTTLS', 'false')
+    monkeypatch.setenv('SMTP_FROM', 'reports@example.com')
+    yield sink
+    controller.stop()
+
+
+class SlackStub(BaseHTTPRequestHandler):
+    """Local stand-in for the Slack webhook; set status to make it fail"""
+    messages = []
+    status = 200
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        SlackStub.messages.append(json.loads(body)['text'])
+        self.send_response(SlackStub.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slack(monkeypatch):
+    SlackStub.messages = []
+    SlackStub.status = 200
+    server = HTTPServer(('127.0.0.1', 0), SlackStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv('SLACK_WEBHOOK', f'http://127.0.0.1:{server.server_port}/hook')
+    yield SlackStub
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def recipients(app, monkeypatch):
+    """Users the reminder run targets. missing_reporters uses a $lookup
+    pipeline mongomock cannot run, so its result is computed in Python."""
+    def missing(iso_year, iso_week):
+        done = {r['user_id'] for r in mongo.db.reports.find({'status': {'$in': reminders.DONE_STATUSES}})}
+        return [u for u in mongo.db.users.find({}, {'name': 1, 'email': 1, 'department': 1}) if u['_id'] not in done]
+    monkeypatch.setattr(reminders, 'missing_reporters', missing)
+
+
+def _drain(app):
+    with app.app_context():
+        while outbox.drain():
+            pass
+
+
+def _run(client, headers, run_id):
+    return client.get(f'/api/reports/reminders/runs/{run_id}', headers=headers).get_json()
+
+
+def test_reminders_are_delivered_through_the_outbox(client, make_user, app, smtp, slack, recipients):
+    _, admin = make_user('admin', role='admin')
+    make_user('alice')
+    make_user('bob')
+
+    started = client.post('/api/reports/reminders/send', headers=admin, json={})
+    assert started.status_code == 202
+    run_id = started.get_json()['run_id']
+    _drain(app)
+
+    run = _run(client, admin, run_id)
+    assert run['status'] == 'done'
+    assert (run['sent'], run['failed'], run['pending']) == (3, 0, 0)
+    assert sorted(to for to, _ in smtp.messages) == ['admin@example.com', 'alice@example.com', 'bob@example.com']
+    assert 'Subject: Reminder: Weekly report' in smtp.messages[0][1]
+
+    # The summary is queued when the run finishes
+    _drain(app)
+    assert slack.messages == ['Sent weekly report reminders to 3 user(s) for week {week} {year}.'.format(**run)]
+
+
+def test_each_department_gets_its_own_smtp_session(client, make_user, app, smtp, slack, recipients):
+    _, admin = make_user('admin', role='admin', department='Ops')
+    make_user('alice', department='Eng')
+    make_user('bob', department='Eng')
+    make_user('carol', department='Sales')
+
+    run_id = client.post('/api/reports/reminders/send', headers=admin, json={}).get_json()['run_id']
+    _drain(app)
+
+    assert _run(client, admin, run_id)['sent'] == 4
+    sessions = smtp.sessions
+    assert sessions['alice@example.com'] == sessions['bob@example.com']
+    assert len({sessions['admin@example.com'], sessions['alice@example.com'], sessions['carol@example.com']}) == 3
+
+
+def test_refused_reminder_is_retried_with_backoff(client, make_user, app, smtp, slack, recipients, monkeypatch):
+    monkeypatch.setattr(outbox, 'OUTBOX_BACKOFF_SECONDS', 0)
+    _, admin = make_user('admin', role='admin')
+    make_user('alice')
+    smtp.refuse['alice@example.com'] = 1
+
+    run_id = client.post('/api/reports/reminders/send', headers=admin, json={}).get_json()['run_id']
+    with app.app_context():
+        outbox.drain()
+        retried = mongo.db.notification_outbox.find_one({'payload.to': 'alice@example.com'})
+    assert retried['status'] == 'pending' and '451' in retried['last_error']
+    assert _run(client, admin, run_id)['status'] == 'running'
+
+    _drain(app)
+
+    run = _run(client, admin, run_id)
+    assert run['status'] == 'done' and run['sent'] == 2
+    assert sorted(to for to, _ in smtp.messages) == ['admin@example.com', 'alice@example.com']
+
+
+def test_reminder_failing_for_good_is_recorded(client, make_user, app, smtp, slack, recipients, monkeypatch):
+    monkeypatch.setattr(outbox, 'OUTBOX_MAX_ATTEMPTS', 1)
+    _, admin = make_user('admin', role='admin')
+    make_user('alice')
+    smtp.refuse['alice@example.com'] = 5
+
+    run_id = client.post('/api/reports/reminders/send', headers=admin, json={}).get_json()['run_id']
+    _drain(app)
+
+    run = _run(client, admin, run_id)
+    assert run['status'] == 'done'
+    assert (run['sent'], run['failed']) == (1, 1)
+    failed = [r for r in run['recipients'] if r['status'] == 'failed']
+    assert failed[0]['email'] == 'alice@example.com' and '451' in failed[0]['error']
+
+
+def test_run_left_running_by_a_dead_worker_is_recovered(client, make_user, app, smtp, slack):
+    admin_id, admin = make_user('admin', role='admin')
+    alice_id, _ = make_user('alice')
+    long_ago = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+    with app.app_context():
+        # The process died after recording the deliveries but before queueing
+        # them, and another delivery was sent without the hook running
+        run_id = mongo.db.reminder_runs.insert_one({
+            'year': 2024, 'week': 10, 'created_by': ObjectId(admin_id), 'created_at': long_ago,
+            'status': 'running', 'total': 2, 'sent': 0, 'failed': 0, 'skipped': 0
+        }).inserted_id
+        queued, lost = ObjectId(), ObjectId()
+        mongo.db.reminder_deliveries.insert_many([
+            {'_id': queued, 'run_id': run_id, 'user_id': ObjectId(admin_id), 'name': 'admin',
+             'email': 'admin@example.com', 'department': 'Eng', 'status': 'pending'},
+            {'_id': lost, 'run_id': run_id, 'user_id': ObjectId(alice_id), 'name': 'alice',
+             'email': 'alice@example.com', 'department': 'Eng', 'status': 'pending'},
+        ])
+        mongo.db.notification_outbox.insert_one({
+            '_id': queued, 'channel': 'email', 'kind': reminders.REMINDER_KIND, 'status': 'sent',
+            'payload': {'to': 'admin@example.com', 'subject': 's', 'body': 'b'}, 'attempts': 1,
+            'created_at': long_ago, 'next_attempt_at': long_ago, 'done_at': long_ago
+        })
+
+    # Polling the run reconciles it with the outbox
+    run = _run(client, admin, str(run_id))
+    assert run['sent'] == 1 and run['pending'] == 1
+    _drain(app)
+
+    run = _run(client, admin, str(run_id))
+    assert run['status'] == 'done'
+    assert (run['sent'], run['failed']) == (2, 0)
+    assert [to for to, _ in smtp.messages] == ['alice@example.com']
+
+
+def test_failed_slack_summary_is_retried(client, make_user, app, smtp, slack, recipients, monkeypatch):
+    monkeypatch.setattr(outbox, 'OUTBOX_BACKOFF_SECONDS', 0)
+    _, admin = make_user('admin', role='admin')
+    slack.status = 500
+
+    client.post('/api/reports/reminders/send', headers=admin, json={})
+    with app.app_context():
+        outbox.drain()
+        outbox.drain()
+        message = mongo.db.notification_outbox.find_one({'channel': 'slack'})
+    assert message['status'] == 'pending' and len(slack.messages) == 1
+
+    slack.status = 200
+    _drain(app)
+
+    assert len(slack.messages) == 2
+    with app.app_context():
+        assert mongo.db.notification_outbox.find_one({'channel': 'slack'})['status'] == 'sent'
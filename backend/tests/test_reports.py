@@ -0,0 +1,32 @@
+from bson.objectid import ObjectId
+
+from app import mongo
+from app.models import report as report_model
+from app.models.report import Report
+
+
+def test_partial_text_edits_keep_each_others_search_tokens(app, make_user, monkeypatch):
+    uid, _ = make_user('frank')
+    with app.app_context():
+        report_id = Report(user_id=uid, week=1, year=2024, achievements='original',
+                           challenges='original', next_week_plan='').save()
+    tokens = report_model.search_tokens
+    calls = []
+
+    def racing_tokens(doc):
+        # Another request edits `challenges` after ours read it
+        if not calls:
+            mongo.db.reports.update_one({'_id': ObjectId(report_id)}, {'$set': {
+                'challenges': 'kubernetes', 'search_tokens': tokens({'achievements': 'original', 'challenges': 'kubernetes'})
+            }})
+        calls.append(doc)
+        return tokens(doc)
+    monkeypatch.setattr(report_model, 'search_tokens', racing_tokens)
+
+    with app.app_context():
+        Report.modify(report_id, {'achievements': 'terraform'})
+        stored = mongo.db.reports.find_one({'_id': ObjectId(report_id)})
+
+    assert len(calls) == 2
+    assert stored['challenges'] == 'kubernetes' and stored['achievements'] == 'terraform'
+    assert {'terraform', 'kubernetes'} <= set(stored['search_tokens'])
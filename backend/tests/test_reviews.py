@@ -0,0 +1,85 @@
+from bson.objectid import ObjectId
+
+from app import mongo
+from app.models.report import Report
+
+
+def _report(app, uid, week, status='submitted'):
+    with app.app_context():
+        return Report(user_id=uid, week=week, year=2024, achievements='a', challenges='c',
+                      next_week_plan='n', status=status).save()
+
+
+def _stored(app, report_id):
+    with app.app_context():
+        return mongo.db.reports.find_one({'_id': ObjectId(report_id)})
+
+
+def test_bulk_review_reports_conflicts_per_item(app, client, make_user):
+    uid, _ = make_user('grace')
+    _, admin = make_user('admin', role='admin')
+    approve = _report(app, uid, 1)
+    reject = _report(app, uid, 2)
+    draft = _report(app, uid, 3, status='draft')
+    missing = str(ObjectId())
+
+    response = client.post('/api/reports/review/bulk', headers=admin, json={
+        'comment': 'see notes',
+        'items': [
+            {'id': approve, 'action': 'approve'},
+            {'id': reject, 'action': 'reject'},
+            {'id': draft, 'action': 'approve'},
+            {'id': missing, 'action': 'approve'},
+            {'id': approve, 'action': 'reject'},
+            {'id': 'nope', 'action': 'approve'},
+        ]
+    })
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['approved'], body['rejected'], body['failed']) == (1, 1, 4)
+    results = body['results']
+    assert [r['ok'] for r in results] == [True, True, False, False, False, False]
+    assert results[1]['status'] == 'rejected'
+    assert results[2]['status'] == 'draft' and 'not submitted' in results[2]['error']
+    assert results[3]['error'] == 'Report not found'
+    assert results[4]['error'] == 'Duplicate report id'
+    assert results[5]['error'] == 'Invalid report id'
+
+    assert _stored(app, draft)['status'] == 'draft'
+    approvals = _stored(app, approve)['approvals']
+    assert len(approvals) == 1 and approvals[0]['batch'] == body['batch_id']
+    assert _stored(app, reject)['approvals'][0]['comment'] == 'see notes'
+
+
+def test_bulk_review_does_not_review_twice(app, client, make_user):
+    uid, _ = make_user('grace')
+    _, admin = make_user('admin', role='admin')
+    report_id = _report(app, uid, 1)
+
+    first = client.post('/api/reports/review/bulk', headers=admin,
+                        json={'items': [{'id': report_id, 'action': 'approve'}]}).get_json()
+    # A second reviewer acting on a stale list loses the status precondition
+    second = client.post('/api/reports/review/bulk', headers=admin, json={
+        'items': [{'id': report_id, 'action': 'reject', 'comment': 'too late'}]
+    }).get_json()
+
+    assert first['approved'] == 1
+    assert second['failed'] == 1
+    assert second['results'][0] == {'id': report_id, 'action': 'reject', 'ok': False, 'status': 'approved',
+                                    'error': 'Report is approved, not submitted'}
+    stored = _stored(app, report_id)
+    assert stored['status'] == 'approved' and len(stored['approvals']) == 1
+
+
+def test_bulk_review_rejects_malformed_requests(client, make_user):
+    _, user = make_user('grace')
+    _, admin = make_user('admin', role='admin')
+    items = {'items': [{'id': str(ObjectId()), 'action': 'approve'}]}
+
+    assert client.post('/api/reports/review/bulk', headers=user, json=items).status_code == 403
+    assert client.post('/api/reports/review/bulk', headers=admin, json={'items': []}).status_code == 400
+    rejected = client.post('/api/reports/review/bulk', headers=admin, json={
+        'items': [{'id': str(ObjectId()), 'action': 'reject'}]
+    }).get_json()
+    assert rejected['results'][0]['error'] == 'Rejection requires a comment'
@@ -0,0 +1,53 @@
+def _report(client, headers, achievements, challenges=''):
+    response = client.post('/api/reports/', headers=headers, json={
+        'week': 1, 'year': 2024, 'achievements': achievements, 'challenges': challenges
+    })
+    assert response.status_code == 201
+    return response.get_json()['_id']
+
+
+def _search(client, headers, **params):
+    response = client.get('/api/reports/myreports', headers=headers, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return {r['_id'] for r in response.get_json()}
+
+
+def test_prefix_search_uses_the_stored_tokens(client, make_user):
+    _, headers = make_user('lena')
+    deploy = _report(client, headers, 'Deployed the billing service')
+    other = _report(client, headers, 'Reviewed pull requests', 'Flaky deployment pipeline')
+    _report(client, headers, 'Planned the roadmap')
+
+    assert _search(client, headers, q='deploy*') == {deploy, other}
+    assert _search(client, headers, q='deploy* bill*') == {deploy}
+
+
+def test_search_tokens_follow_edits(client, make_user):
+    _, headers = make_user('mia')
+    report_id = _report(client, headers, 'Migrated the database')
+
+    client.put(f'/api/reports/{report_id}', headers=headers, json={'achievements': 'Wrote documentation'})
+
+    assert _search(client, headers, q='migrat*') == set()
+    assert _search(client, headers, q='docum*') == {report_id}
+
+
+def test_regex_mode_is_an_explicit_opt_in(client, make_user):
+    _, headers = make_user('nia')
+    report_id = _report(client, headers, 'Fixed the CI-runner cache')
+
+    assert _search(client, headers, q='ci-run', match='regex') == {report_id}
+    too_long = client.get('/api/reports/myreports', headers=headers, query_string={'q': 'x' * 300, 'match': 'regex'})
+    assert too_long.status_code == 400
+
+
+def test_word_search_ranks_by_relevance(client, make_user, real_mongo):
+    _, headers = make_user('omar')
+    once = _report(client, headers, 'Reviewed the invoice flow')
+    twice = _report(client, headers, 'Invoice export and invoice emails')
+    _report(client, headers, 'Unrelated work')
+
+    response = client.get('/api/reports/myreports', headers=headers, query_string={'q': 'invoice', 'sort': 'relevance'})
+
+    assert [r['_id'] for r in response.get_json()] == [twice, once]
+    assert _search(client, headers, q='"invoice flow"') == {once}
@@ -0,0 +1,61 @@
+from app.utils import attachments
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+def _stored(app):
+    with app.app_context():
+        writer = attachments.BlobWriter('clip.mp4', 'video/mp4')
+        writer.write(CONTENT)
+        return writer.finish()
+
+
+def test_range_request_returns_partial_content(app, client):
+    meta = _stored(app)
+
+    response = client.get(meta['url'], headers={'Range': 'bytes=100-199'})
+
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.data == CONTENT[100:200]
+    assert response.mimetype == 'video/mp4'
+
+
+def test_open_ended_and_unsatisfiable_ranges(app, client):
+    meta = _stored(app)
+
+    tail = client.get(meta['url'], headers={'Range': 'bytes=10000-'})
+    assert tail.status_code == 206
+    assert tail.headers['Content-Range'] == f'bytes 10000-{len(CONTENT) - 1}/{len(CONTENT)}'
+
+    beyond = client.get(meta['url'], headers={'Range': f'bytes={len(CONTENT) + 10}-'})
+    assert beyond.status_code == 416
+    assert beyond.headers['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+
+def test_blob_hash_is_the_etag(app, client):
+    meta = _stored(app)
+
+    first = client.get(meta['url'])
+    assert first.status_code == 200
+    assert first.headers['ETag'] == f'"{meta["sha256"]}"'
+    assert 'immutable' in first.headers['Cache-Control']
+
+    again = client.get(meta['url'], headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+    stale = client.get(meta['url'], headers={'Range': 'bytes=0-9', 'If-Range': '"other"'})
+    assert stale.status_code == 200 and len(stale.data) == len(CONTENT)
+
+
+def test_accel_redirect_hands_the_transfer_to_nginx(app, client, monkeypatch):
+    monkeypatch.setattr(attachments, 'UPLOADS_ACCEL_REDIRECT', '/_uploads/')
+    meta = _stored(app)
+    digest = meta['sha256']
+
+    response = client.get(meta['url'])
+
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == f'/_uploads/blobs/{digest[:2]}/{digest}'
+    assert response.data == b''
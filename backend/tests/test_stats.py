@@ -0,0 +1,88 @@
+import datetime
+
+from bson.objectid import ObjectId
+
+from app import mongo
+from app.utils import stats as report_stats
+
+
+def _existing_reports(app, user_id, n):
+    """Reports written before the rollups existed (no stats buckets)"""
+    with app.app_context():
+        mongo.db.reports.insert_many([{
+            'user_id': ObjectId(user_id), 'week': w, 'year': 2024, 'status': 'submitted',
+            'achievements': '', 'challenges': '', 'next_week_plan': '', 'created_at': datetime.datetime.utcnow()
+        } for w in range(1, n + 1)])
+
+
+def _total(client, headers):
+    response = client.get('/api/reports/stats', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['overall']['total']
+
+
+def test_stats_count_existing_reports_before_and_after_backfill(app, client, make_user, monkeypatch):
+    monkeypatch.setattr(report_stats, '_ready', False)
+    uid, headers = make_user('dana')
+    _, admin = make_user('root', role='admin')
+    _existing_reports(app, uid, 5)
+
+    # A write before the first /stats load must not hide the older reports
+    created = client.post('/api/reports/', headers=headers, json={'week': 30, 'year': 2024, 'status': 'submitted'})
+    assert created.status_code == 201
+    assert _total(client, admin) == 6
+
+    report_stats.backfill(app)
+    with app.app_context():
+        assert report_stats.rollups_ready()
+    assert _total(client, admin) == 6
+
+    client.delete(f"/api/reports/{created.get_json()['_id']}", headers=headers)
+    assert _total(client, admin) == 5
+
+
+def test_backfill_runs_once_per_version(app, monkeypatch):
+    monkeypatch.setattr(report_stats, '_ready', False)
+    with app.app_context():
+        assert report_stats._claim_backfill() is not None
+        # Held by the first claimant until its lease runs out
+        assert report_stats._claim_backfill() is None
+        report_stats.rebuild()
+        assert report_stats._claim_backfill() is None
+        monkeypatch.setattr(report_stats, 'STATS_VERSION', report_stats.STATS_VERSION + 1)
+        assert report_stats._claim_backfill() is not None
+
+
+def test_rebuild_is_repeatable_and_drops_stale_buckets(app, make_user):
+    uid, _ = make_user('erin')
+    _existing_reports(app, uid, 3)
+    with app.app_context():
+        report_stats.apply({(1999, 1, 'Gone', 'draft'): 4})
+        report_stats.rebuild()
+        report_stats.rebuild()
+        buckets = list(mongo.db.report_stats.find({}, {'_id': 0}))
+    assert sorted((b['week'], b['count']) for b in buckets) == [(1, 1), (2, 1), (3, 1)]
+
+
+def _buckets(app):
+    with app.app_context():
+        return {(b['week'], b['department'], b['status']): b['count']
+                for b in mongo.db.report_stats.find() if b['count']}
+
+
+def test_rollups_use_the_stored_department_not_a_cached_identity(app, client, make_user):
+    uid, headers = make_user('erin', department='Eng')
+    client.get('/api/auth/me', headers=headers)  # caches the identity with Eng
+    with app.app_context():
+        # Another worker changed the department; this one's cache is stale
+        mongo.db.users.update_one({'_id': ObjectId(uid)}, {'$set': {'department': 'Sales'}})
+
+    created = client.post('/api/reports/', headers=headers, json={'week': 7, 'year': 2024, 'status': 'submitted'})
+    assert created.status_code == 201
+    assert _buckets(app) == {(7, 'Sales', 'submitted'): 1}
+
+    client.put(f"/api/reports/{created.get_json()['_id']}", headers=headers, json={'week': 8})
+    assert _buckets(app) == {(8, 'Sales', 'submitted'): 1}
+
+    assert client.patch('/api/auth/me', headers=headers, json={'department': 'Ops'}).status_code == 200
+    assert _buckets(app) == {(8, 'Ops', 'submitted'): 1}
@@ -0,0 +1,86 @@
+import io
+import os
+
+from app import mongo
+from app.utils import attachments
+
+
+def _create(client, headers, files):
+    data = {'week': '5', 'year': '2024', 'achievements': 'With files'}
+    data['attachments'] = [(io.BytesIO(body), name, mime) for name, body, mime in files]
+    return client.post('/api/reports/', headers=headers, content_type='multipart/form-data', data=data)
+
+
+def test_any_type_but_markup_is_accepted_by_default(client, make_user):
+    _, headers = make_user('alice')
+
+    response = _create(client, headers, [
+        ('clip.mp4', b'\x00\x00\x00\x18ftypmp42', 'video/mp4'),
+        ('notes.md', b'# Notes', 'text/markdown'),
+        ('doc.odt', b'PK\x03\x04', 'application/vnd.oasis.opendocument.text'),
+    ])
+
+    assert response.status_code == 201, response.get_json()
+    assert [a['mime'] for a in response.get_json()['attachments']] == [
+        'video/mp4', 'text/markdown', 'application/vnd.oasis.opendocument.text'
+    ]
+    html = _create(client, headers, [('page.html', b'hello', 'text/html')])
+    assert html.status_code == 400
+
+
+def test_allowlist_is_opt_in(client, make_user, monkeypatch):
+    monkeypatch.setattr(attachments, 'ALLOWED_MIME_TYPES', ['image/', 'text/plain'])
+    _, headers = make_user('bob')
+
+    assert _create(client, headers, [('clip.mp4', b'video', 'video/mp4')]).status_code == 400
+    assert _create(client, headers, [('a.txt', b'plain', 'text/plain')]).status_code == 201
+
+
+def _blob_files(app):
+    with app.app_context():
+        root = attachments.blob_dir()
+    return sorted(name for _, _, names in os.walk(root) for name in names)
+
+
+def test_oversized_file_is_rejected_and_earlier_parts_released(app, client, make_user):
+    _, headers = make_user('carl')
+    before = _blob_files(app)
+    too_big = b'x' * (attachments.MAX_ATTACHMENT_BYTES + 1)
+
+    response = _create(client, headers, [
+        ('first.txt', b'kept until the request fails', 'text/plain'),
+        ('big.bin', too_big, 'application/octet-stream'),
+    ])
+
+    assert response.status_code == 413
+    with app.app_context():
+        assert mongo.db.attachment_blobs.count_documents({}) == 0
+        assert mongo.db.reports.count_documents({}) == 0
+    assert _blob_files(app) == before
+
+
+def test_markup_is_rejected_by_content_and_earlier_parts_released(app, client, make_user):
+    _, headers = make_user('dina')
+    before = _blob_files(app)
+
+    response = _create(client, headers, [
+        ('first.txt', b'kept until the request fails', 'text/plain'),
+        ('image.png', b'  <svg xmlns="http://www.w3.org/2000/svg"></svg>', 'image/png'),
+    ])
+
+    assert response.status_code == 400
+    assert 'markup' in response.get_json()['msg']
+    with app.app_context():
+        assert mongo.db.attachment_blobs.count_documents({}) == 0
+    assert _blob_files(app) == before
+
+
+def test_identical_uploads_share_one_blob(app, client, make_user):
+    _, headers = make_user('ed')
+
+    response = _create(client, headers, [('a.txt', b'same', 'text/plain'), ('b.txt', b'same', 'text/plain')])
+
+    assert response.status_code == 201
+    with app.app_context():
+        blobs = list(mongo.db.attachment_blobs.find())
+    assert len(blobs) == 1 and blobs[0]['refs'] == 2
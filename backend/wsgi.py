@@ -0,0 +1,4 @@
+from app import create_app
+
+# Production entry point (see gunicorn.conf.py); run.py is the dev server
+app = create_app()
@@ -8,12 +8,32 @@ const AdminDashboard = () => {
   const [reports, setReports] = useState([]);
   const [loading, setLoading] = useState(true);
   const [stats, setStats] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+
+  const PAGE_SIZE = 50;
+  const LIST_FIELDS = 'user,week,year,status,submitted_at';
+
+  // Reload the first page of reports (keyset paginated on the server)
+  const refreshReports = async () => {
+    const res = await axios.get('/api/reports', { params: { limit: PAGE_SIZE, fields: LIST_FIELDS } });
+    setReports(res.data.reports);
+    setNextCursor(res.data.next_cursor);
+  };
+
+  const loadMore = async () => {
+    try {
+      const res = await axios.get('/api/reports', { params: { limit: PAGE_SIZE, cursor: nextCursor, fields: LIST_FIELDS } });
+      setReports(prev => [...prev, ...res.data.reports]);
+      setNextCursor(res.data.next_cursor);
+    } catch (err) {
+      console.error(err);
+    }
+  };
 
   useEffect(() => {
     const fetchReports = async () => {
       try {
-        const res = await axios.get('/api/reports');
-        setReports(res.data);
+        await refreshReports();
         // fetch stats for charts
         const s = await axios.get('/api/reports/stats');
         setStats(s.data);
@@ -126,8 +146,7 @@ const AdminDashboard = () => {
                               try {
                                 await axios.post(`/api/reports/${report._id}/approve`, {});
                                 // refresh
-                                const res = await axios.get('/api/reports');
-                                setReports(res.data);
+                                await refreshReports();
                                 const s = await axios.get('/api/reports/stats');
                                 setStats(s.data);
                               } catch (err) {
@@ -139,8 +158,7 @@ const AdminDashboard = () => {
                               if (!comment) return alert('Rejection requires a comment');
                               try {
                                 await axios.post(`/api/reports/${report._id}/reject`, { comment });
-                                const res = await axios.get('/api/reports');
-                                setReports(res.data);
+                                await refreshReports();
                                 const s = await axios.get('/api/reports/stats');
                                 setStats(s.data);
                               } catch (err) {
@@ -155,6 +173,11 @@ const AdminDashboard = () => {
                 </TableBody>
               </Table>
             </TableContainer>
+            {nextCursor && (
+              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                <Button variant="outlined" onClick={loadMore}>Load more</Button>
+              </Box>
+            )}
           </Paper>
         </Grid>
       </Grid>
@@ -1,16 +1,20 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
-import { Container, Paper, Typography, List, ListItem, ListItemText } from '@mui/material';
+import { Box, Button, Container, Paper, Typography, List, ListItem, ListItemText } from '@mui/material';
+
+const PAGE_SIZE = 50;
 
 const AuditFeed = () => {
   const [logs, setLogs] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetch = async () => {
       try {
-        const res = await axios.get('/api/reports/audit');
-        setLogs(res.data || []);
+        const res = await axios.get('/api/reports/audit', { params: { paginate: 1, limit: PAGE_SIZE } });
+        setLogs(res.data.logs || []);
+        setNextCursor(res.data.next_cursor);
       } catch (err) {
         console.error(err);
       } finally {
@@ -20,6 +24,16 @@ const AuditFeed = () => {
     fetch();
   }, []);
 
+  const loadMore = async () => {
+    try {
+      const res = await axios.get('/api/reports/audit', { params: { paginate: 1, limit: PAGE_SIZE, cursor: nextCursor } });
+      setLogs(prev => [...prev, ...res.data.logs]);
+      setNextCursor(res.data.next_cursor);
+    } catch (err) {
+      console.error(err);
+    }
+  };
+
   if (loading) return <div>Loading...</div>;
 
   return (
@@ -33,6 +47,11 @@ const AuditFeed = () => {
             </ListItem>
           ))}
         </List>
+        {nextCursor && (
+          <Box sx={{ display: 'flex', justifyContent: 'center', p: 2 }}>
+            <Button variant="outlined" onClick={loadMore}>Load more</Button>
+          </Box>
+        )}
       </Paper>
     </Container>
   );
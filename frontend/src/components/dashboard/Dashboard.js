@@ -13,7 +13,7 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchReports = async () => {
       try {
-        const res = await axios.get('/api/reports/myreports');
+        const res = await axios.get('/api/reports/myreports', { params: { view: 'summary' } });
         setUserReports(res.data);
         setLoading(false);
       } catch (err) {
@@ -31,7 +31,7 @@ const Dashboard = () => {
     const year = now.getFullYear();
     
     return userReports.find(report => 
-      report.week === week.toString() && report.year === year
+      Number(report.week) === week && Number(report.year) === year
     );
   };
 
@@ -155,7 +155,7 @@ const Dashboard = () => {
                       Status: {report.status}
                     </Typography>
                     <Typography variant="body2">
-                      {report.achievements.substring(0, 100)}...
+                      {report.achievements_preview}
                     </Typography>
                   </CardContent>
                   <CardActions>
@@ -9,7 +9,7 @@ const ReportCalendar = () => {
   useEffect(() => {
     const fetch = async () => {
       try {
-        const res = await axios.get('/api/reports/myreports');
+        const res = await axios.get('/api/reports/myreports', { params: { view: 'summary' } });
         const reports = res.data || [];
         const map = {};
         reports.forEach(r => {
@@ -43,11 +43,11 @@ const ReportCalendar = () => {
                 <ListItem key={r._id} divider>
                   <ListItemText
                     primary={`Week ${r.week} — ${r.status}`}
-                    secondary={r.achievements.substring(0, 140) + (r.achievements.length > 140 ? '...' : '')}
+                    secondary={r.achievements_preview}
                   />
                   <Box>
-                    {r.attachments && r.attachments.length > 0 && (
-                      <Chip label={`${r.attachments.length} file(s)`} />
+                    {r.attachment_count > 0 && (
+                      <Chip label={`${r.attachment_count} file(s)`} />
                     )}
                   </Box>
                 </ListItem>
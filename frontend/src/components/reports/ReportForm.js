@@ -290,8 +290,8 @@ const ReportForm = () => {
               <Box sx={{ mt: 1 }}>
                 {previews.map((p, idx) => (
                   <Box key={idx} sx={{ mb: 1 }}>
-                    {p.mime && p.mime.startsWith('image/') ? (
-                      <img src={p.url} alt={p.original_name} style={{ maxWidth: 200, maxHeight: 120 }} />
+                    {p.thumbnail_url || (p.mime && p.mime.startsWith('image/')) ? (
+                      <img src={p.thumbnail_url || p.url} alt={p.original_name} style={{ maxWidth: 200, maxHeight: 120 }} />
                     ) : (
                       <Typography variant="body2">{p.original_name}</Typography>
                     )}
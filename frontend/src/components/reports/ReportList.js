@@ -15,7 +15,7 @@ const ReportList = () => {
   useEffect(() => {
     const fetchReports = async () => {
       try {
-        const params = {};
+        const params = { view: 'summary' };
         if (q) params.q = q;
         if (statusFilter) params.status = statusFilter;
         if (tagsFilter) params.tags = tagsFilter;
@@ -115,7 +115,7 @@ const ReportList = () => {
                     </Typography>
                   )}
                   <Typography variant="body2" sx={{ mt: 1 }}>
-                    {report.achievements.substring(0, 100)}...
+                    {report.achievements_preview}
                   </Typography>
                 </CardContent>
                 <CardActions>